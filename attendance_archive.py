@@ -0,0 +1,301 @@
+# attendance_archive.py
+# Moves the attendance of closed terms out of the main database into one
+# archive file per term, so the live attendance_log and its indexes only
+# hold recent terms. An archive keeps the compact attendance_log layout
+# plus the students it mentions and a readable "attendance" view, so each
+# file can also be opened on its own. The rollup tables keep counting
+# archived days, so reports do not change; exports and rollups.rebuild()
+# attach the archives a date range needs through attached_logs().
+#
+# A move is three transactions, each writing one file, so it can be re-run
+# after a crash at any point: mark the term as moving, copy its rows into
+# the archive, then delete them from the main database and clear the mark.
+# While a term is moving its rows are all still in the main database, and
+# the rollup triggers ignore inserts and deletes on its days. Scans added
+# later for an archived term's days stay in the main database until the
+# term is archived again. Such a scan can repeat a student's archived day,
+# which main's unique index cannot see, and the rollups then count both;
+# restoring keeps the earlier scan of the two (the archived one on a tie),
+# as repeat taps are handled, counts the other as a suppressed scan and
+# takes it back out of the rollups.
+#
+# Usage: python attendance_archive.py list
+#        python attendance_archive.py archive TERM [--vacuum]
+#        python attendance_archive.py restore TERM
+import argparse
+import datetime
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+import db
+import repositories
+from repositories import Row
+
+ARCHIVE_DIR = "archive"     # relative to the database file's directory
+FIRST_DAY = repositories.day_number("0001-01-01")
+LAST_DAY = repositories.day_number("9999-12-31")
+
+ARCHIVE_COLUMNS = "term_id, path, first_day, last_day, rows, moving, archived_at"
+SELECT_ALL = f"SELECT {ARCHIVE_COLUMNS} FROM attendance_archives ORDER BY first_day"
+SELECT_FOR_TERM = f"SELECT {ARCHIVE_COLUMNS} FROM attendance_archives WHERE term_id = ?"
+# Archives that are not mid-move and hold days in a range
+SELECT_OVERLAPPING = (f"SELECT {ARCHIVE_COLUMNS} FROM attendance_archives "
+                      "WHERE NOT moving AND first_day <= ? AND last_day >= ? ORDER BY first_day")
+SELECT_CLASHING = ("SELECT term_id FROM attendance_archives "
+                   "WHERE term_id <> ? AND first_day <= ? AND last_day >= ?")
+START_MOVE = """
+    INSERT INTO attendance_archives (term_id, path, first_day, last_day, rows, moving)
+    VALUES (?, ?, ?, ?, 0, 1)
+    ON CONFLICT (term_id) DO UPDATE SET moving = 1
+"""
+FINISH_MOVE = "UPDATE attendance_archives SET moving = 0, rows = ?, archived_at = ? WHERE term_id = ?"
+DELETE_ARCHIVE = "DELETE FROM attendance_archives WHERE term_id = ?"
+
+ARCHIVE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS archive.students (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS archive.attendance_status (
+        code INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS archive.attendance_log (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        seconds INTEGER NOT NULL,
+        status INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_attendance_log_day ON attendance_log (day, seconds, student_id)",
+    """CREATE VIEW IF NOT EXISTS archive.attendance AS
+        SELECT a.id AS id, s.name AS student_name, date(a.day + 2440587.5) AS date,
+               time(a.seconds, 'unixepoch') AS time, st.name AS status
+        FROM attendance_log a
+        JOIN students s ON s.id = a.student_id
+        JOIN attendance_status st ON st.code = a.status""",
+]
+# INSERT OR REPLACE by id, so repeating a copy (a resumed or repeated move) is harmless
+COPY_STATUSES = "INSERT OR REPLACE INTO archive.attendance_status (code, name) SELECT code, name FROM main.attendance_status"
+COPY_STUDENTS = """
+    INSERT OR REPLACE INTO archive.students (id, name)
+    SELECT id, name FROM main.students WHERE id IN (
+        SELECT student_id FROM main.attendance_log WHERE day BETWEEN ? AND ?)
+"""
+COPY_ROWS = """
+    INSERT OR REPLACE INTO archive.attendance_log (id, student_id, day, seconds, status)
+    SELECT id, student_id, day, seconds, status FROM main.attendance_log WHERE day BETWEEN ? AND ?
+"""
+COUNT_ROWS = "SELECT COUNT(*) FROM archive.attendance_log"
+DELETE_ROWS = "DELETE FROM main.attendance_log WHERE day BETWEEN ? AND ?"
+# Restoring: of an archived row and a main row for the same student and
+# day, the later scan loses (ties go to the archived row)
+FIND_LOSERS = """
+    CREATE TEMP TABLE restore_losers AS
+    SELECT CASE WHEN m.seconds < a.seconds THEN a.id ELSE m.id END AS id,
+           m.seconds < a.seconds AS archived, a.student_id, a.day,
+           CASE WHEN m.seconds < a.seconds THEN a.status ELSE m.status END AS status
+    FROM archive.attendance_log a
+    JOIN main.attendance_log m ON m.student_id = a.student_id AND m.day = a.day
+"""
+DELETE_LOSING_ROWS = "DELETE FROM main.attendance_log WHERE id IN (SELECT id FROM temp.restore_losers WHERE NOT archived)"
+RESTORE_ROWS = """
+    INSERT INTO main.attendance_log (id, student_id, day, seconds, status)
+    SELECT id, student_id, day, seconds, status FROM archive.attendance_log
+    WHERE id NOT IN (SELECT id FROM temp.restore_losers WHERE archived)
+"""
+# The rollup triggers are off for a moving term's days, and both rows of a
+# pair were counted, so the losers are taken out by hand
+UNCOUNT_LOSERS = [
+    """UPDATE attendance_daily SET present = present - (
+        SELECT COUNT(*) FROM temp.restore_losers l WHERE l.status = 1 AND l.day = attendance_daily.day)
+    WHERE day IN (SELECT day FROM temp.restore_losers WHERE status = 1)""",
+    "DELETE FROM attendance_daily WHERE present <= 0",
+    """UPDATE attendance_monthly SET days_present = days_present - (
+        SELECT COUNT(*) FROM temp.restore_losers l
+        WHERE l.status = 1 AND l.student_id = attendance_monthly.student_id
+          AND CAST(strftime('%Y%m', l.day + 2440587.5) AS INTEGER) = attendance_monthly.month)
+    WHERE student_id IN (SELECT student_id FROM temp.restore_losers WHERE status = 1)""",
+    "DELETE FROM attendance_monthly WHERE days_present <= 0",
+    """UPDATE attendance_term SET days_present = days_present - (
+        SELECT COUNT(*) FROM temp.restore_losers l JOIN terms t ON l.day BETWEEN t.first_day AND t.last_day
+        WHERE l.status = 1 AND l.student_id = attendance_term.student_id AND t.id = attendance_term.term_id)
+    WHERE student_id IN (SELECT student_id FROM temp.restore_losers WHERE status = 1)""",
+    "DELETE FROM attendance_term WHERE days_present <= 0",
+    """INSERT INTO scan_suppressions (day, suppressed)
+    SELECT day, COUNT(*) FROM temp.restore_losers GROUP BY day
+    ON CONFLICT (day) DO UPDATE SET suppressed = suppressed + excluded.suppressed""",
+]
+
+
+class Archive(Row):
+    __slots__ = ("term_id", "path", "first_day", "last_day", "rows", "moving", "archived_at")
+
+    @property
+    def alias(self):
+        return f"archive_{self.term_id}"
+
+
+def archive_path(path):
+    # Stored paths are relative to the database, so the two move together
+    return os.path.join(os.path.dirname(os.path.abspath(db.DB_PATH)), path)
+
+
+def archives():
+    with db.connection() as conn:
+        return [Archive(*row) for row in conn.execute(SELECT_ALL)]
+
+
+@contextmanager
+def attached(databases):
+    # ATTACH {alias: path} on this thread's connection for the duration of
+    # the block. SQLite cannot attach inside a transaction, so this must
+    # be entered outside one.
+    attached_aliases = []
+    with db.connection() as conn:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(databases) > limit:
+            raise ValueError(f"{len(databases)} archives needed but SQLite attaches at most {limit}; "
+                             "use a shorter date range")
+        try:
+            for alias, path in databases.items():
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+                attached_aliases.append(alias)
+        except sqlite3.Error:
+            for alias in attached_aliases:
+                conn.execute(f"DETACH DATABASE {alias}")
+            raise
+    try:
+        yield
+    finally:
+        with db.connection() as conn:
+            for alias in attached_aliases:
+                conn.execute(f"DETACH DATABASE {alias}")
+
+
+@contextmanager
+def attached_logs(first_day=FIRST_DAY, last_day=LAST_DAY):
+    # Yields (table, first day, last day) parts covering first_day..last_day
+    # in day order: archived terms from their archive files, the days in
+    # between from main.attendance_log.
+    with db.connection() as conn:
+        found = [Archive(*row) for row in conn.execute(SELECT_OVERLAPPING, (last_day, first_day))]
+    parts = []
+    day = first_day
+    for archive in found:
+        if archive.first_day > day:
+            parts.append(("main.attendance_log", day, archive.first_day - 1))
+        parts.append((f"{archive.alias}.attendance_log", max(archive.first_day, day),
+                      min(archive.last_day, last_day)))
+        day = archive.last_day + 1
+    if day <= last_day:
+        parts.append(("main.attendance_log", day, last_day))
+    with attached({archive.alias: archive_path(archive.path) for archive in found}):
+        yield parts
+
+
+def archive_term(term, vacuum=False):
+    # Moves a closed term's attendance into its archive file; returns the
+    # number of rows the archive holds. Also finishes an interrupted move
+    # and sweeps in rows added after an earlier one.
+    if term.end_date >= datetime.date.today().isoformat():
+        raise ValueError(f"Term {term.name} has not ended yet")
+    first_day = repositories.day_number(term.start_date)
+    last_day = repositories.day_number(term.end_date)
+    with db.connection() as conn:
+        existing = conn.execute(SELECT_FOR_TERM, (term.id,)).fetchone()
+        path = existing[1] if existing else os.path.join(ARCHIVE_DIR, f"attendance_term{term.id}.db")
+        clash = conn.execute(SELECT_CLASHING, (term.id, last_day, first_day)).fetchone()
+        if clash:
+            raise ValueError(f"Term {term.name} overlaps the archive of term {clash[0]}")
+        conn.execute(START_MOVE, (term.id, path, first_day, last_day))
+
+    os.makedirs(os.path.dirname(archive_path(path)), exist_ok=True)
+    with attached({"archive": archive_path(path)}):
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in ARCHIVE_SCHEMA:
+                conn.execute(statement)
+            conn.execute(COPY_STATUSES)
+            conn.execute(COPY_STUDENTS, (first_day, last_day))
+            conn.execute(COPY_ROWS, (first_day, last_day))
+            rows = conn.execute(COUNT_ROWS).fetchone()[0]
+        # The archive is committed; only now do the rows leave main
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(DELETE_ROWS, (first_day, last_day))
+            conn.execute(FINISH_MOVE, (rows, datetime.datetime.now().isoformat(timespec="seconds"),
+                                       term.id))
+    if vacuum:
+        with db.connection() as conn:
+            conn.execute("VACUUM")
+    return rows
+
+
+def restore_term(term):
+    # Moves an archived term's rows back into the main database and deletes
+    # the archive file; returns the number of rows restored.
+    with db.connection() as conn:
+        existing = conn.execute(SELECT_FOR_TERM, (term.id,)).fetchone()
+        if existing is None:
+            raise ValueError(f"Term {term.name} is not archived")
+        archive = Archive(*existing)
+        conn.execute(START_MOVE, (term.id, archive.path, archive.first_day, archive.last_day))
+
+    with attached({"archive": archive_path(archive.path)}):
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(FIND_LOSERS)
+            conn.execute(DELETE_LOSING_ROWS)
+            rows = conn.execute(RESTORE_ROWS).rowcount
+            for statement in UNCOUNT_LOSERS:
+                conn.execute(statement)
+            conn.execute("DROP TABLE temp.restore_losers")
+    with db.connection() as conn:
+        conn.execute(DELETE_ARCHIVE, (term.id,))
+    os.remove(archive_path(archive.path))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive the attendance of closed terms")
+    parser.add_argument("--db", default=db.DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show archived terms")
+    archive_cmd = commands.add_parser("archive", help="move a closed term to its archive file")
+    archive_cmd.add_argument("term", help="term name")
+    archive_cmd.add_argument("--vacuum", action="store_true", help="shrink the main database afterwards")
+    restore_cmd = commands.add_parser("restore", help="move an archived term back")
+    restore_cmd.add_argument("term", help="term name")
+    args = parser.parse_args(argv)
+
+    db.set_database(args.db)
+    db.init_db()
+    if args.command == "list":
+        for archive in archives():
+            state = "moving" if archive.moving else f"archived {archive.archived_at}"
+            print(f"{repositories.day_date(archive.first_day)} to {repositories.day_date(archive.last_day)}"
+                  f"  {archive.rows:>10,} rows  {archive.path}  ({state})")
+        return 0
+
+    term = repositories.terms.by_name(args.term)
+    if term is None:
+        parser.error(f"Unknown term: {args.term}")
+    started = time.perf_counter()
+    try:
+        if args.command == "archive":
+            rows = archive_term(term, args.vacuum)
+            print(f"Archived {rows:,} rows of {term.name} in {time.perf_counter() - started:.2f}s")
+        else:
+            rows = restore_term(term)
+            print(f"Restored {rows:,} rows of {term.name} in {time.perf_counter() - started:.2f}s")
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+# batch_desk.py
+# Scanner-driven batch checkout and return for the library desk. Barcode
+# scanners type the code and Enter into the scan box. A student card (the
+# student's id or name) selects the borrower, and every ISBN scanned after
+# it is an issue or a return for them, depending on the mode.
+#
+# Scans are checked against in-memory lookups loaded when the desk opens:
+# books by ISBN with their available counts, the borrowers, and the open
+# loans. Borrowers are the students plus anyone who has borrowed before:
+# the Issue box takes any name, so issues hold names no student row has.
+# Those borrowers have no card number and are scanned or typed by name. A scan is answered at once without touching the database and
+# queued. The queue is committed in batches (BATCH_SIZE scans, or
+# BATCH_DELAY_MS after the last one) in one transaction on a worker, through
+# circulation.py. Its guarded updates still have the last word: an item
+# another desk got to first fails on its own and the rest of the batch
+# commits. A batch the database refuses outright is retried a few times
+# and then its items are marked failed.
+import collections
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QListWidget
+)
+
+import circulation
+import db
+import notifications
+import isbn
+import tasks
+
+ISSUE = "issue"
+RETURN = "return"
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+
+BATCH_SIZE = 50
+BATCH_DELAY_MS = 1000
+MAX_COMMIT_RETRIES = 3
+LOG_SIZE = 500
+
+LOAD_BOOKS = "SELECT isbn, id, title, available_count FROM books WHERE isbn IS NOT NULL"
+LOAD_BORROWERS = """
+    SELECT id, name FROM students
+    UNION ALL
+    SELECT DISTINCT NULL, student_name FROM issues
+    WHERE student_name IS NOT NULL AND student_name NOT IN (SELECT name FROM students)
+"""
+LOAD_OPEN_LOANS = ("SELECT book_id, student_name, COUNT(*) FROM issues WHERE return_date IS NULL "
+                   "GROUP BY book_id, student_name")
+
+
+class DeskBook:
+    __slots__ = ("id", "title", "available")
+
+    def __init__(self, book_id, title, available):
+        self.id = book_id
+        self.title = title
+        self.available = available
+
+
+class DeskItem:
+    __slots__ = ("mode", "book", "student_name", "status", "message")
+
+    def __init__(self, mode, book, student_name):
+        self.mode = mode
+        self.book = book
+        self.student_name = student_name
+        self.status = QUEUED
+        self.message = ""
+
+    def __str__(self):
+        action = "Issue" if self.mode == ISSUE else "Return"
+        text = f"{action} '{self.book.title}' - {self.student_name}"
+        if self.status == FAILED:
+            return f"✗ {text}: {self.message}"
+        return f"{'✓' if self.status == DONE else '…'} {text}"
+
+
+class Lookups:
+    # Loaded on a worker; afterwards only touched by the UI thread
+    def __init__(self):
+        with db.connection() as conn:
+            self.books = {isbn: DeskBook(book_id, title, available)
+                          for isbn, book_id, title, available in conn.execute(LOAD_BOOKS)}
+            self.students_by_id = {}
+            self.students_by_name = {}
+            for student_id, name in conn.execute(LOAD_BORROWERS):
+                if student_id is not None:
+                    self.students_by_id[str(student_id)] = name
+                self.students_by_name[name.casefold()] = name
+            self.open_loans = collections.Counter(
+                {(book_id, name): count for book_id, name, count in conn.execute(LOAD_OPEN_LOANS)})
+
+
+class DeskBatch:
+    # The queue and the in-memory checks, without any Qt
+    def __init__(self, lookups):
+        self.lookups = lookups
+        self.mode = ISSUE
+        self.student_name = None
+        self.queue = []
+
+    def scan(self, code):
+        # Returns (DeskItem or None, message); raises ValueError for a scan
+        # that cannot be queued
+        code = code.strip()
+        if not code:
+            raise ValueError("Empty scan")
+        book = self.lookups.books.get(isbn.canonical(code))
+        if book is not None:
+            return self._book(book), None
+        name = self.lookups.students_by_id.get(code) or self.lookups.students_by_name.get(code.casefold())
+        if name is not None:
+            self.student_name = name
+            return None, f"Borrower: {name}"
+        try:
+            code_isbn = isbn.normalize(code)
+        except ValueError:
+            raise ValueError(f"Unknown student card or ISBN: {code}") from None
+        raise ValueError(f"No book with ISBN {code_isbn}")
+
+    def _book(self, book):
+        if self.student_name is None:
+            raise ValueError("Scan the student's card first")
+        key = (book.id, self.student_name)
+        if self.mode == ISSUE:
+            if book.available <= 0:
+                raise ValueError(f"No copies of '{book.title}' left")
+            book.available -= 1
+            self.lookups.open_loans[key] += 1
+        else:
+            if self.lookups.open_loans[key] <= 0:
+                raise ValueError(f"{self.student_name} has no open loan of '{book.title}'")
+            book.available += 1
+            self.lookups.open_loans[key] -= 1
+        item = DeskItem(self.mode, book, self.student_name)
+        self.queue.append(item)
+        return item
+
+    def take(self):
+        items, self.queue = self.queue, []
+        return items
+
+    def failed(self, item):
+        # Undo what the scan assumed
+        key = (item.book.id, item.student_name)
+        if item.mode == ISSUE:
+            item.book.available += 1
+            self.lookups.open_loans[key] -= 1
+        else:
+            item.book.available -= 1
+            self.lookups.open_loans[key] += 1
+
+
+def commit(items, today=None):
+    # Worker side: one transaction for the batch; returns the items with
+    # their status set. circulation.py writes nothing for an item it
+    # refuses, so a refusal does not spoil the others.
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for item in items:
+            try:
+                if item.mode == ISSUE:
+                    circulation.issue(item.book.id, item.student_name, today)
+                else:
+                    circulation.return_copy(item.book.id, item.student_name, today)
+                item.status = DONE
+            except circulation.CirculationError as e:
+                item.status = FAILED
+                item.message = str(e)
+    return items
+
+
+class BatchDesk(QWidget):
+    def __init__(self, on_committed=None, parent=None):
+        # on_committed() runs after each batch, e.g. to reload book lists
+        super().__init__(parent)
+        self.on_committed = on_committed
+        self.batch = None
+        self.in_flight = []
+        self.retries = 0     # failed commits of the batch in flight
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        self.mode_input = QComboBox()
+        self.mode_input.addItem("Batch checkout", ISSUE)
+        self.mode_input.addItem("Batch return", RETURN)
+        self.mode_input.currentIndexChanged.connect(self.mode_changed)
+        controls.addWidget(self.mode_input)
+        self.scan_input = QLineEdit()
+        self.scan_input.setPlaceholderText("Loading catalogue...")
+        self.scan_input.setEnabled(False)
+        self.scan_input.returnPressed.connect(self.scanned)
+        controls.addWidget(self.scan_input, 1)
+        commit_btn = QPushButton("Commit now")
+        commit_btn.clicked.connect(self.commit)
+        controls.addWidget(commit_btn)
+        layout.addLayout(controls)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.log = QListWidget()
+        layout.addWidget(self.log)
+
+        self.commit_timer = QTimer(self)
+        self.commit_timer.setSingleShot(True)
+        self.commit_timer.setInterval(BATCH_DELAY_MS)
+        self.commit_timer.timeout.connect(self.commit)
+
+        tasks.submit(self, Lookups, on_result=self.loaded)
+
+    def loaded(self, lookups):
+        self.batch = DeskBatch(lookups)
+        self.batch.mode = self.mode_input.currentData()
+        # Scans still queued when the screen closes are committed anyway
+        batch = self.batch
+        self.destroyed.connect(lambda _=None: _commit_leftovers(batch))
+        self.scan_input.setPlaceholderText("Scan a student card, then their books")
+        self.scan_input.setEnabled(True)
+        self.scan_input.setFocus()
+        self.update_status()
+
+    def mode_changed(self):
+        if self.batch is not None:
+            self.commit()
+            self.batch.mode = self.mode_input.currentData()
+        self.scan_input.setFocus()
+
+    def scanned(self):
+        code = self.scan_input.text()
+        self.scan_input.clear()
+        try:
+            item, message = self.batch.scan(code)
+        except ValueError as e:
+            self.add_log(f"✗ {e}")
+            notifications.warning(str(e))
+            return
+        if item is None:
+            self.add_log(message)
+        else:
+            self.add_log(str(item))
+            if len(self.batch.queue) >= BATCH_SIZE:
+                self.commit()
+            else:
+                self.commit_timer.start()
+        self.update_status()
+
+    def commit(self):
+        self.commit_timer.stop()
+        if self.in_flight or self.batch is None or not self.batch.queue:
+            return
+        self.in_flight = self.batch.take()
+        tasks.submit(self, commit, self.in_flight, on_result=self.committed,
+                     on_error=self.commit_failed, write=True)
+
+    def committed(self, items):
+        self.in_flight = []
+        self.retries = 0
+        failed = [item for item in items if item.status == FAILED]
+        for item in failed:
+            self.batch.failed(item)
+            notifications.warning(f"{item.book.title}: {item.message}")
+        saved = len(items) - len(failed)
+        if saved:
+            notifications.info(f"Desk batch saved: {saved} items.")
+        try:
+            for item in failed:
+                self.add_log(str(item))
+            if saved:
+                self.add_log(f"✓ Saved {saved} items")
+            self.update_status()
+            if self.on_committed is not None:
+                self.on_committed()
+            if self.batch.queue:
+                self.commit_timer.start()
+        except RuntimeError:
+            pass    # screen already closed
+
+    def commit_failed(self, message):
+        # The transaction rolled back. The batch goes back on the queue (the
+        # database may only have been busy) until it has failed
+        # MAX_COMMIT_RETRIES times; then its items fail and are undone.
+        items, self.in_flight = self.in_flight, []
+        self.retries += 1
+        if self.retries <= MAX_COMMIT_RETRIES:
+            notifications.error(f"Desk batch not saved, will retry: {message}")
+            self.batch.queue[:0] = items
+            items = []
+        else:
+            self.retries = 0
+            notifications.error(f"Desk batch of {len(items)} items not saved: {message}")
+            for item in items:
+                item.status = FAILED
+                item.message = message
+                self.batch.failed(item)
+        try:
+            for item in items:
+                self.add_log(str(item))
+            self.update_status()
+            if self.batch.queue:
+                self.commit_timer.start()
+        except RuntimeError:
+            _commit_leftovers(self.batch)
+
+    def add_log(self, text):
+        self.log.insertItem(0, text)
+        if self.log.count() > LOG_SIZE:
+            self.log.takeItem(self.log.count() - 1)
+
+    def update_status(self):
+        borrower = self.batch.student_name or "none"
+        self.status_label.setText(f"Borrower: {borrower}   Queued: {len(self.batch.queue)}")
+
+
+def _commit_leftovers(batch):
+    items = batch.take()
+    if items:
+        tasks.submit(batch, commit, items, write=True,
+                     on_error=lambda m: notifications.error(f"Desk batch not saved: {m}"))
@@ -0,0 +1,363 @@
+# benchmark.py
+# Headless benchmark suite. Times each module's load and add paths (through
+# the repositories the widgets use) and the key indexed lookups against a
+# seeded database, then appends the results to a history file and compares
+# them with the previous run on the same data.
+#
+# Usage: python benchmark.py [--db bench.db] [--repeat 20] [--fail-on-regression]
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+import batch_desk
+import bus_assignment
+import db
+import query_plans
+import repositories
+import rollups
+import seed_data
+import stops
+
+HISTORY_FILE = "benchmark_results.jsonl"
+REGRESSION_THRESHOLD = 0.25     # 25% slower median
+REGRESSION_FLOOR_MS = 0.05      # ignore noise on sub-50us cases
+
+CASES = []
+
+
+def case(name, repeat=None):
+    # Register fn(ctx) as a benchmark; repeat overrides --repeat for slow cases
+    def register(fn):
+        CASES.append((name, fn, repeat))
+        return fn
+    return register
+
+
+class Context:
+    def __init__(self):
+        with db.connection() as conn:
+            self.last_day = repositories.day_date(
+                conn.execute("SELECT MAX(day) FROM attendance_log").fetchone()[0])
+            self.hostel_id = conn.execute("SELECT MIN(id) FROM hostels").fetchone()[0]
+        self.term = repositories.terms.all()[-1]
+        self.counter = 0
+        self.created = []
+        self._desk = None
+
+    @property
+    def desk(self):
+        # The library batch desk's in-memory lookups, loaded once
+        if self._desk is None:
+            self._desk = batch_desk.DeskBatch(batch_desk.Lookups())
+            self.desk_student = next(iter(self._desk.lookups.students_by_id))
+            self.desk_isbns = [code for code, book in self._desk.lookups.books.items()
+                               if book.available >= 1][:20]
+        return self._desk
+
+    def next_id(self):
+        self.counter += 1
+        return self.counter
+
+    def track(self, table, row_id):
+        self.created.append((table, row_id))
+
+    def cleanup(self):
+        # Remove rows added by the add cases so the data set stays stable
+        with db.connection() as conn:
+            for table, row_id in self.created:
+                conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+        self.created = []
+
+
+# --- Module load paths ---
+
+@case("lms.load")
+def _lms_load(ctx):
+    repositories.assignments.page()
+
+
+@case("library.load")
+def _library_load(ctx):
+    repositories.books.page()
+
+
+@case("library.load_sorted_page")
+def _library_load_sorted(ctx):
+    first = repositories.books.page(sort="title")
+    repositories.books.page(after=repositories.books.page_key(first[-1], "title"), sort="title")
+
+
+@case("library.filter", repeat=5)
+def _library_filter(ctx):
+    repositories.books.page(search="Ocean")
+
+
+@case("library.search_as_you_type")
+def _library_search_as_you_type(ctx):
+    # One query per keystroke, as the search box issues them
+    for typed in ("r", "ri", "riv", "rive", "river", "river o", "river oc", "river oce"):
+        repositories.books.page(search=typed)
+
+
+@case("library.desk_scans")
+def _library_desk_scans(ctx):
+    # A student card and 20 checkouts, then the 20 returns; nothing commits
+    desk = ctx.desk
+    for mode in (batch_desk.ISSUE, batch_desk.RETURN):
+        desk.mode = mode
+        desk.scan(ctx.desk_student)
+        for code in ctx.desk_isbns:
+            desk.scan(code)
+    desk.take()
+
+
+@case("transport.load")
+def _transport_load(ctx):
+    repositories.buses.page()
+    repositories.routes.page()
+
+
+@case("transport.assign_riders")
+def _transport_assign_riders(ctx):
+    # Every rider placed afresh; rolled back
+    bus_assignment.assign(rebalance=True, dry_run=True)
+
+
+@case("transport.nearest_stops")
+def _transport_nearest_stops(ctx):
+    stops.nearest(*seed_data.TOWN_CENTRE, 5)
+
+
+@case("hostel.load")
+def _hostel_load(ctx):
+    repositories.rooms.page()
+
+
+@case("inventory.load")
+def _inventory_load(ctx):
+    repositories.inventory.page()
+
+
+@case("hr.load")
+def _hr_load(ctx):
+    repositories.staff.page()
+
+
+@case("biometric.load_today")
+def _biometric_load(ctx):
+    repositories.attendance.page(sort="time", day=repositories.day_number(ctx.last_day))
+
+
+# --- Module add paths ---
+
+@case("lms.add")
+def _lms_add(ctx):
+    row_id = repositories.assignments.add(f"Bench {ctx.next_id()}", "", "", ctx.last_day)
+    ctx.track("assignments", row_id)
+
+
+@case("library.add")
+def _library_add(ctx):
+    row_id = repositories.books.add(f"Bench {ctx.next_id()}", "Bench", "", 1)
+    ctx.track("books", row_id)
+
+
+@case("transport.add_bus")
+def _transport_add(ctx):
+    row_id = repositories.buses.add(f"BENCH-{ctx.next_id()}", "Bench")
+    ctx.track("buses", row_id)
+
+
+@case("hostel.add_room")
+def _hostel_add(ctx):
+    row_id = repositories.rooms.add(ctx.hostel_id, f"B{ctx.next_id()}", 2)
+    ctx.track("rooms", row_id)
+
+
+@case("inventory.add")
+def _inventory_add(ctx):
+    row_id = repositories.inventory.add(f"Bench {ctx.next_id()}", 1, "Bench")
+    ctx.track("inventory_items", row_id)
+
+
+@case("hr.add")
+def _hr_add(ctx):
+    row_id = repositories.staff.add(f"Bench {ctx.next_id()}", "Bench", 1.0)
+    ctx.track("staff", row_id)
+
+
+@case("biometric.add")
+def _biometric_add(ctx):
+    name = f"Bench {ctx.next_id()}"
+    row_id = repositories.attendance.add(name, ctx.last_day, "09:00:00", "Present")
+    ctx.track("attendance_log", row_id)
+    ctx.track("students", repositories.students.id_for(name))
+
+
+# --- Reports (read the rollup tables) ---
+
+@case("report.term")
+def _report_term(ctx):
+    rollups.term_report(ctx.term)
+
+
+@case("report.year")
+def _report_year(ctx):
+    last = datetime.date.fromisoformat(ctx.last_day)
+    rollups.month_report(f"{last.year - 1}-{last.month + 1:02d}" if last.month < 12
+                         else f"{last.year}-01", ctx.last_day[:7])
+
+
+# --- Key lookups (the filtered queries from query_plans.py) ---
+
+def _register_lookups():
+    for label, sql, params, may_scan in query_plans.QUERIES:
+        if may_scan:
+            continue
+
+        def run(ctx, sql=sql, params=params):
+            with db.connection() as conn:
+                conn.execute(sql, params).fetchall()
+                # Rollup and archive statements write: time them, keep nothing
+                if conn.in_transaction:
+                    conn.rollback()
+
+        # Range exports read many rows; a few runs are enough
+        case(f"query.{label}", repeat=3 if label.startswith("export.") else None)(run)
+
+
+_register_lookups()
+
+
+def time_case(fn, ctx, repeat):
+    fn(ctx)     # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(ctx)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(samples[0], 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "runs": repeat,
+    }
+
+
+def run(repeat, selected=None):
+    ctx = Context()
+    results = {}
+    for name, fn, case_repeat in CASES:
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        results[name] = time_case(fn, ctx, case_repeat or repeat)
+    ctx.cleanup()
+    return results
+
+
+def table_counts():
+    with db.connection() as conn:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name != 'schema_version' ORDER BY name")]
+        counts = {}
+        for t in tables:
+            try:
+                counts[t] = conn.execute(f"SELECT MAX(rowid) FROM {t}").fetchone()[0] or 0
+            except sqlite3.OperationalError:     # WITHOUT ROWID rollup tables
+                counts[t] = conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        return counts
+
+
+def git_version():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def load_previous(history_path, dataset):
+    previous = None
+    if os.path.exists(history_path):
+        with open(history_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get("dataset") == dataset:
+                    previous = entry
+    return previous
+
+
+def compare(results, previous):
+    regressions = []
+    for name, stats in results.items():
+        before = previous["results"].get(name) if previous else None
+        if not before:
+            continue
+        delta = stats["median_ms"] - before["median_ms"]
+        if delta > REGRESSION_FLOOR_MS and delta > before["median_ms"] * REGRESSION_THRESHOLD:
+            regressions.append((name, before["median_ms"], stats["median_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark module load/add paths and lookups")
+    parser.add_argument("--db", default="bench.db", help="seeded database (created if missing)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="only run cases with these name prefixes")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--books", type=int, default=50000)
+    parser.add_argument("--staff", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    seeded = os.path.exists(args.db)
+    db.set_database(args.db)
+    db.init_db()
+    if not seeded:
+        print(f"Seeding {args.db}...")
+        seed_data.seed(seed_data.Scale(students=args.students, years=args.years,
+                                       books=args.books, staff=args.staff))
+        with db.connection() as conn:
+            conn.execute("ANALYZE")
+
+    counts = table_counts()
+    # Runs are compared only against earlier runs on the same data set
+    dataset = ",".join(f"{table}={count}" for table, count in counts.items())
+    results = run(args.repeat, args.only)
+    previous = load_previous(args.history, dataset)
+
+    print(f"{'case':45} {'median ms':>10} {'p95 ms':>10} {'previous':>10}")
+    for name, stats in results.items():
+        before = previous["results"].get(name, {}).get("median_ms", "") if previous else ""
+        print(f"{name:45} {stats['median_ms']:>10.3f} {stats['p95_ms']:>10.3f} {before:>10}")
+
+    regressions = compare(results, previous)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms")
+
+    if not args.no_save:
+        entry = {
+            "version": git_version(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "dataset": dataset,
+            "results": results,
+        }
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
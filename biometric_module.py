@@ -1,23 +1,51 @@
 # biometric_module.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 )
-from PyQt5.QtCore import QDateTime
-import db
+from PyQt5.QtCore import QDateTime, QTimer, pyqtSignal
+import notifications
+import repositories
+import scan_ingest
+import tasks
+from list_models import PagedList
 import datetime
 
+REFRESH_DELAY_MS = 250      # coalesce refreshes during a burst of scans
+POLL_INTERVAL_MS = 5000     # pick up scans from other terminals, notice midnight
+SINCE_BATCH = 1000
+
+
+def fetch_new_scans(after_id, date):
+    # Rows added after the watermark, the new watermark and the day's
+    # suppressed repeat scans. Rows for other dates (imports, backfills)
+    # still move the watermark past them.
+    rows = []
+    while True:
+        batch = repositories.attendance.since(after_id, SINCE_BATCH)
+        if batch:
+            after_id = batch[-1].id
+        rows.extend(row for row in batch if row.date == date)
+        if len(batch) < SINCE_BATCH:
+            return rows, after_id, repositories.attendance.suppressed(date)
+
+
 class BiometricModule(QWidget):
+    # Emitted from the scan writer thread; Qt queues them to the UI thread
+    scan_saved = pyqtSignal(str)
+    scan_repeated = pyqtSignal(str)
+    scan_failed = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Biometric/RFID Attendance")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Student input
         self.student_input = QLineEdit()
         self.student_input.setPlaceholderText("Enter Student Name (Simulated Scan)")
+        self.student_input.returnPressed.connect(self.mark_attendance)
         layout.addWidget(self.student_input)
 
         # Mark Present Button
@@ -25,44 +53,135 @@ class BiometricModule(QWidget):
         mark_btn.clicked.connect(self.mark_attendance)
         layout.addWidget(mark_btn)
 
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
         # Attendance List
-        self.attendance_list = QListWidget()
-        layout.addWidget(QLabel("📅 Today's Attendance:"))
+        self.attendance_list = PagedList(
+            repositories.attendance, self.format_record,
+            sorts=[("By time", "time", False), ("Latest first", "time", True)],
+            search_placeholder="Filter by student")
+        self.count_label = QLabel("📅 Today's Attendance:")
+        layout.addWidget(self.count_label)
         layout.addWidget(self.attendance_list)
 
         self.setLayout(layout)
+
+        # Incremental refresh state: rows with id <= watermark are counted
+        # (and loaded, or reachable by scrolling); newer rows get merged in
+        self.today = None
+        self.watermark = None
+        self.today_count = 0
+        self.today_suppressed = 0
+        self.polling = False
+        self.poll_again = False
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh_attendance)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.refresh_attendance)
+        self.poll_timer.start()
+        self.scan_saved.connect(self.attendance_marked)
+        self.scan_repeated.connect(self.attendance_repeated)
+        self.scan_failed.connect(self.attendance_failed)
+
         self.load_today_attendance()
 
     def mark_attendance(self):
         name = self.student_input.text().strip()
         if not name:
-            QMessageBox.warning(self, "Input Error", "Student name is required.")
+            notifications.warning("Student name is required.")
             return
 
-        now = datetime.datetime.now()
-        date = now.strftime("%Y-%m-%d")
-        time = now.strftime("%H:%M:%S")
-        status = "Present"
+        # Queued for the group-commit writer; the form is ready for the next
+        # scan straight away and the list catches up once the batch commits
+        try:
+            future = scan_ingest.get_ingestor().submit(name, timeout=0)
+        except scan_ingest.QueueFull:
+            notifications.warning("Too many scans are waiting to be saved. Please scan again.")
+            return
+        future.add_done_callback(lambda f: self.scan_done(name, f))
+        self.student_input.clear()
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO attendance (student_name, date, time, status)
-            VALUES (?, ?, ?, ?)
-        """, (name, date, time, status))
-        conn.commit()
-        conn.close()
+    def scan_done(self, name, future):
+        # Runs on the writer thread
+        try:
+            if future.exception() is not None:
+                self.scan_failed.emit(name, str(future.exception()))
+            elif future.result() is None:
+                self.scan_repeated.emit(name)
+            else:
+                self.scan_saved.emit(name)
+        except RuntimeError:
+            pass    # widget already deleted
 
-        self.student_input.clear()
-        self.load_today_attendance()
-        QMessageBox.information(self, "Success", f"{name}'s attendance marked.")
+    def attendance_marked(self, name):
+        self.status_label.setText(f"{name}'s attendance marked.")
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def attendance_repeated(self, name):
+        self.status_label.setText(f"{name} is already marked present today.")
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def attendance_failed(self, name, message):
+        self.status_label.setText(f"Could not save {name}'s attendance.")
+        notifications.error(f"Could not save {name}'s attendance: {message}")
 
     def load_today_attendance(self):
-        self.attendance_list.clear()
-        today = datetime.date.today().strftime("%Y-%m-%d")
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT student_name, time FROM attendance WHERE date = ?", (today,))
-        for name, time in cursor.fetchall():
-            self.attendance_list.addItem(f"{name} - {time}")
-        conn.close()
+        # Full reload, at startup and when the day rolls over. The watermark
+        # is read before the first page so no row can fall in between.
+        self.today = datetime.date.today().strftime("%Y-%m-%d")
+        self.watermark = None
+        tasks.cancel(self)
+        self.polling = False
+        tasks.submit(self, repositories.attendance.day_summary, self.today,
+                     on_result=self.day_loaded)
+
+    def day_loaded(self, summary):
+        self.today_count, self.watermark, self.today_suppressed = summary
+        self.update_count()
+        self.attendance_list.refresh(day=repositories.day_number(self.today))
+
+    def refresh_attendance(self):
+        # Fetch only rows added since the last refresh
+        if datetime.date.today().strftime("%Y-%m-%d") != self.today:
+            self.load_today_attendance()
+            return
+        if self.watermark is None:
+            return
+        if self.polling:
+            self.poll_again = True
+            return
+        self.polling = True
+        tasks.submit(self, fetch_new_scans, self.watermark, self.today,
+                     on_result=self.scans_fetched, on_error=self.poll_failed)
+
+    def scans_fetched(self, result):
+        rows, self.watermark, self.today_suppressed = result
+        self.polling = False
+        self.today_count += len(rows)
+        self.update_count()
+        if rows:
+            self.attendance_list.merge(rows)
+        if self.poll_again:
+            self.poll_again = False
+            self.refresh_attendance()
+
+    def poll_failed(self, message):
+        self.polling = False
+        tasks.show_error(self, message)
+
+    def update_count(self):
+        text = f"📅 Today's Attendance: {self.today_count}"
+        if self.today_suppressed:
+            text += f" ({self.today_suppressed} repeat scans ignored)"
+        self.count_label.setText(text)
+
+    @staticmethod
+    def format_record(record):
+        return f"{record.student_name} - {record.time}"
@@ -0,0 +1,251 @@
+# bus_assignment.py
+# Bulk assignment of transport riders to buses. Riders (transport_riders)
+# give the area they are picked up in, routes serve areas (route_areas) and
+# each bus runs one route with a number of seats. Balanced means the sum of
+# riders² / seats over the buses is as small as it can be made, which fills
+# the buses serving an area in proportion to their seats. solve() works in
+# memory:
+#
+#   1. Greedy: riders whose area has the fewest seats go first; each takes
+#      the bus serving their area where one more rider adds least to that
+#      sum (about: the least full one, by share of its seats).
+#   2. Repair: when every bus serving a rider's area is full, a breadth-
+#      first search looks for a chain of moves (someone on one of those
+#      buses moves to another bus serving their own area, someone there
+#      moves on, and so on) that ends at a bus with room. These are
+#      augmenting paths, so a rider is only left without a seat when no
+#      reshuffle of the others could make room; an area found stuck stays
+#      stuck for the rest of the run.
+#   3. Balance: within each area, riders move from bus to bus while a move
+#      lowers the sum. Every move lowers it, so this cannot cycle.
+#
+# Riders already on a bus that serves their area keep their seat, and only
+# the others are placed and moved; rebalance=True places everyone afresh.
+# Seats held by students who are not riders (assigned some other way) are
+# left alone. assign() writes the result in one transaction, an upsert for
+# each rider whose bus changed and a delete for each rider left without a
+# seat, so a failure leaves the old assignment whole.
+#
+# Usage: python bus_assignment.py [--db school.db] [--rebalance] [--dry-run]
+import argparse
+import sys
+import time
+from collections import defaultdict, deque
+
+import db
+
+MAX_BALANCE_PASSES = 20
+
+LOAD_RIDERS = """
+    SELECT r.student_name, r.area, t.bus_id
+    FROM transport_riders r LEFT JOIN transport_assignment t ON t.student_name = r.student_name
+    ORDER BY r.student_name
+"""
+LOAD_BUSES = "SELECT id, route_id, capacity FROM buses WHERE route_id IS NOT NULL"
+LOAD_ROUTE_AREAS = "SELECT route_id, area FROM route_areas"
+# Seats taken by students who are not riders
+LOAD_TAKEN = """
+    SELECT t.bus_id, COUNT(*) FROM transport_assignment t
+    WHERE NOT EXISTS (SELECT 1 FROM transport_riders r WHERE r.student_name = t.student_name)
+    GROUP BY t.bus_id
+"""
+UPSERT_SEAT = """
+    INSERT INTO transport_assignment (student_name, bus_id, route_id) VALUES (?, ?, ?)
+    ON CONFLICT (student_name) DO UPDATE SET bus_id = excluded.bus_id, route_id = excluded.route_id
+"""
+DELETE_SEAT = "DELETE FROM transport_assignment WHERE student_name = ?"
+
+
+class Plan:
+    __slots__ = ("seats", "unplaced", "kept", "load", "capacity", "routes", "changed", "removed")
+
+    def __init__(self, capacity, routes, load):
+        self.seats = {}         # student name -> bus id
+        self.unplaced = []      # names of riders no bus serving their area had room for
+        self.kept = 0           # riders left on the bus they were on
+        self.load = load        # bus id -> seats taken, including by others
+        self.capacity = capacity
+        self.routes = routes    # bus id -> route id
+        self.changed = 0        # set by assign()
+        self.removed = 0
+
+    def fullest(self):
+        return max((self.load[bus] / seats for bus, seats in self.capacity.items() if seats), default=0.0)
+
+    def emptiest(self):
+        return min((self.load[bus] / seats for bus, seats in self.capacity.items() if seats), default=0.0)
+
+
+def solve(riders, buses, route_areas, taken=None, rebalance=False):
+    # riders: (student name, area, current bus id or None); buses: (bus id,
+    # route id, seats); route_areas: (route id, area); taken: bus id ->
+    # seats held by others. Areas are matched case-insensitively.
+    capacity = {}
+    routes = {}
+    route_buses = defaultdict(list)
+    for bus, route, seats in buses:
+        capacity[bus] = seats
+        routes[bus] = route
+        if seats > 0:
+            route_buses[route].append(bus)
+    area_buses = defaultdict(list)
+    for route, area in route_areas:
+        area_buses[area.strip().casefold()].extend(route_buses.get(route, ()))
+    load = defaultdict(int)
+    for bus, count in (taken or {}).items():
+        if bus in capacity:
+            load[bus] += count
+    plan = Plan(capacity, routes, load)
+    movable = defaultdict(lambda: defaultdict(list))     # bus -> area -> riders that may move
+
+    def seat(student, area, bus):
+        plan.seats[student] = bus
+        load[bus] += 1
+        movable[bus][area].append(student)
+
+    # Riders already on a bus serving their area stay put
+    waiting = []
+    for student, area, current in riders:
+        area = area.strip().casefold()
+        if (not rebalance and current in capacity and current in area_buses[area]
+                and load[current] < capacity[current]):
+            plan.seats[student] = current
+            load[current] += 1
+            plan.kept += 1
+        else:
+            waiting.append((student, area))
+
+    # 1. Greedy, scarcest areas first, and 2. repair when that fails
+    area_seats = {area: sum(capacity[bus] for bus in set(candidates))
+                  for area, candidates in area_buses.items()}
+    waiting.sort(key=lambda rider: (area_seats.get(rider[1], 0), rider[1]))
+    stuck = set()
+    for student, area in waiting:
+        best = None
+        best_cost = None
+        for bus in area_buses.get(area, ()):
+            if load[bus] < capacity[bus]:
+                cost = _added(load[bus], capacity[bus])
+                if best is None or cost < best_cost or (cost == best_cost and bus < best):
+                    best, best_cost = bus, cost
+        if best is None and area not in stuck:
+            best = _free_seat(plan, movable, area_buses, area)
+        if best is None:
+            stuck.add(area)
+            plan.unplaced.append(student)
+        else:
+            seat(student, area, best)
+
+    # 3. Balance each area's buses
+    for _ in range(MAX_BALANCE_PASSES):
+        if not _balance(plan, movable, area_buses):
+            break
+    return plan
+
+
+def _added(riders, seats):
+    # What one more rider adds to riders² / seats
+    return (2 * riders + 1) / seats
+
+
+def _free_seat(plan, movable, area_buses, area):
+    # Frees a seat on a bus serving area by a chain of moves; returns that
+    # bus, or None when there is no such chain
+    load, capacity = plan.load, plan.capacity
+    came_from = {}      # bus -> (bus a rider moves in from, that rider's area)
+    queue = deque()
+    for bus in area_buses.get(area, ()):
+        if bus not in came_from:
+            came_from[bus] = None
+            queue.append(bus)
+    while queue:
+        bus = queue.popleft()
+        if load[bus] < capacity[bus]:
+            load[bus] += 1
+            while came_from[bus] is not None:
+                previous, moving_area = came_from[bus]
+                student = movable[previous][moving_area].pop()
+                movable[bus][moving_area].append(student)
+                plan.seats[student] = bus
+                bus = previous
+            load[bus] -= 1
+            return bus
+        for other_area, others in movable[bus].items():
+            if others:
+                for following in area_buses[other_area]:
+                    if following not in came_from:
+                        came_from[following] = (bus, other_area)
+                        queue.append(following)
+    return None
+
+
+def _balance(plan, movable, area_buses):
+    # One pass over the areas; True if anyone moved
+    load, capacity = plan.load, plan.capacity
+    moved = False
+    for area, candidates in area_buses.items():
+        if len(candidates) < 2:
+            continue
+        while True:
+            fullest = max((bus for bus in candidates if movable[bus][area]),
+                          key=lambda bus: _added(load[bus] - 1, capacity[bus]), default=None)
+            emptiest = min((bus for bus in candidates if load[bus] < capacity[bus]),
+                           key=lambda bus: _added(load[bus], capacity[bus]), default=None)
+            if (fullest is None or emptiest is None or fullest == emptiest
+                    or _added(load[emptiest], capacity[emptiest]) >= _added(load[fullest] - 1, capacity[fullest])):
+                break
+            student = movable[fullest][area].pop()
+            movable[emptiest][area].append(student)
+            plan.seats[student] = emptiest
+            load[fullest] -= 1
+            load[emptiest] += 1
+            moved = True
+    return moved
+
+
+def load_problem(conn):
+    return (conn.execute(LOAD_RIDERS).fetchall(), conn.execute(LOAD_BUSES).fetchall(),
+            conn.execute(LOAD_ROUTE_AREAS).fetchall(), dict(conn.execute(LOAD_TAKEN).fetchall()))
+
+
+def assign(rebalance=False, dry_run=False):
+    # Places every rider and saves the result; returns the Plan
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        riders, buses, route_areas, taken = load_problem(conn)
+        plan = solve(riders, buses, route_areas, taken, rebalance)
+        current = {student: bus for student, _, bus in riders if bus is not None}
+        changed = [(student, bus, plan.routes[bus]) for student, bus in plan.seats.items()
+                   if current.get(student) != bus]
+        removed = [(student,) for student in plan.unplaced if student in current]
+        plan.changed = len(changed)
+        plan.removed = len(removed)
+        if dry_run:
+            conn.rollback()
+            return plan
+        conn.executemany(UPSERT_SEAT, changed)
+        conn.executemany(DELETE_SEAT, removed)
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign transport riders to buses")
+    parser.add_argument("--db", default=db.DB_PATH)
+    parser.add_argument("--rebalance", action="store_true", help="move riders who already have a seat too")
+    parser.add_argument("--dry-run", action="store_true", help="report without saving")
+    args = parser.parse_args(argv)
+
+    db.set_database(args.db)
+    db.init_db()
+    start = time.perf_counter()
+    plan = assign(args.rebalance, args.dry_run)
+    elapsed = time.perf_counter() - start
+    print(f"{len(plan.seats)} riders seated ({plan.kept} kept their bus), {len(plan.unplaced)} without a seat;"
+          f" {plan.changed} assignments changed, {plan.removed} removed in {elapsed:.2f}s"
+          f"{' (dry run)' if args.dry_run else ''}")
+    print(f"Buses {plan.emptiest():.0%} to {plan.fullest():.0%} full")
+    return 1 if plan.unplaced else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
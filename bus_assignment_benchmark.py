@@ -0,0 +1,110 @@
+# bus_assignment_benchmark.py
+# Times bus_assignment.assign() on a synthetic district: riders spread
+# unevenly over the areas (some areas much busier than others), routes
+# serving three areas each and one bus per route. Three runs: the first
+# seats everyone, the second finds nothing to change, and a rebalance
+# places everyone afresh. Afterwards the saved rows are checked: every
+# rider's bus serves their area and no bus has more riders than seats.
+#
+# Usage: python bus_assignment_benchmark.py [--db assign.db] [--students 10000] [--buses 100] [--areas 40]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import bus_assignment
+import db
+import repositories
+
+CHECK_WRONG_AREA = """
+    SELECT COUNT(*) FROM transport_assignment t JOIN transport_riders r ON r.student_name = t.student_name
+    WHERE NOT EXISTS (SELECT 1 FROM buses b JOIN route_areas a ON a.route_id = b.route_id
+                      WHERE b.id = t.bus_id AND a.area = r.area)
+"""
+CHECK_OVERFULL = """
+    SELECT COUNT(*) FROM buses b
+    WHERE b.capacity < (SELECT COUNT(*) FROM transport_assignment t WHERE t.bus_id = b.id)
+"""
+COUNT_SEATED = "SELECT COUNT(*) FROM transport_assignment"
+
+
+def build(students, buses, areas, seed=7):
+    # Seats for about 10% more riders than there are
+    rnd = random.Random(seed)
+    names = [f"Area {n + 1}" for n in range(areas)]
+    weights = [rnd.uniform(0.2, 3.0) for _ in names]
+    seats = students * 11 // 10 // buses
+    with db.connection() as conn:
+        conn.executemany(repositories.RouteRepository.INSERT,
+                         ((f"Route {i + 1}", 7 * 60 + 30) for i in range(buses)))
+        conn.executemany(repositories.RouteRepository.INSERT_AREA, (
+            (i + 1, name) for i in range(buses)
+            for name in dict.fromkeys(rnd.sample(names, min(3, areas)))))
+        conn.executemany(repositories.BusRepository.INSERT, (
+            (f"BUS-{i + 1:03d}", "Driver", rnd.randint(seats * 3 // 4, seats * 5 // 4), i + 1)
+            for i in range(buses)))
+        conn.executemany(repositories.RiderRepository.INSERT, (
+            (f"Student {n:05d}", area) for n, area in enumerate(rnd.choices(names, weights, k=students))))
+
+
+def spread(plan):
+    # Worst gap in fill (riders / seats) between two buses serving one area
+    fills = {bus: plan.load[bus] / seats for bus, seats in plan.capacity.items() if seats}
+    area_fills = defaultdict(list)
+    with db.connection() as conn:
+        for route, area in conn.execute(bus_assignment.LOAD_ROUTE_AREAS):
+            area_fills[area].extend(fill for bus, fill in fills.items() if plan.routes[bus] == route)
+    return max((max(values) - min(values) for values in area_fills.values() if values), default=0.0)
+
+
+def timed(label, **kwargs):
+    start = time.perf_counter()
+    plan = bus_assignment.assign(**kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:12} {elapsed * 1000:8.1f} ms  seated {len(plan.seats)}, without a seat {len(plan.unplaced)},"
+          f" kept {plan.kept}, changed {plan.changed}, buses {plan.emptiest():.0%}-{plan.fullest():.0%} full,"
+          f" worst gap within an area {spread(plan):.0%}")
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure bulk bus assignment")
+    parser.add_argument("--db", help="database to write to (default: a fresh temporary file)")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--buses", type=int, default=100)
+    parser.add_argument("--areas", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "assign.db")
+    db.set_database(path)
+    db.init_db()
+    build(args.students, args.buses, args.areas)
+    print(f"{args.students} riders, {args.buses} buses, {args.areas} areas")
+
+    plan = timed("first run")
+    timed("no changes")
+    timed("rebalance", rebalance=True)
+
+    with db.connection() as conn:
+        wrong_area = conn.execute(CHECK_WRONG_AREA).fetchone()[0]
+        overfull = conn.execute(CHECK_OVERFULL).fetchone()[0]
+        saved = conn.execute(COUNT_SEATED).fetchone()[0]
+    ok = not wrong_area and not overfull and saved == len(plan.seats)
+    print(f"  {saved} rows saved; {wrong_area} riders on a bus not serving their area,"
+          f" {overfull} buses over capacity: {'OK' if ok else 'WRONG'}")
+
+    db.close_pool()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
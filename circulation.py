@@ -0,0 +1,125 @@
+# circulation.py
+# Issuing and returning library books. An issue is open while its
+# return_date is NULL. books.available_count is kept in step with the open
+# issues in the same transaction as each issue and return, so a book's
+# availability is a column read rather than a COUNT over issues.
+#
+# Taking a copy is a guarded UPDATE (... WHERE available_count > 0): the
+# check and the decrement are one statement under SQLite's write lock, so
+# two desks issuing the last copy at the same moment cannot both get it;
+# the loser sees no row updated and gets NotAvailable. Each operation
+# starts with BEGIN IMMEDIATE, taking the write lock up front, so
+# concurrent desks queue on the busy timeout instead of failing with a
+# lock upgrade deadlock. Called inside an open transaction, an operation
+# joins it instead, which lets a batch of checkouts commit together.
+# A late return settles its fine (overdue.py) in the same transaction.
+import datetime
+
+import db
+import overdue
+import repositories
+from repositories import Row
+
+LOAN_DAYS = 14
+
+TAKE_COPY = "UPDATE books SET available_count = available_count - 1 WHERE id = ? AND available_count > 0"
+PUT_BACK = "UPDATE books SET available_count = available_count + 1 WHERE id = ?"
+BOOK_EXISTS = "SELECT 1 FROM books WHERE id = ?"
+INSERT_ISSUE = "INSERT INTO issues (book_id, student_name, issue_date, due_date) VALUES (?, ?, ?, ?)"
+CLOSE_ISSUE = "UPDATE issues SET return_date = ? WHERE id = ? AND return_date IS NULL RETURNING book_id"
+FIND_OPEN = ("SELECT id FROM issues WHERE book_id = ? AND student_name = ? AND return_date IS NULL "
+             "ORDER BY id LIMIT 1")
+SELECT_OPEN_FOR_STUDENT = """
+    SELECT i.id, i.book_id, b.title, i.student_name, i.issue_date, i.due_date
+    FROM issues i JOIN books b ON b.id = i.book_id
+    WHERE i.student_name = ? AND i.return_date IS NULL
+    ORDER BY i.issue_date, i.id
+"""
+
+
+class CirculationError(Exception):
+    pass
+
+
+class NotAvailable(CirculationError):
+    pass
+
+
+class NotIssued(CirculationError):
+    pass
+
+
+class Loan(Row):
+    __slots__ = ("id", "book_id", "title", "student_name", "issue_date", "due_date")
+
+
+def _begin(conn):
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def _today(today):
+    return today or datetime.date.today().isoformat()
+
+
+def issue(book_id, student_name, today=None, loan_days=LOAN_DAYS):
+    # Lends one copy; returns the new issue id
+    today = _today(today)
+    due = (datetime.date.fromisoformat(today) + datetime.timedelta(days=loan_days)).isoformat()
+    with db.connection() as conn:
+        _begin(conn)
+        if not conn.execute(TAKE_COPY, (book_id,)).rowcount:
+            if conn.execute(BOOK_EXISTS, (book_id,)).fetchone() is None:
+                raise NotAvailable(f"No book with id {book_id}")
+            raise NotAvailable("No copies of this book are available")
+        return conn.execute(INSERT_ISSUE, (book_id, student_name, today, due)).lastrowid
+
+
+def return_issue(issue_id, today=None):
+    # Closes an open issue; returns the book id
+    with db.connection() as conn:
+        _begin(conn)
+        row = conn.execute(CLOSE_ISSUE, (_today(today), issue_id)).fetchone()
+        if row is None:
+            raise NotIssued(f"Issue {issue_id} is not open")
+        conn.execute(PUT_BACK, (row[0],))
+        overdue.settle(conn, issue_id)
+        return row[0]
+
+
+def return_copy(book_id, student_name, today=None):
+    # Returns the student's oldest open loan of the book; returns the issue id
+    with db.connection() as conn:
+        _begin(conn)
+        row = conn.execute(FIND_OPEN, (book_id, student_name)).fetchone()
+        if row is None:
+            raise NotIssued(f"{student_name} has no open loan of this book")
+        return_issue(row[0], today)
+        return row[0]
+
+
+def _book_for(isbn):
+    book = repositories.books.by_isbn(isbn)
+    if book is None:
+        raise CirculationError(f"No book with ISBN {isbn}")
+    return book
+
+
+def issue_isbn(isbn, student_name, today=None):
+    # The desk's path: look the copy up by its ISBN; returns the book
+    with db.connection():
+        book = _book_for(isbn)
+        issue(book.id, student_name, today)
+        return book
+
+
+def return_isbn(isbn, student_name, today=None):
+    with db.connection():
+        book = _book_for(isbn)
+        return_copy(book.id, student_name, today)
+        return book
+
+
+def open_loans(student_name):
+    with db.connection() as conn:
+        return [Loan(*row) for row in conn.execute(SELECT_OPEN_FOR_STUDENT, (student_name,))]
@@ -0,0 +1,119 @@
+# circulation_benchmark.py
+# Checkout throughput with many desks at once. Each terminal thread has its
+# own connection (as each desk PC would) and loops over random checkouts
+# and returns on a small set of books with few copies each, so desks keep
+# racing for the last copy. Afterwards every book is checked: its
+# available_count must equal quantity minus its open issues, and never go
+# below zero.
+#
+# Usage: python circulation_benchmark.py [--db circ.db] [--terminals 8] [--ops 20000] [--books 50] [--copies 3]
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import circulation
+import db
+import repositories
+
+CHECK_COUNTS = """
+    SELECT b.id, b.quantity, b.available_count,
+           (SELECT COUNT(*) FROM issues i WHERE i.book_id = b.id AND i.return_date IS NULL) AS open
+    FROM books b WHERE b.id IN ({ids})
+"""
+
+
+def add_books(count, copies):
+    with db.connection():
+        return [repositories.books.add(f"Circulation {n}", "Bench", "", copies) for n in range(count)]
+
+
+def terminal(index, book_ids, ops, stats, latencies, lock):
+    rnd = random.Random(index)
+    student = f"Desk {index} student"
+    loans = []      # (issue id) of this desk's open loans
+    counts = Counter()
+    times = []
+    for _ in range(ops):
+        started = time.perf_counter()
+        try:
+            # Return about as often as we lend, so copies keep circulating
+            if loans and rnd.random() < 0.5:
+                circulation.return_issue(loans.pop(rnd.randrange(len(loans))))
+                counts["returned"] += 1
+            else:
+                loans.append(circulation.issue(rnd.choice(book_ids), student))
+                counts["issued"] += 1
+        except circulation.NotAvailable:
+            counts["not_available"] += 1
+        except sqlite3.OperationalError:
+            counts["busy"] += 1
+        times.append(time.perf_counter() - started)
+    with lock:
+        stats.update(counts)
+        latencies.extend(times)
+
+
+def verify(book_ids):
+    with db.connection() as conn:
+        rows = conn.execute(CHECK_COUNTS.format(ids=",".join("?" * len(book_ids))), book_ids).fetchall()
+    return [row for row in rows if row[2] < 0 or row[2] != row[1] - row[3]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure checkout throughput with concurrent desks")
+    parser.add_argument("--db", help="database to write to (default: a fresh temporary file)")
+    parser.add_argument("--terminals", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20000, help="issues and returns in total")
+    parser.add_argument("--books", type=int, default=50, help="books the desks compete for")
+    parser.add_argument("--copies", type=int, default=3, help="copies of each book")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "circulation.db")
+    db.set_database(path)
+    db.init_db()
+    book_ids = add_books(args.books, args.copies)
+
+    stats = Counter()
+    latencies = []
+    lock = threading.Lock()
+    per_terminal = args.ops // args.terminals
+    threads = [threading.Thread(target=terminal, args=(n, book_ids, per_terminal, stats, latencies, lock))
+               for n in range(args.terminals)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    done = per_terminal * args.terminals
+    latencies.sort()
+    print(f"{done} operations from {args.terminals} terminals in {elapsed:.2f}s"
+          f" = {done / elapsed:,.0f} ops/s")
+    print(f"  issued {stats['issued']}, returned {stats['returned']},"
+          f" refused (no copy left) {stats['not_available']}, busy timeouts {stats['busy']}")
+    print(f"  latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms,"
+          f" p99 {latencies[len(latencies) * 99 // 100] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    bad = verify(book_ids)
+    for book_id, quantity, available, open_issues in bad:
+        print(f"  MISMATCH book {book_id}: quantity {quantity}, available {available}, open {open_issues}")
+    print(f"  availability counts {'OK' if not bad else 'WRONG'} for {len(book_ids)} books")
+
+    db.close_pool()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# clock.py
+# Times of day as minutes since midnight, the way route pickup times are
+# stored, so they sort and range-query as plain integers. parse() takes
+# what people type: "7:30 AM", "7.30am", "07:30", "19:05", "7 pm", "730".
+import re
+
+MINUTES_PER_DAY = 24 * 60
+TIME = re.compile(r"(\d{1,2})(?:[:.h]?(\d{2}))?(?:\s*([ap])\.?\s*m\.?)?", re.IGNORECASE)
+WITH_SECONDS = re.compile(r"(\d{1,2}):(\d{2}):(\d{2})(?:\.\d*)?")
+
+
+def parse(text):
+    # Time-of-day text -> minutes since midnight; "" -> None (no time).
+    # Raises ValueError for anything else.
+    text = (text or "").strip()
+    if not text:
+        return None
+    match = TIME.fullmatch(text)
+    if match is None:
+        raise ValueError(f"{text!r} is not a time of day")
+    hours, minutes, half = int(match[1]), int(match[2] or 0), (match[3] or "").lower()
+    if minutes > 59 or (half and not 1 <= hours <= 12) or hours > 23:
+        raise ValueError(f"{text!r} is not a time of day")
+    if half:
+        hours = hours % 12 + (12 if half == "p" else 0)
+    return hours * 60 + minutes
+
+
+def lenient(text):
+    # For data already stored: parse() where it can, else None
+    try:
+        return parse(text)
+    except ValueError:
+        return None
+
+
+def seconds(text):
+    # Stored time text -> seconds since midnight, else None. Takes
+    # "08:02:15" and "8:02:15" as well as anything parse() reads.
+    text = str(text or "").strip()
+    match = WITH_SECONDS.fullmatch(text)
+    if match is None:
+        minutes = lenient(text)
+        return None if minutes is None else minutes * 60
+    hours, minutes, secs = (int(part) for part in match.groups())
+    if hours > 23 or minutes > 59 or secs > 59:
+        return None
+    return hours * 3600 + minutes * 60 + secs
+
+
+def display(minutes):
+    # 450 -> "7:30 AM"; None -> ""
+    if minutes is None:
+        return ""
+    hours, minutes = divmod(minutes, 60)
+    return f"{(hours - 1) % 12 + 1}:{minutes:02d} {'AM' if hours < 12 else 'PM'}"
@@ -1,144 +1,186 @@
 # db.py
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+import instrumentation
+import migrations
+
+DB_PATH = "school.db"
+
+# Connection tuning, applied once when a connection is opened
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 64 * 1024 * 1024
+STATEMENT_CACHE_SIZE = 256
+
+
+def get_connection(path=None):
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=instrumentation.connection_class(),
+    )
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    return conn
+
+
+class _ThreadExit:
+    # Kept in a thread-local, so it is dropped when its thread ends, and
+    # with it the thread's connection
+    __slots__ = ("pool", "ident")
+
+    def __init__(self, pool, ident):
+        self.pool = pool
+        self.ident = ident
+
+    def __del__(self):
+        self.pool.release(self.ident)
+
+
+class ConnectionPool:
+    # One connection per thread, opened on first use and reused afterwards.
+    # Keyed by thread id rather than threading.local: Qt worker threads lose
+    # their Python thread state (and any thread-locals) between tasks.
+    # A connection is closed when its thread ends, before the id can be
+    # reused: Python threads through a thread-local _ThreadExit, Qt pool
+    # threads by tasks.py calling release_thread() from QThread.finished.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connections = {}      # thread id -> connection
+        self._depth = {}            # thread id -> nesting depth of connection()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self):
+        ident = threading.get_ident()
+        with self._lock:
+            conn = self._connections.get(ident)
+            if conn is not None:
+                self.hits += 1
+                return conn
+
+        conn = get_connection(self.path)
+        with self._lock:
+            self._connections[ident] = conn
+            self.misses += 1
+        # Threads Python did not start (Qt's) show up as dummy threads
+        if not isinstance(threading.current_thread(), threading._DummyThread):
+            self._local.exit = _ThreadExit(self, ident)
+        return conn
+
+    def release(self, ident=None):
+        # Closes a thread's connection (default: the calling thread's); the
+        # thread gets a new one if it uses the database again
+        if ident is None:
+            ident = threading.get_ident()
+        with self._lock:
+            conn = self._connections.pop(ident, None)
+            self._depth.pop(ident, None)
+        if conn is not None:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        # Nested blocks share the outer transaction; only the outermost
+        # block commits (or rolls back on error).
+        conn = self.acquire()
+        ident = threading.get_ident()
+        depth = self._depth.get(ident, 0) + 1
+        self._depth[ident] = depth
+        try:
+            yield conn
+        except BaseException:
+            self._depth[ident] = depth - 1
+            if depth == 1 and conn.in_transaction:
+                conn.rollback()
+            raise
+        self._depth[ident] = depth - 1
+        if depth == 1 and conn.in_transaction:
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "open": len(self._connections),
+            }
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._depth.clear()
+        for conn in connections:
+            conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def connection():
+    return get_pool().connection()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def release_thread():
+    # For a thread that is ending: closes its connection, if it has one
+    pool = _pool
+    if pool is not None:
+        pool.release()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
+
+
+def set_database(path):
+    # Point the app (or a script/benchmark) at another database file
+    global DB_PATH
+    close_pool()
+    DB_PATH = path
+
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def init_db():
+    # Bring the schema up to date. Runs the migration check once per
+    # database per process, so building module widgets does no DDL.
+    with _init_lock:
+        if DB_PATH in _initialized:
+            return
+        with connection() as conn:
+            migrations.migrate(conn)
+        _initialized.add(DB_PATH)
 
-def get_connection():
-    return sqlite3.connect("school.db")
 
 def setup_tables():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Assignments Table (LMS)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS assignments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            file_path TEXT,
-            due_date TEXT
-        )
-    """)
-
-    # Library Tables
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT,
-            isbn TEXT,
-            quantity INTEGER
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS issues (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER,
-            student_name TEXT,
-            issue_date TEXT,
-            return_date TEXT,
-            FOREIGN KEY(book_id) REFERENCES books(id)
-        )
-    """)
-
-    # Transport Tables
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS buses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            bus_number TEXT NOT NULL,
-            driver_name TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS routes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            route_name TEXT NOT NULL,
-            pickup_time TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS transport_assignment (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT,
-            bus_id INTEGER,
-            route_id INTEGER,
-            FOREIGN KEY(bus_id) REFERENCES buses(id),
-            FOREIGN KEY(route_id) REFERENCES routes(id)
-        )
-    """)
-
-    # Hostel Tables
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS hostels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS rooms (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            hostel_id INTEGER,
-            room_number TEXT,
-            capacity INTEGER,
-            FOREIGN KEY(hostel_id) REFERENCES hostels(id)
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS hostel_allocation (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT,
-            room_id INTEGER,
-            FOREIGN KEY(room_id) REFERENCES rooms(id)
-        )
-    """)
-
-    # Inventory Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS inventory_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            quantity INTEGER,
-            location TEXT
-        )
-    """)
-
-    # HR Tables
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS staff (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            role TEXT,
-            salary REAL
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS payroll (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            staff_id INTEGER,
-            pay_date TEXT,
-            amount REAL,
-            FOREIGN KEY(staff_id) REFERENCES staff(id)
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS leaves (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            staff_id INTEGER,
-            leave_date TEXT,
-            reason TEXT,
-            FOREIGN KEY(staff_id) REFERENCES staff(id)
-        )
-    """)
-
-    # Biometric Attendance Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS attendance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            student_name TEXT,
-            date TEXT,
-            time TEXT,
-            status TEXT
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    # Kept for older scripts; the schema now lives in migrations.py
+    init_db()
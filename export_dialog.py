@@ -0,0 +1,117 @@
+# export_dialog.py
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox, QDateEdit,
+    QPushButton, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import QDate
+import exporter
+import tasks
+
+
+def run_export(table, path, fmt, start, end, token):
+    # Runs on a worker thread
+    return exporter.export_table(table, path, fmt, start, end, progress=token.report,
+                                 cancelled=lambda: token.cancelled)
+
+
+class ExportDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Data")
+        self.setMinimumWidth(400)
+        self.token = None
+        self.path = None
+
+        layout = QVBoxLayout(self)
+
+        # Table and format
+        self.table_input = QComboBox()
+        self.table_input.addItems(sorted(exporter.TABLES))
+        self.table_input.currentTextChanged.connect(self.update_date_filter)
+        layout.addWidget(QLabel("Table:"))
+        layout.addWidget(self.table_input)
+
+        self.format_input = QComboBox()
+        self.format_input.addItems(["csv", "jsonl"])
+        layout.addWidget(QLabel("Format:"))
+        layout.addWidget(self.format_input)
+
+        # Optional date range
+        self.range_check = QCheckBox("Only rows between these dates")
+        layout.addWidget(self.range_check)
+        range_layout = QHBoxLayout()
+        self.from_input = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.from_input.setCalendarPopup(True)
+        self.to_input = QDateEdit(QDate.currentDate())
+        self.to_input.setCalendarPopup(True)
+        range_layout.addWidget(self.from_input)
+        range_layout.addWidget(QLabel("to"))
+        range_layout.addWidget(self.to_input)
+        layout.addLayout(range_layout)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        buttons = QHBoxLayout()
+        self.export_btn = QPushButton("Export...")
+        self.export_btn.clicked.connect(self.start_export)
+        buttons.addWidget(self.export_btn)
+        self.cancel_btn = QPushButton("Cancel Export")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        buttons.addWidget(self.cancel_btn)
+        layout.addLayout(buttons)
+
+        self.update_date_filter(self.table_input.currentText())
+
+    def update_date_filter(self, table):
+        has_date = exporter.TABLES.get(table) is not None
+        self.range_check.setEnabled(has_date)
+        if not has_date:
+            self.range_check.setChecked(False)
+
+    def start_export(self):
+        table = self.table_input.currentText()
+        fmt = self.format_input.currentText()
+        path, _ = QFileDialog.getSaveFileName(self, "Export To", f"{table}.{fmt}")
+        if not path:
+            return
+
+        start = end = None
+        if self.range_check.isChecked():
+            start = self.from_input.date().toString("yyyy-MM-dd")
+            end = self.to_input.date().toString("yyyy-MM-dd")
+
+        self.path = path
+        self.token = tasks.submit(self, run_export, table, path, fmt, start, end, pass_token=True,
+                                  on_result=self.export_done, on_error=self.export_failed,
+                                  on_progress=lambda n: self.status_label.setText(f"{n} rows written..."))
+        self.set_running(True)
+        self.status_label.setText("Exporting...")
+
+    def cancel_export(self):
+        if self.token is not None:
+            self.token.cancel()
+            self.token = None
+            self.set_running(False)
+            self.status_label.setText("Export cancelled.")
+
+    def export_done(self, written):
+        self.token = None
+        self.set_running(False)
+        self.status_label.setText(f"Exported {written} rows to {self.path}")
+
+    def export_failed(self, message):
+        self.token = None
+        self.set_running(False)
+        self.status_label.setText("Export failed.")
+        QMessageBox.warning(self, "Export Failed", message)
+
+    def set_running(self, running):
+        self.export_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+
+    def closeEvent(self, event):
+        # Keep exporting in the background; the dialog is only hidden
+        event.ignore()
+        self.hide()
@@ -0,0 +1,163 @@
+# exporter.py
+# Streaming export of any table to CSV / JSONL. Rows are pulled with
+# fetchmany, so memory stays constant however large the table is, and
+# date-range filters are pushed down into the SQL (and its indexes).
+# Attendance is read from attendance_log directly, including the archive
+# files of any archived terms in the range (see attendance_archive.py).
+#
+# Usage: python exporter.py attendance out.csv [--from 2024-06-01] [--to 2024-06-30]
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import closing
+
+import attendance_archive
+import db
+import repositories
+
+FETCH_SIZE = 2000
+
+# Exportable tables and the date column used for range filters
+TABLES = {
+    "assignments": "due_date",
+    "attendance": "date",
+    "attendance_quarantine": None,
+    "books": None,
+    "buses": None,
+    "fines": None,
+    "hostel_allocation": None,
+    "hostels": None,
+    "inventory_items": None,
+    "issues": "issue_date",
+    "leaves": "leave_date",
+    "payroll": "pay_date",
+    "rooms": None,
+    "route_areas": None,
+    "route_pickup_quarantine": None,
+    "route_stops": None,
+    "routes": None,
+    "staff": None,
+    "students": None,
+    "terms": "start_date",
+    "transport_assignment": None,
+    "transport_assignment_superseded": None,
+    "transport_riders": None,
+}
+
+# Attendance over one attendance_archive.attached_logs() part, in
+# idx_attendance_log_day order (the same index in archive files)
+ATTENDANCE_RANGE = (repositories.AttendanceRepository.EXPORT_SELECT +
+                    " WHERE a.day BETWEEN ? AND ? ORDER BY a.day, a.seconds, a.student_id")
+
+
+def build_query(table, start=None, end=None):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    date_column = TABLES[table]
+    if (start or end) and not date_column:
+        raise ValueError(f"{table} has no date column to filter on")
+
+    sql = f"SELECT * FROM {table}"
+    clauses = []
+    params = []
+    if start:
+        clauses.append(f"{date_column} >= ?")
+        params.append(start)
+    if end:
+        clauses.append(f"{date_column} <= ?")
+        params.append(end)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses) + f" ORDER BY {date_column}"
+    return sql, params
+
+
+def attendance_queries(parts, start=None, end=None):
+    # One query per part; a full export reads each table once, in storage order
+    if not (start or end):
+        return [(repositories.AttendanceRepository.EXPORT_SELECT.format(log=log), ())
+                for log in dict.fromkeys(log for log, _, _ in parts)]
+    return [(ATTENDANCE_RANGE.format(log=log), (first_day, last_day)) for log, first_day, last_day in parts]
+
+
+def stream_rows(table, start=None, end=None, fetch_size=FETCH_SIZE):
+    # Generator: yields the column names first, then one tuple per row
+    if table == "attendance":
+        first_day = repositories.day_number(start) if start else attendance_archive.FIRST_DAY
+        last_day = repositories.day_number(end) if end else attendance_archive.LAST_DAY
+        with attendance_archive.attached_logs(first_day, last_day) as parts:
+            yield from _stream(attendance_queries(parts, start, end), fetch_size)
+    else:
+        yield from _stream([build_query(table, start, end)], fetch_size)
+
+
+def _stream(queries, fetch_size):
+    with db.connection() as conn:
+        for n, (sql, params) in enumerate(queries):
+            cursor = conn.execute(sql, params)
+            if n == 0:
+                yield [d[0] for d in cursor.description]
+            while True:
+                chunk = cursor.fetchmany(fetch_size)
+                if not chunk:
+                    break
+                yield from chunk
+
+
+def export_table(table, path, fmt="csv", start=None, end=None, progress=None,
+                 cancelled=None):
+    # progress(rows_written) runs every FETCH_SIZE rows; cancelled() can stop
+    # the export early. Returns the number of rows written.
+    rows = stream_rows(table, start, end)
+    columns = next(rows)
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f, closing(rows):
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            write = writer.writerow
+        else:
+            def write(row):
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                f.write("\n")
+
+        for row in rows:
+            write(row)
+            written += 1
+            if written % FETCH_SIZE == 0:
+                if cancelled is not None and cancelled():
+                    break
+                if progress is not None:
+                    progress(written)
+    if progress is not None:
+        progress(written)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a table to CSV/JSONL")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    parser.add_argument("--db", default=db.DB_PATH)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv")
+    db.set_database(args.db)
+    db.init_db()
+
+    start = time.perf_counter()
+    try:
+        written = export_table(args.table, args.path, fmt, args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Exported {written} {args.table} rows to {args.path} "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,7 +13,8 @@ features = {
     "hostel": (230, 126, 34),
     "inventory": (155, 89, 182),
     "hr": (231, 76, 60),
-    "biometric": (26, 188, 156)
+    "biometric": (26, 188, 156),
+    "sql": (52, 73, 94)
 }
 
 # Generate PNG icons
@@ -1,8 +1,11 @@
 # hostel_module.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 )
-import db
+import repositories
+import notifications
+from list_models import PagedList
+from rapid_entry import RapidEntry
 
 class HostelModule(QWidget):
     def __init__(self):
@@ -10,7 +13,6 @@ class HostelModule(QWidget):
         self.setWindowTitle("Hostel Management")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Hostel name input
@@ -35,8 +37,17 @@ class HostelModule(QWidget):
         room_btn.clicked.connect(self.add_room)
         layout.addWidget(room_btn)
 
+        # One checkbox switches both forms
+        self.hostel_entry = RapidEntry(self, [self.hostel_input], self.add_hostel, self.load_rooms)
+        self.room_entry = RapidEntry(self, [self.room_input, self.capacity_input], self.add_room,
+                                     self.load_rooms, checkbox=self.hostel_entry.checkbox)
+        layout.addWidget(self.hostel_entry.checkbox)
+
         # Room list
-        self.room_list = QListWidget()
+        self.room_list = PagedList(
+            repositories.rooms, self.format_room,
+            sorts=[("Oldest first", "id", False), ("By hostel and room", "room", False)],
+            search_placeholder="Filter by hostel or room")
         layout.addWidget(QLabel("🛏️ Hostel Rooms:"))
         layout.addWidget(self.room_list)
 
@@ -46,62 +57,56 @@ class HostelModule(QWidget):
     def add_hostel(self):
         name = self.hostel_input.text().strip()
         if not name:
-            QMessageBox.warning(self, "Input Error", "Hostel name is required.")
+            notifications.warning("Hostel name is required.")
+            self.hostel_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO hostels (name) VALUES (?)", (name,))
-        conn.commit()
-        conn.close()
+        self.hostel_entry.submit(repositories.hostels.add, name,
+                                 on_result=lambda _: notifications.info("Hostel added."),
+                                 what=f"hostel '{name}'")
 
         self.hostel_input.clear()
-        QMessageBox.information(self, "Success", "Hostel added!")
 
     def add_room(self):
         room = self.room_input.text().strip()
         try:
             capacity = int(self.capacity_input.text().strip())
         except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Capacity must be a number.")
+            notifications.warning("Capacity must be a number.")
+            self.capacity_input.setFocus()
             return
 
         if not room:
-            QMessageBox.warning(self, "Input Error", "Room number is required.")
+            notifications.warning("Room number is required.")
+            self.room_input.setFocus()
             return
 
-        # For simplicity, assign to first hostel
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM hostels LIMIT 1")
-        result = cursor.fetchone()
-        if not result:
-            QMessageBox.warning(self, "Missing Hostel", "Add at least one hostel first.")
-            conn.close()
+        self.room_entry.submit(self.insert_room, room, capacity, on_result=self.room_added,
+                               what=f"room {room}")
+
+    @staticmethod
+    def insert_room(room, capacity):
+        # Runs on a worker thread. For simplicity, assign to first hostel
+        hostel = repositories.hostels.first()
+        if not hostel:
+            return False
+        repositories.rooms.add(hostel.id, room, capacity)
+        return True
+
+    def room_added(self, added):
+        if not added:
+            notifications.warning("Add at least one hostel first.")
             return
 
-        hostel_id = result[0]
-        cursor.execute("""
-            INSERT INTO rooms (hostel_id, room_number, capacity)
-            VALUES (?, ?, ?)
-        """, (hostel_id, room, capacity))
-        conn.commit()
-        conn.close()
-
-        self.room_input.clear()
-        self.capacity_input.clear()
-        self.load_rooms()
-        QMessageBox.information(self, "Success", "Room added!")
+        if not self.room_entry.enabled:
+            self.room_input.clear()
+            self.capacity_input.clear()
+        self.room_entry.refresh()
+        notifications.info("Room added.")
 
     def load_rooms(self):
-        self.room_list.clear()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT r.room_number, r.capacity, h.name
-            FROM rooms r
-            JOIN hostels h ON r.hostel_id = h.id
-        """)
-        for room, cap, hostel in cursor.fetchall():
-            self.room_list.addItem(f"{hostel} - Room {room} (Capacity: {cap})")
-        conn.close()
+        self.room_list.refresh()
+
+    @staticmethod
+    def format_room(room):
+        return f"{room.hostel_name} - Room {room.room_number} (Capacity: {room.capacity})"
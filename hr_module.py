@@ -1,8 +1,12 @@
 # hr_module.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 )
-import db
+import repositories
+import import_dialog
+import notifications
+from list_models import PagedList
+from rapid_entry import RapidEntry
 
 class HRModule(QWidget):
     def __init__(self):
@@ -10,7 +14,6 @@ class HRModule(QWidget):
         self.setWindowTitle("HR Management")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Input: Staff Name
@@ -33,8 +36,20 @@ class HRModule(QWidget):
         add_btn.clicked.connect(self.add_staff)
         layout.addWidget(add_btn)
 
+        self.rapid_entry = RapidEntry(
+            self, [self.name_input, self.role_input, self.salary_input],
+            self.add_staff, self.load_staff)
+        layout.addWidget(self.rapid_entry.checkbox)
+
+        import_btn = QPushButton("Import Staff (CSV/JSONL)")
+        import_btn.clicked.connect(self.import_staff)
+        layout.addWidget(import_btn)
+
         # Staff List
-        self.staff_list = QListWidget()
+        self.staff_list = PagedList(
+            repositories.staff, self.format_staff,
+            sorts=[("Oldest first", "id", False), ("Name A-Z", "name", False)],
+            search_placeholder="Filter by name or role")
         layout.addWidget(QLabel("👨‍🏫 Staff List:"))
         layout.addWidget(self.staff_list)
 
@@ -47,33 +62,32 @@ class HRModule(QWidget):
         try:
             salary = float(self.salary_input.text().strip())
         except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Salary must be a number.")
+            notifications.warning("Salary must be a number.")
+            self.salary_input.setFocus()
             return
 
         if not name or not role:
-            QMessageBox.warning(self, "Input Error", "Name and Role are required.")
+            notifications.warning("Name and Role are required.")
+            (self.role_input if name else self.name_input).setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO staff (name, role, salary)
-            VALUES (?, ?, ?)
-        """, (name, role, salary))
-        conn.commit()
-        conn.close()
+        self.rapid_entry.submit(repositories.staff.add, name, role, salary,
+                                on_result=self.staff_added, what=f"staff member '{name}'")
 
         self.name_input.clear()
         self.role_input.clear()
         self.salary_input.clear()
-        self.load_staff()
-        QMessageBox.information(self, "Success", "Staff member added!")
+
+    def staff_added(self, _):
+        self.rapid_entry.refresh()
+        notifications.info("Staff member added.")
 
     def load_staff(self):
-        self.staff_list.clear()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, role, salary FROM staff")
-        for name, role, salary in cursor.fetchall():
-            self.staff_list.addItem(f"{name} - {role} (₹{salary:.2f})")
-        conn.close()
+        self.staff_list.refresh()
+
+    @staticmethod
+    def format_staff(member):
+        return f"{member.name} - {member.role} (₹{member.salary:.2f})"
+
+    def import_staff(self):
+        import_dialog.run_import(self, "staff", on_done=self.load_staff)
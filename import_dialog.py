@@ -0,0 +1,56 @@
+# import_dialog.py
+from PyQt5.QtWidgets import QFileDialog, QProgressDialog
+from PyQt5.QtCore import Qt
+import importer
+import notifications
+import tasks
+
+
+def run_import(parent, entity, on_done=None):
+    # Pick a CSV/JSONL file and bulk import it on a worker thread;
+    # on_done() runs afterwards if any rows were added.
+    path, _ = QFileDialog.getOpenFileName(
+        parent, f"Import {entity.title()}", "", "Data files (*.csv *.jsonl *.ndjson);;All files (*)")
+    if not path:
+        return None
+
+    dialog = QProgressDialog(f"Importing {entity}...", "Cancel", 0, 0, parent)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    stop = []
+    dialog.canceled.connect(lambda: stop.append(True))
+
+    def work(token):
+        def progress(result):
+            token.report((result.imported, len(result.rejected)))
+            return not stop
+        return importer.import_file(entity, path, progress=progress)
+
+    def progress(counts):
+        dialog.setLabelText(f"{counts[0]} imported, {counts[1]} rejected")
+
+    def finished(result):
+        dialog.close()
+        summary = f"Imported {result.imported} {entity} rows in {result.elapsed:.1f}s"
+        if result.cancelled:
+            summary += " before the import was cancelled"
+        if result.rejected:
+            # The reasons are in the rejects file, one line per row
+            rejects_path = path + ".rejects.csv"
+            importer.write_rejects(result, rejects_path)
+            first_line, first_reason, _ = result.rejected[0]
+            notifications.warning(f"{summary}; {len(result.rejected)} rows rejected (line {first_line}: "
+                                  f"{first_reason}), listed in {rejects_path}")
+        elif result.cancelled:
+            notifications.warning(summary + ".")
+        else:
+            notifications.info(summary + ".")
+        if result.imported and on_done is not None:
+            on_done()
+
+    def failed(message):
+        dialog.close()
+        notifications.error(f"Import of {entity} failed: {message}")
+
+    return tasks.submit(parent, work, pass_token=True, on_result=finished,
+                        on_error=failed, on_progress=progress, write=True)
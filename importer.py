@@ -0,0 +1,264 @@
+# importer.py
+# Streaming bulk import of CSV / JSONL files into books, staff, inventory,
+# buses, transport riders and route stops. Rows are read lazily, validated a batch at a time and written
+# with executemany, one transaction per batch, so memory stays flat and a
+# bad row only costs a line in the rejects report. A batch the database
+# refuses (a constraint the checks here do not cover) is retried row by
+# row, and only the rows that fail are rejected, with the database's
+# message. Route names are resolved in one query a batch. A book whose ISBN is
+# already catalogued, or repeats within the file, adds to that book's
+# quantity instead of becoming a second row, and a rider listed again
+# gets the new area.
+#
+# Usage: python importer.py books new_books.csv [--rejects rejects.csv]
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import db
+import isbn
+import repositories
+import stops
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class Field:
+    __slots__ = ("name", "kind", "required", "problem", "lookup")
+
+    def __init__(self, name, kind=str, required=False, problem="must be a number", lookup=None):
+        # kind converts the text, raising ValueError with problem as the reason.
+        # lookup instead maps a whole batch's values at once: it is given
+        # the set of them and returns {value: converted} for the known ones
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.problem = problem
+        self.lookup = lookup
+
+
+def whole(value):
+    # int() that refuses 2.7 (a JSON number) rather than truncating it, and
+    # true/false; raises ValueError
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{value!r} is not a whole number")
+    return int(value)
+
+
+def count(value):
+    # Whole number, 0 or more; raises ValueError
+    number = whole(value)
+    if number < 0:
+        raise ValueError(f"{number} is negative")
+    return number
+
+
+# Same rules the entry forms apply
+ENTITIES = {
+    "books": (repositories.BookRepository.INSERT, [
+        Field("title", required=True),
+        Field("author"),
+        Field("isbn", isbn.normalize, problem="is not a valid ISBN-10 or ISBN-13"),
+        Field("quantity", count, required=True, problem="must be a whole number, 0 or more"),
+    ]),
+    "staff": (repositories.StaffRepository.INSERT, [
+        Field("name", required=True),
+        Field("role", required=True),
+        Field("salary", float, required=True),
+    ]),
+    "inventory": (repositories.InventoryRepository.INSERT, [
+        Field("name", required=True),
+        Field("quantity", whole, required=True, problem="must be a whole number"),
+        Field("location"),
+    ]),
+    "buses": (repositories.BusRepository.INSERT, [
+        Field("bus_number", required=True),
+        Field("driver_name"),
+        Field("capacity", count, problem="must be a whole number, 0 or more"),
+        Field("route", lookup=repositories.routes.ids_of, problem="is not a known route"),
+    ]),
+    "riders": (repositories.RiderRepository.INSERT, [
+        Field("student_name", required=True),
+        Field("area", required=True),
+    ]),
+    "stops": (stops.INSERT, [
+        Field("route", lookup=repositories.routes.ids_of, required=True, problem="is not a known route"),
+        Field("stop_name", required=True),
+        Field("lat", stops.latitude, required=True, problem="must be a latitude from -90 to 90"),
+        Field("lon", stops.longitude, required=True, problem="must be a longitude from -180 to 180"),
+        Field("sequence", whole, problem="must be a whole number"),
+    ]),
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = []      # (line number, reason, raw row)
+        self.elapsed = 0.0
+        self.cancelled = False
+
+    @property
+    def processed(self):
+        return self.imported + len(self.rejected)
+
+
+def read_rows(path, fmt=None):
+    # Yields (line number, dict or None, raw) without loading the whole file
+    fmt = fmt or detect_format(path)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, row
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_no, row if isinstance(row, dict) else None, line
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def validate_batch(fields, batch):
+    # -> (rows, rejects); rows are (line number, values, raw)
+    rows = []
+    rejects = []
+    # One query per lookup field for the batch, not one per row
+    known = {}
+    for field in fields:
+        if field.lookup is not None:
+            values = {str(_text(record.get(field.name))) for _, record, _ in batch
+                      if record is not None and _text(record.get(field.name)) not in (None, "")}
+            known[field.name] = field.lookup(values) if values else {}
+    for line_no, record, raw in batch:
+        if record is None:
+            rejects.append((line_no, "Malformed row", raw))
+            continue
+        values = []
+        error = None
+        for field in fields:
+            value = _text(record.get(field.name))
+            if value is None or value == "":
+                if field.required:
+                    error = f"{field.name} is required"
+                    break
+                values.append("" if field.kind is str and field.lookup is None else None)
+                continue
+            try:
+                if field.lookup is not None:
+                    values.append(known[field.name][str(value)])
+                else:
+                    values.append(field.kind(value))
+            except (TypeError, ValueError, KeyError):
+                error = f"{field.name} {field.problem}"
+                break
+        if error:
+            rejects.append((line_no, error, raw))
+        else:
+            rows.append((line_no, tuple(values), raw))
+    return rows, rejects
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_file(entity, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    # progress(result) is called after every batch; returning False cancels
+    insert_sql, fields = ENTITIES[entity]
+    result = ImportResult()
+    start = time.perf_counter()
+    for batch in _batches(read_rows(path, fmt), batch_size):
+        rows, rejects = validate_batch(fields, batch)
+        if rows:
+            try:
+                with db.connection() as conn:
+                    conn.executemany(insert_sql, [values for _, values, _ in rows])
+                result.imported += len(rows)
+            except sqlite3.IntegrityError:
+                _insert_one_by_one(insert_sql, rows, result)
+        result.rejected.extend(rejects)
+        if progress is not None and progress(result) is False:
+            result.cancelled = True
+            break
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _insert_one_by_one(insert_sql, rows, result):
+    # A failed statement is undone on its own, so the rest of the batch
+    # still goes in, in one transaction
+    with db.connection() as conn:
+        for line_no, values, raw in rows:
+            try:
+                conn.execute(insert_sql, values)
+            except sqlite3.IntegrityError as e:
+                result.rejected.append((line_no, str(e), raw))
+            else:
+                result.imported += 1
+
+
+def write_rejects(result, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "reason", "row"])
+        for line_no, reason, raw in result.rejected:
+            writer.writerow([line_no, reason, raw if isinstance(raw, str) else json.dumps(raw)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import CSV/JSONL data")
+    parser.add_argument("entity", choices=sorted(ENTITIES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rejects", help="write rejected rows to this CSV file")
+    parser.add_argument("--db", default=db.DB_PATH)
+    args = parser.parse_args(argv)
+
+    db.set_database(args.db)
+    db.init_db()
+
+    def report(result):
+        print(f"\r{result.imported} imported, {len(result.rejected)} rejected",
+              end="", file=sys.stderr, flush=True)
+
+    result = import_file(args.entity, args.path, args.format, args.batch_size, report)
+    print(file=sys.stderr)
+    rate = result.processed / result.elapsed if result.elapsed else 0
+    print(f"Imported {result.imported} {args.entity} rows, rejected {len(result.rejected)} "
+          f"in {result.elapsed:.2f}s ({rate:,.0f} rows/s)")
+    if args.rejects and result.rejected:
+        write_rejects(result, args.rejects)
+        print(f"Rejected rows written to {args.rejects}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# instrumentation.py
+# Opt-in SQL instrumentation. When enabled, db.get_connection() opens
+# InstrumentedConnection objects that time every statement (execute plus
+# fetching its rows), count rows and VM steps, remember where the query
+# came from, and log statements slower than a threshold.
+#
+# Enable with SCHOOL_DB_TRACE=1 (threshold: SCHOOL_DB_SLOW_MS, default 50)
+# or call enable() before the first connection is opened.
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf")]
+PROGRESS_STEPS = 1000       # progress handler granularity (VM instructions)
+SLOW_LOG_FILE = "slow_queries.log"
+
+# Frames from these files are skipped when finding a statement's call site
+_INTERNAL_FILES = {"instrumentation.py", "db.py", "repositories.py", "contextlib.py"}
+
+enabled = False
+slow_ms = 50.0
+slow_log = logging.getLogger("school.slow_sql")
+
+_stats = {}
+_traced = Counter()
+_lock = threading.Lock()
+
+
+class StatementStats:
+    __slots__ = ("sql", "calls", "total_ms", "max_ms", "rows", "vm_steps", "slow", "histogram",
+                 "call_sites")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.vm_steps = 0
+        self.slow = 0
+        self.histogram = [0] * len(BUCKETS_MS)
+        self.call_sites = Counter()
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the given fraction of calls
+        target = self.calls * fraction
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "vm_steps": self.vm_steps,
+            "slow": self.slow,
+            "histogram": dict(zip(BUCKETS_MS, self.histogram)),
+            "call_sites": self.call_sites.most_common(3),
+        }
+
+
+def _normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in _INTERNAL_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+def record(sql, elapsed_ms, rows, vm_steps, call_site):
+    key = _normalize(sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key)
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.rows += rows
+        stats.vm_steps += vm_steps
+        stats.histogram[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        stats.call_sites[call_site] += 1
+        if elapsed_ms >= slow_ms:
+            stats.slow += 1
+    if elapsed_ms >= slow_ms:
+        slow_log.warning("%.1f ms  rows=%d  %s  %s", elapsed_ms, rows, call_site, key)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # A statement is "open" from execute() until its rows are exhausted, the
+    # cursor runs another statement or is closed; its latency includes the
+    # time spent fetching.
+    _pending = None
+
+    def _begin(self, sql, rows, elapsed):
+        self._finish()
+        self._pending = [sql, elapsed, rows, self.connection._vm_steps, _call_site()]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, elapsed, rows, steps_before, site = pending
+            steps = (self.connection._vm_steps - steps_before) * PROGRESS_STEPS
+            record(sql, elapsed * 1000, rows, steps, site)
+
+    def _fetched(self, elapsed, count, done):
+        pending = self._pending
+        if pending is not None:
+            pending[1] += elapsed
+            pending[2] += count
+            if done:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        self._begin(sql, max(self.rowcount, 0), elapsed)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._begin(sql, max(self.rowcount, 0), time.perf_counter() - start)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        requested = self.arraysize if size is None else size
+        self._fetched(time.perf_counter() - start, len(rows), len(rows) < requested)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - start, 0, True)
+            raise
+        self._fetched(time.perf_counter() - start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._vm_steps = 0
+        # Trace sees every statement, including COMMITs and trigger bodies
+        self.set_trace_callback(self._on_trace)
+        self.set_progress_handler(self._on_progress, PROGRESS_STEPS)
+
+    def _on_trace(self, sql):
+        with _lock:
+            _traced[sql.split(None, 1)[0].upper() if sql.strip() else "?"] += 1
+
+    def _on_progress(self):
+        self._vm_steps += 1
+        return 0
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        start = time.perf_counter()
+        super().commit()
+        record("COMMIT", (time.perf_counter() - start) * 1000, 0, 0, _call_site())
+
+
+def connection_class():
+    return InstrumentedConnection if enabled else sqlite3.Connection
+
+
+def enable(threshold_ms=None, log_path=SLOW_LOG_FILE):
+    # Affects connections opened afterwards (call db.close_pool() to reopen)
+    global enabled, slow_ms
+    enabled = True
+    if threshold_ms is not None:
+        slow_ms = float(threshold_ms)
+    if log_path and not slow_log.handlers:
+        handler = logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_log.addHandler(handler)
+        slow_log.setLevel(logging.WARNING)
+        slow_log.propagate = False
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def snapshot(top=None, sort_key="total_ms"):
+    # Statement stats as plain dicts, worst first
+    with _lock:
+        rows = [stats.as_dict() for stats in _stats.values()]
+    rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows[:top] if top else rows
+
+
+def statement_counts():
+    with _lock:
+        return dict(_traced)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _traced.clear()
+
+
+if os.environ.get("SCHOOL_DB_TRACE"):
+    enable(os.environ.get("SCHOOL_DB_SLOW_MS"))
@@ -1,8 +1,12 @@
 # inventory_module.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
 )
-import db
+import repositories
+import import_dialog
+import notifications
+from list_models import PagedList
+from rapid_entry import RapidEntry
 
 class InventoryModule(QWidget):
     def __init__(self):
@@ -10,7 +14,6 @@ class InventoryModule(QWidget):
         self.setWindowTitle("Inventory Management")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Input: Item Name
@@ -33,8 +36,20 @@ class InventoryModule(QWidget):
         add_btn.clicked.connect(self.add_item)
         layout.addWidget(add_btn)
 
+        self.rapid_entry = RapidEntry(
+            self, [self.name_input, self.qty_input, self.location_input],
+            self.add_item, self.load_items)
+        layout.addWidget(self.rapid_entry.checkbox)
+
+        import_btn = QPushButton("Import Items (CSV/JSONL)")
+        import_btn.clicked.connect(self.import_items)
+        layout.addWidget(import_btn)
+
         # Inventory List
-        self.inventory_list = QListWidget()
+        self.inventory_list = PagedList(
+            repositories.inventory, self.format_item,
+            sorts=[("Oldest first", "id", False), ("Name A-Z", "name", False)],
+            search_placeholder="Filter by name or location")
         layout.addWidget(QLabel("📦 Inventory Items:"))
         layout.addWidget(self.inventory_list)
 
@@ -47,33 +62,32 @@ class InventoryModule(QWidget):
         try:
             qty = int(self.qty_input.text().strip())
         except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Quantity must be a number.")
+            notifications.warning("Quantity must be a number.")
+            self.qty_input.setFocus()
             return
 
         if not name:
-            QMessageBox.warning(self, "Input Error", "Item name is required.")
+            notifications.warning("Item name is required.")
+            self.name_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO inventory_items (name, quantity, location)
-            VALUES (?, ?, ?)
-        """, (name, qty, location))
-        conn.commit()
-        conn.close()
+        self.rapid_entry.submit(repositories.inventory.add, name, qty, location,
+                                on_result=self.item_added, what=f"item '{name}'")
 
         self.name_input.clear()
         self.qty_input.clear()
         self.location_input.clear()
-        self.load_items()
-        QMessageBox.information(self, "Success", "Item added successfully.")
+
+    def item_added(self, _):
+        self.rapid_entry.refresh()
+        notifications.info("Item added.")
 
     def load_items(self):
-        self.inventory_list.clear()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name, quantity, location FROM inventory_items")
-        for name, qty, loc in cursor.fetchall():
-            self.inventory_list.addItem(f"{name} - Qty: {qty} ({loc})")
-        conn.close()
+        self.inventory_list.refresh()
+
+    @staticmethod
+    def format_item(item):
+        return f"{item.name} - Qty: {item.quantity} ({item.location})"
+
+    def import_items(self):
+        import_dialog.run_import(self, "inventory", on_done=self.load_items)
@@ -0,0 +1,42 @@
+# isbn.py
+# ISBN normalization. Books are keyed by ISBN-13 written as bare digits, so
+# "0-14-143955-6", "978-0141439556" and "9780141439556" are one book.
+import re
+
+SEPARATORS = re.compile(r"[\s-]")
+ISBN10 = re.compile(r"\d{9}[\dX]")
+ISBN13 = re.compile(r"97[89]\d{10}")
+
+
+def isbn13_check_digit(first12):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(first12))
+    return str(-total % 10)
+
+
+def _isbn10_valid(digits):
+    total = sum((10 - i) * (10 if d == "X" else int(d)) for i, d in enumerate(digits))
+    return total % 11 == 0
+
+
+def normalize(text):
+    # ISBN-10 or ISBN-13 text (any hyphens or spaces) -> 13 bare digits;
+    # "" stays "" (no ISBN). Raises ValueError for anything else, including
+    # a wrong check digit, so typos are caught at entry.
+    digits = SEPARATORS.sub("", text or "").upper()
+    if not digits:
+        return ""
+    if ISBN10.fullmatch(digits) and _isbn10_valid(digits):
+        first12 = "978" + digits[:9]
+        return first12 + isbn13_check_digit(first12)
+    if ISBN13.fullmatch(digits) and isbn13_check_digit(digits[:12]) == digits[12]:
+        return digits
+    raise ValueError(f"{text!r} is not a valid ISBN-10 or ISBN-13")
+
+
+def canonical(text):
+    # Lenient form for data already stored: normalize() where it can, else
+    # the text without separators, so equal codes still compare equal
+    try:
+        return normalize(text)
+    except ValueError:
+        return SEPARATORS.sub("", text or "").upper()
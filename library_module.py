@@ -1,9 +1,17 @@
 # library_module.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLineEdit, QPushButton, QListWidget,
-    QLabel, QMessageBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
+    QLabel
 )
-import db
+import circulation
+import repositories
+from batch_desk import BatchDesk
+import import_dialog
+import tasks
+import isbn as isbn_codes
+import notifications
+from list_models import PagedList
+from rapid_entry import RapidEntry
 
 class LibraryModule(QWidget):
     def __init__(self):
@@ -11,7 +19,6 @@ class LibraryModule(QWidget):
         self.setWindowTitle("Library Management")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Input: Book Title
@@ -39,13 +46,61 @@ class LibraryModule(QWidget):
         add_btn.clicked.connect(self.add_book)
         layout.addWidget(add_btn)
 
+        self.rapid_entry = RapidEntry(
+            self, [self.title_input, self.author_input, self.isbn_input, self.quantity_input],
+            self.add_book, self.load_books)
+        layout.addWidget(self.rapid_entry.checkbox)
+
+        import_btn = QPushButton("Import Books (CSV/JSONL)")
+        import_btn.clicked.connect(self.import_books)
+        layout.addWidget(import_btn)
+
+        # Circulation: issue or return a copy
+        layout.addWidget(QLabel("🔁 Issue / Return:"))
+        desk = QHBoxLayout()
+        self.loan_isbn_input = QLineEdit()
+        self.loan_isbn_input.setPlaceholderText("Book ISBN")
+        desk.addWidget(self.loan_isbn_input)
+        self.loan_student_input = QLineEdit()
+        self.loan_student_input.setPlaceholderText("Student Name")
+        desk.addWidget(self.loan_student_input)
+        issue_btn = QPushButton("Issue")
+        issue_btn.clicked.connect(self.issue_book)
+        desk.addWidget(issue_btn)
+        return_btn = QPushButton("Return")
+        return_btn.clicked.connect(self.return_book)
+        desk.addWidget(return_btn)
+        layout.addLayout(desk)
+
+        # Barcode scanner mode; its lookups load on first use
+        self.batch_desk = None
+        self.batch_btn = QPushButton("Batch Desk (barcode scanner)")
+        self.batch_btn.setCheckable(True)
+        self.batch_btn.toggled.connect(self.toggle_batch_desk)
+        layout.addWidget(self.batch_btn)
+        self.batch_desk_layout = QVBoxLayout()
+        layout.addLayout(self.batch_desk_layout)
+
         # Book List
-        self.book_list = QListWidget()
+        self.book_list = PagedList(
+            repositories.books, self.format_book,
+            sorts=[("Oldest first", "id", False), ("Newest first", "id", True),
+                   ("Title A-Z", "title", False)],
+            search_placeholder="Search title, author or ISBN (best matches first)")
         layout.addWidget(QLabel("📚 All Books:"))
         layout.addWidget(self.book_list)
 
+        # Loans past their due date, as last assessed by overdue.py
+        self.overdue_list = PagedList(
+            repositories.fines, self.format_fine,
+            sorts=[("Most overdue first", "due", False)],
+            search_placeholder="Filter by student or title", open=1)
+        layout.addWidget(QLabel("⏰ Overdue Loans:"))
+        layout.addWidget(self.overdue_list)
+
         self.setLayout(layout)
         self.load_books()
+        self.load_overdue()
 
     def add_book(self):
         title = self.title_input.text().strip()
@@ -54,34 +109,97 @@ class LibraryModule(QWidget):
         try:
             quantity = int(self.quantity_input.text().strip())
         except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Quantity must be a number.")
+            notifications.warning("Quantity must be a number.")
+            self.quantity_input.setFocus()
+            return
+        if quantity < 0:
+            notifications.warning("Quantity cannot be negative.")
+            self.quantity_input.setFocus()
             return
 
         if not title:
-            QMessageBox.warning(self, "Missing Info", "Title is required.")
+            notifications.warning("Title is required.")
+            self.title_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO books (title, author, isbn, quantity)
-            VALUES (?, ?, ?, ?)
-        """, (title, author, isbn, quantity))
-        conn.commit()
-        conn.close()
+        try:
+            isbn = isbn_codes.normalize(isbn)
+        except ValueError:
+            notifications.warning("ISBN must be a valid ISBN-10 or ISBN-13.")
+            self.isbn_input.setFocus()
+            return
+
+        self.rapid_entry.submit(repositories.books.add, title, author, isbn, quantity,
+                                on_result=self.book_added, what=f"book '{title}'")
 
         self.title_input.clear()
         self.author_input.clear()
         self.isbn_input.clear()
         self.quantity_input.clear()
-        self.load_books()
-        QMessageBox.information(self, "Success", "Book added successfully.")
+
+    def book_added(self, _):
+        self.rapid_entry.refresh()
+        notifications.info("Book added.")
 
     def load_books(self):
-        self.book_list.clear()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT title, author, quantity FROM books")
-        for title, author, qty in cursor.fetchall():
-            self.book_list.addItem(f"{title} by {author} (Qty: {qty})")
-        conn.close()
+        self.book_list.refresh()
+
+    def load_overdue(self):
+        self.overdue_list.refresh()
+
+    def toggle_batch_desk(self, on):
+        if on and self.batch_desk is None:
+            self.batch_desk = BatchDesk(on_committed=self.batch_committed)
+            self.batch_desk_layout.addWidget(self.batch_desk)
+        if self.batch_desk is not None:
+            self.batch_desk.setVisible(on)
+            if not on:
+                self.batch_desk.commit()
+
+    def batch_committed(self):
+        self.load_books()
+        self.load_overdue()
+
+    def loan_details(self):
+        isbn = self.loan_isbn_input.text().strip()
+        student = self.loan_student_input.text().strip()
+        if not isbn or not student:
+            notifications.warning("Book ISBN and student name are required.")
+            (self.loan_student_input if isbn else self.loan_isbn_input).setFocus()
+            return None
+        return isbn, student
+
+    def issue_book(self):
+        details = self.loan_details()
+        if details is None:
+            return
+        tasks.submit(self, circulation.issue_isbn, *details,
+                     on_result=lambda book: self.loan_done(f"Issued '{book.title}'."),
+                     on_error=notifications.warning, write=True)
+
+    def return_book(self):
+        details = self.loan_details()
+        if details is None:
+            return
+        tasks.submit(self, circulation.return_isbn, *details,
+                     on_result=lambda book: self.loan_done(f"Returned '{book.title}'."),
+                     on_error=notifications.warning, write=True)
+
+    def loan_done(self, message):
+        notifications.info(message)
+        self.loan_isbn_input.clear()
+        self.loan_isbn_input.setFocus()
+        self.load_books()
+        self.load_overdue()
+
+    @staticmethod
+    def format_fine(fine):
+        return (f"{fine.student_name}: {fine.title} (due {fine.due_date}, "
+                f"{fine.days_overdue} days late, fine {fine.amount})")
+
+    @staticmethod
+    def format_book(book):
+        return f"{book.title} by {book.author} (Qty: {book.quantity}, available: {book.available_count})"
+
+    def import_books(self):
+        import_dialog.run_import(self, "books", on_done=self.load_books)
@@ -0,0 +1,202 @@
+# list_models.py
+# Lazily-paged list model shared by the module screens. Rows are pulled from
+# a repository a page at a time (keyset pagination, on a worker thread) as
+# the view scrolls, and sorting and filtering are done by the SQL query, so
+# only the rows the user has actually scrolled to are ever materialized.
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QListView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+import tasks
+
+PAGE_SIZE = 200
+SEARCH_DELAY_MS = 250
+
+
+class PagedListModel(QAbstractListModel):
+    def __init__(self, repository, formatter, page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self.formatter = formatter
+        self.page_size = page_size
+        self.sort = "id"
+        self.descending = False
+        self.search = None
+        self.filters = {}
+        self.rows = []
+        self._texts = []
+        self._keys = []
+        self._last_key = None
+        self._exhausted = False
+        self._loading = None
+        self._deferred = []
+        self.destroyed.connect(lambda: tasks.cancel(self))
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._texts[index.row()]
+        if role == Qt.UserRole:
+            return self.rows[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and self._loading is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = tasks.submit(
+            self, self.repository.page, after=self._last_key, limit=self.page_size,
+            sort=self.sort, descending=self.descending, search=self.search,
+            on_result=self._append_page, on_error=self._page_failed, **self.filters)
+
+    # --- Loading ---
+
+    def _append_page(self, rows):
+        self._loading = None
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            keys = [self.repository.page_key(row, self.sort) for row in rows]
+            self._last_key = keys[-1]
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.rows.extend(rows)
+            self._texts.extend(self.formatter(row) for row in rows)
+            self._keys.extend(keys)
+            self.endInsertRows()
+        if self._deferred:
+            deferred, self._deferred = self._deferred, []
+            self.merge_rows(deferred)
+
+    def _page_failed(self, message):
+        self._loading = None
+        self._exhausted = True
+        tasks.show_error(None, message)
+
+    def reload(self, sort=None, descending=None, search=None, **filters):
+        # Start again from the first page; unspecified options are kept
+        tasks.cancel(self)
+        if sort is not None:
+            self.sort = sort
+        if descending is not None:
+            self.descending = descending
+        if search is not None:
+            self.search = search or None
+        if filters:
+            self.filters = filters
+        self.beginResetModel()
+        self.rows = []
+        self._texts = []
+        self._keys = []
+        self._last_key = None
+        self._exhausted = False
+        self._loading = None
+        self._deferred = []
+        self.endResetModel()
+        self.fetchMore()
+
+    def merge_rows(self, rows):
+        # Insert rows created since the list was loaded at their sorted
+        # position, so new data shows up without re-reading what is already
+        # loaded. Rows past the loaded range are left for fetchMore(), and
+        # rows already present or outside the current search/filters are
+        # ignored.
+        if self._loading is not None:
+            self._deferred.extend(rows)     # the page in flight may hold them
+            return
+        for row in rows:
+            if not self.repository.matches(row, self.search, **self.filters):
+                continue
+            key = self.repository.page_key(row, self.sort)
+            position = self._position(key)
+            if position is None:
+                continue
+            self.beginInsertRows(QModelIndex(), position, position)
+            self.rows.insert(position, row)
+            self._texts.insert(position, self.formatter(row))
+            self._keys.insert(position, key)
+            self.endInsertRows()
+            if position == len(self.rows) - 1:
+                self._last_key = key
+
+    def _position(self, key):
+        # Binary search of the loaded keys in the current sort direction
+        keys = self._keys
+        low, high = 0, len(keys)
+        while low < high:
+            middle = (low + high) // 2
+            if (keys[middle] > key) if self.descending else (keys[middle] < key):
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(keys) and keys[low] == key:
+            return None
+        if low == len(keys) and not self._exhausted:
+            return None
+        return low
+
+
+class PagedList(QWidget):
+    # A QListView over a PagedListModel, with an optional filter box and sort
+    # selector. sorts is a list of (label, sort name, descending).
+    def __init__(self, repository, formatter, sorts=None, search_placeholder=None, **filters):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.model = PagedListModel(repository, formatter, parent=self)
+        self.model.filters = filters
+        self.sorts = sorts or [("Oldest first", "id", False)]
+
+        controls = QHBoxLayout()
+        self.search_input = None
+        if search_placeholder:
+            self.search_input = QLineEdit()
+            self.search_input.setPlaceholderText(search_placeholder)
+            self.search_input.setClearButtonEnabled(True)
+            controls.addWidget(self.search_input)
+            self.search_timer = QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(SEARCH_DELAY_MS)
+            self.search_timer.timeout.connect(self.apply_search)
+            self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+
+        self.sort_input = QComboBox()
+        for label, _, _ in self.sorts:
+            self.sort_input.addItem(label)
+        self.sort_input.currentIndexChanged.connect(self.apply_sort)
+        controls.addWidget(self.sort_input)
+        if len(self.sorts) < 2:
+            self.sort_input.hide()
+        layout.addLayout(controls)
+
+        self.view = QListView()
+        self.view.setUniformItemSizes(True)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+        _, sort, descending = self.sorts[0]
+        self.model.sort = sort
+        self.model.descending = descending
+
+    def apply_search(self):
+        self.model.reload(search=self.search_input.text().strip())
+
+    def apply_sort(self, index):
+        _, sort, descending = self.sorts[index]
+        self.model.reload(sort=sort, descending=descending)
+
+    def refresh(self, **filters):
+        self.model.reload(**filters)
+
+    def merge(self, rows):
+        self.model.merge_rows(rows)
+
+    def count(self):
+        return self.model.rowCount()
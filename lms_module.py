@@ -1,10 +1,13 @@
 # lms_module.py
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QTextEdit, QPushButton,
-    QFileDialog, QDateEdit, QListWidget, QMessageBox
+    QFileDialog, QDateEdit
 )
 from PyQt5.QtCore import QDate
-import db
+import repositories
+import notifications
+from list_models import PagedList
+from rapid_entry import RapidEntry
 
 class LMSModule(QWidget):
     def __init__(self):
@@ -12,7 +15,6 @@ class LMSModule(QWidget):
         self.setWindowTitle("Learning Management System")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # Input: Title
@@ -42,8 +44,17 @@ class LMSModule(QWidget):
         submit_btn.clicked.connect(self.add_assignment)
         layout.addWidget(submit_btn)
 
+        # The description box takes Enter as a newline, so Enter in the
+        # title saves; description, file and due date carry over
+        self.rapid_entry = RapidEntry(self, [self.title_input], self.add_assignment,
+                                      self.load_assignments)
+        layout.addWidget(self.rapid_entry.checkbox)
+
         # Assignment List
-        self.assignment_list = QListWidget()
+        self.assignment_list = PagedList(
+            repositories.assignments, self.format_assignment,
+            sorts=[("Oldest first", "id", False), ("Due date", "due_date", False)],
+            search_placeholder="Filter by title")
         layout.addWidget(QLabel("📄 All Assignments:"))
         layout.addWidget(self.assignment_list)
 
@@ -61,29 +72,26 @@ class LMSModule(QWidget):
         due_date = self.date_input.date().toString("yyyy-MM-dd")
 
         if not title:
-            QMessageBox.warning(self, "Input Error", "Title is required.")
+            notifications.warning("Title is required.")
+            self.title_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO assignments (title, description, file_path, due_date)
-            VALUES (?, ?, ?, ?)
-        """, (title, desc, self.file_path, due_date))
-        conn.commit()
-        conn.close()
+        self.rapid_entry.submit(repositories.assignments.add, title, desc, self.file_path, due_date,
+                                on_result=self.assignment_added, what=f"assignment '{title}'")
+        if self.rapid_entry.enabled:
+            return
 
         self.title_input.clear()
         self.desc_input.clear()
         self.file_path = ""
-        self.load_assignments()
-        QMessageBox.information(self, "Success", "Assignment added!")
+
+    def assignment_added(self, _):
+        self.rapid_entry.refresh()
+        notifications.info("Assignment added.")
 
     def load_assignments(self):
-        self.assignment_list.clear()
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT title, due_date FROM assignments")
-        for title, due in cursor.fetchall():
-            self.assignment_list.addItem(f"{title} (Due: {due})")
-        conn.close()
+        self.assignment_list.refresh()
+
+    @staticmethod
+    def format_assignment(assignment):
+        return f"{assignment.title} (Due: {assignment.due_date})"
@@ -4,7 +4,13 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QPushButton, QLabel, QSizePolicy, QScrollArea, QMessageBox
 )
 from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtCore import QSize, Qt, QTimer
+import db
+import notifications
+import overdue
+import tasks
+import scan_ingest
+from export_dialog import ExportDialog
 
 
 class Dashboard(QMainWindow):
@@ -31,6 +37,11 @@ class Dashboard(QMainWindow):
         theme_btn.clicked.connect(self.toggle_theme)
         sidebar_layout.addWidget(theme_btn)
 
+        export_btn = QPushButton("Export Data")
+        export_btn.clicked.connect(self.show_export_dialog)
+        sidebar_layout.addWidget(export_btn)
+        self.export_dialog = None
+
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
         scroll_widget = QWidget()
@@ -45,6 +56,7 @@ class Dashboard(QMainWindow):
             ("Inventory Management",       "inventory_module", "InventoryModule", "icons/inventory.png"),
             ("HR Management",              "hr_module", "HRModule", "icons/hr.png"),
             ("Biometrics/RFID",            "biometric_module", "BiometricModule", "icons/biometric.png"),
+            ("SQL Statistics",             "sql_stats_panel", "SqlStatsPanel", "icons/sql.png"),
         ]
 
         for text, module_name, class_name, icon_path in features:
@@ -72,9 +84,28 @@ class Dashboard(QMainWindow):
         self.content_area = QWidget()
         self.content_area.setMinimumWidth(600)
         main_layout.addWidget(self.content_area, 3)
+        self.current_module = None
 
         self.is_dark_theme = False
 
+        # Module feedback (notifications.py) shows here instead of in dialogs
+        self.notification_bar = notifications.NotificationBar()
+        self.statusBar().addWidget(self.notification_bar, 1)
+
+        # Overdue library loans and their fines are assessed in the background
+        self.overdue_timer = QTimer(self)
+        self.overdue_timer.timeout.connect(self.run_overdue_job)
+        self.overdue_timer.start(overdue.RUN_INTERVAL_MS)
+        QTimer.singleShot(0, self.run_overdue_job)
+
+    def run_overdue_job(self):
+        tasks.submit(self, overdue.run, on_result=self.overdue_done)
+
+    def overdue_done(self, result):
+        added, _ = result
+        if added:
+            notifications.info(f"{added} library loans became overdue.")
+
     def toggle_theme(self):
         if self.is_dark_theme:
             self.setStyleSheet("")
@@ -89,6 +120,12 @@ class Dashboard(QMainWindow):
             """)
             self.is_dark_theme = True
 
+    def show_export_dialog(self):
+        if self.export_dialog is None:
+            self.export_dialog = ExportDialog(self)
+        self.export_dialog.show()
+        self.export_dialog.raise_()
+
     def load_module(self, module_name, class_name, display_name):
         try:
             module = __import__(module_name)
@@ -111,6 +148,11 @@ class Dashboard(QMainWindow):
 
         v_layout.addWidget(widget)
 
+        # Drop queries still running for the module being replaced
+        if self.current_module is not None:
+            tasks.cancel(self.current_module)
+        self.current_module = widget
+
         layout = self.centralWidget().layout()
         layout.removeWidget(self.content_area)
         self.content_area.deleteLater()
@@ -120,6 +162,10 @@ class Dashboard(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(tasks.wait_all)
+    app.aboutToQuit.connect(scan_ingest.shutdown)
+    app.aboutToQuit.connect(db.close_pool)
+    db.init_db()
     window = Dashboard()
     window.show()
     sys.exit(app.exec_())
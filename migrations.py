@@ -0,0 +1,958 @@
+# migrations.py
+# Ordered schema migrations. Each step runs once, inside its own
+# transaction, and is recorded in the schema_version table.
+import datetime
+
+import clock
+import isbn
+
+
+def _v1_initial_schema(cursor):
+
+    # Assignments Table (LMS)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            file_path TEXT,
+            due_date TEXT
+        )
+    """)
+
+    # Library Tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT,
+            isbn TEXT,
+            quantity INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS issues (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER,
+            student_name TEXT,
+            issue_date TEXT,
+            return_date TEXT,
+            FOREIGN KEY(book_id) REFERENCES books(id)
+        )
+    """)
+
+    # Transport Tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS buses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bus_number TEXT NOT NULL,
+            driver_name TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS routes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            route_name TEXT NOT NULL,
+            pickup_time TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transport_assignment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT,
+            bus_id INTEGER,
+            route_id INTEGER,
+            FOREIGN KEY(bus_id) REFERENCES buses(id),
+            FOREIGN KEY(route_id) REFERENCES routes(id)
+        )
+    """)
+
+    # Hostel Tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS hostels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hostel_id INTEGER,
+            room_number TEXT,
+            capacity INTEGER,
+            FOREIGN KEY(hostel_id) REFERENCES hostels(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS hostel_allocation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT,
+            room_id INTEGER,
+            FOREIGN KEY(room_id) REFERENCES rooms(id)
+        )
+    """)
+
+    # Inventory Table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            quantity INTEGER,
+            location TEXT
+        )
+    """)
+
+    # HR Tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS staff (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            role TEXT,
+            salary REAL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS payroll (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER,
+            pay_date TEXT,
+            amount REAL,
+            FOREIGN KEY(staff_id) REFERENCES staff(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leaves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER,
+            leave_date TEXT,
+            reason TEXT,
+            FOREIGN KEY(staff_id) REFERENCES staff(id)
+        )
+    """)
+
+    # Biometric Attendance Table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT,
+            date TEXT,
+            time TEXT,
+            status TEXT
+        )
+    """)
+
+
+def _v2_lookup_indexes(cursor):
+    # Attendance: today's list reads (date, time, student_name) straight
+    # from the index; per-student history uses (student_name, date).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_time ON attendance (date, time, student_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance (student_name, date)")
+
+    # Foreign keys
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issues_book ON issues (book_id, issue_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issues_student ON issues (student_name, issue_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_staff ON payroll (staff_id, pay_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leaves_staff ON leaves (staff_id, leave_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rooms_hostel ON rooms (hostel_id, room_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hostel_allocation_room ON hostel_allocation (room_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hostel_allocation_student ON hostel_allocation (student_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transport_assignment_bus ON transport_assignment (bus_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transport_assignment_route ON transport_assignment (route_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transport_assignment_student ON transport_assignment (student_name)")
+
+    # Name lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_title ON books (title)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_staff_name ON staff (name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventory_items_name ON inventory_items (name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_buses_number ON buses (bus_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_routes_name ON routes (route_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_hostels_name ON hostels (name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assignments_due ON assignments (due_date)")
+
+
+def _v3_date_range_indexes(cursor):
+    # Date-range exports and reports filter these tables by date alone
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issues_issue_date ON issues (issue_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payroll_pay_date ON payroll (pay_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leaves_leave_date ON leaves (leave_date)")
+
+
+def _v4_unique_daily_attendance(cursor):
+    # One attendance row per student per day; repeat card taps are
+    # suppressed and only counted. Existing duplicates are folded into the
+    # counts, keeping each student's first scan of the day.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scan_suppressions (
+            date TEXT PRIMARY KEY,
+            suppressed INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # One pass over idx_attendance_student_date finds the duplicate groups
+    cursor.execute("""
+        CREATE TEMP TABLE attendance_duplicates AS
+        SELECT student_name, date, MIN(id) AS keep_id, COUNT(*) AS n
+        FROM attendance GROUP BY student_name, date HAVING n > 1
+    """)
+    cursor.execute("""
+        INSERT INTO scan_suppressions (date, suppressed)
+        SELECT date, SUM(n - 1) FROM attendance_duplicates GROUP BY date
+    """)
+    cursor.execute("""
+        DELETE FROM attendance WHERE id IN (
+            SELECT a.id FROM attendance_duplicates d
+            JOIN attendance a ON a.student_name = d.student_name AND a.date = d.date
+            WHERE a.id <> d.keep_id
+        )
+    """)
+    cursor.execute("DROP TABLE attendance_duplicates")
+    cursor.execute("DROP INDEX IF EXISTS idx_attendance_student_date")
+    cursor.execute("CREATE UNIQUE INDEX idx_attendance_student_date ON attendance (student_name, date)")
+
+
+# Rollup maintenance for one attendance row, as (increment, decrement) SQL
+# bodies over NEW/OLD. Only 'Present' rows count; counters that reach zero
+# are deleted so the rollups hold exactly what a rebuild would produce.
+_ROLLUP_ADD = """
+    INSERT INTO attendance_daily (date, present) VALUES ({r}.date, 1)
+    ON CONFLICT (date) DO UPDATE SET present = present + 1;
+    INSERT INTO attendance_monthly (month, student_name, days_present)
+    VALUES (substr({r}.date, 1, 7), {r}.student_name, 1)
+    ON CONFLICT (month, student_name) DO UPDATE SET days_present = days_present + 1;
+    INSERT INTO attendance_term (term_id, student_name, days_present)
+    SELECT id, {r}.student_name, 1 FROM terms WHERE {r}.date BETWEEN start_date AND end_date
+    ON CONFLICT (term_id, student_name) DO UPDATE SET days_present = days_present + 1;
+"""
+_ROLLUP_REMOVE = """
+    UPDATE attendance_daily SET present = present - 1 WHERE date = {r}.date;
+    DELETE FROM attendance_daily WHERE date = {r}.date AND present <= 0;
+    UPDATE attendance_monthly SET days_present = days_present - 1
+    WHERE month = substr({r}.date, 1, 7) AND student_name = {r}.student_name;
+    DELETE FROM attendance_monthly
+    WHERE month = substr({r}.date, 1, 7) AND student_name = {r}.student_name AND days_present <= 0;
+    UPDATE attendance_term SET days_present = days_present - 1
+    WHERE student_name = {r}.student_name
+      AND term_id IN (SELECT id FROM terms WHERE {r}.date BETWEEN start_date AND end_date);
+    DELETE FROM attendance_term
+    WHERE student_name = {r}.student_name AND days_present <= 0
+      AND term_id IN (SELECT id FROM terms WHERE {r}.date BETWEEN start_date AND end_date);
+"""
+
+
+def _quarantine_attendance(cursor, problems):
+    # Moves attendance rows an upgrade cannot convert, kept as they were
+    # with the reason, to attendance_quarantine instead of failing the
+    # upgrade. problems: (SQL condition, reason) pairs; the first that
+    # matches a row gives its reason.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_quarantine (
+            id INTEGER PRIMARY KEY,
+            student_name TEXT,
+            date TEXT,
+            time TEXT,
+            status TEXT,
+            reason TEXT NOT NULL
+        )
+    """)
+    reason = " ".join(f"WHEN {condition} THEN '{text}'" for condition, text in problems)
+    where = " OR ".join(f"({condition})" for condition, _ in problems)
+    cursor.execute(f"""
+        INSERT INTO attendance_quarantine (id, student_name, date, time, status, reason)
+        SELECT id, student_name, date, time, status, CASE {reason} END
+        FROM attendance NOT INDEXED WHERE {where}
+    """)
+    cursor.execute(f"DELETE FROM attendance WHERE {where}")
+
+
+def _v5_attendance_rollups(cursor):
+    # Per-date headcounts and per-student monthly and term totals, kept up
+    # to date by triggers so reports never read the raw attendance rows.
+    # (Since v4 an attendance row already is the per-student daily record.)
+    # Legacy rows with no student or no date cannot be counted anywhere.
+    _quarantine_attendance(cursor, [
+        ("student_name IS NULL OR trim(student_name) = ''", "no student name"),
+        ("date IS NULL OR trim(date) = ''", "no date"),
+    ])
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS terms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_terms_dates ON terms (start_date, end_date)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            date TEXT PRIMARY KEY,
+            present INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_monthly (
+            month TEXT NOT NULL,
+            student_name TEXT NOT NULL,
+            days_present INTEGER NOT NULL,
+            PRIMARY KEY (month, student_name)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_attendance_monthly_student
+        ON attendance_monthly (student_name, month)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_term (
+            term_id INTEGER NOT NULL REFERENCES terms(id),
+            student_name TEXT NOT NULL,
+            days_present INTEGER NOT NULL,
+            PRIMARY KEY (term_id, student_name)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_attendance_term_student
+        ON attendance_term (student_name, term_id)
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_insert
+        AFTER INSERT ON attendance WHEN NEW.status = 'Present'
+        BEGIN {_ROLLUP_ADD.format(r="NEW")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_delete
+        AFTER DELETE ON attendance WHEN OLD.status = 'Present'
+        BEGIN {_ROLLUP_REMOVE.format(r="OLD")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_update_old
+        AFTER UPDATE OF student_name, date, status ON attendance WHEN OLD.status = 'Present'
+        BEGIN {_ROLLUP_REMOVE.format(r="OLD")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_update_new
+        AFTER UPDATE OF student_name, date, status ON attendance WHEN NEW.status = 'Present'
+        BEGIN {_ROLLUP_ADD.format(r="NEW")} END
+    """)
+
+    # A new term is filled from the raw rows once; a deleted one is dropped
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_terms_insert AFTER INSERT ON terms
+        BEGIN
+            INSERT INTO attendance_term (term_id, student_name, days_present)
+            SELECT NEW.id, student_name, COUNT(*) FROM attendance
+            WHERE date BETWEEN NEW.start_date AND NEW.end_date AND status = 'Present'
+            GROUP BY student_name;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_terms_delete AFTER DELETE ON terms
+        BEGIN
+            DELETE FROM attendance_term WHERE term_id = OLD.id;
+        END
+    """)
+
+    # Existing data. status is not in any index, so one sequential pass
+    # (NOT INDEXED) beats millions of index-order row lookups.
+    cursor.execute("""
+        INSERT INTO attendance_daily (date, present)
+        SELECT date, COUNT(*) FROM attendance NOT INDEXED WHERE status = 'Present' GROUP BY date
+    """)
+    cursor.execute("""
+        INSERT INTO attendance_monthly (month, student_name, days_present)
+        SELECT substr(date, 1, 7), student_name, COUNT(*) FROM attendance NOT INDEXED
+        WHERE status = 'Present' GROUP BY substr(date, 1, 7), student_name
+    """)
+
+
+# Compact attendance (v6). Days are counted from 1970-01-01 and times are
+# seconds since midnight; these expressions convert the old text values.
+_DAY_OF = "CAST(julianday({0}) - 2440587.5 AS INTEGER)"
+_SECONDS_OF = "CAST(strftime('%s', '1970-01-01 ' || {0}) AS INTEGER)"
+# Old times SQLite cannot read ("8:02", "8:02 AM") go through clock.seconds
+_ANY_SECONDS_OF = "COALESCE(" + _SECONDS_OF + ", clock_seconds({0}))"
+_MONTH_OF = "CAST(strftime('%Y%m', {0} + 2440587.5) AS INTEGER)"
+
+# Rollups now key on student ids, day numbers and yyyymm months. Rows being
+# moved to an archive file (attendance_archives.moving) leave them alone:
+# archived attendance still counts in reports.
+_COMPACT_ROLLUP_ADD = """
+    INSERT INTO attendance_daily (day, present) VALUES ({r}.day, 1)
+    ON CONFLICT (day) DO UPDATE SET present = present + 1;
+    INSERT INTO attendance_monthly (month, student_id, days_present)
+    VALUES (""" + _MONTH_OF.format("{r}.day") + """, {r}.student_id, 1)
+    ON CONFLICT (month, student_id) DO UPDATE SET days_present = days_present + 1;
+    INSERT INTO attendance_term (term_id, student_id, days_present)
+    SELECT id, {r}.student_id, 1 FROM terms WHERE {r}.day BETWEEN first_day AND last_day
+    ON CONFLICT (term_id, student_id) DO UPDATE SET days_present = days_present + 1;
+"""
+_COMPACT_ROLLUP_REMOVE = """
+    UPDATE attendance_daily SET present = present - 1 WHERE day = {r}.day;
+    DELETE FROM attendance_daily WHERE day = {r}.day AND present <= 0;
+    UPDATE attendance_monthly SET days_present = days_present - 1
+    WHERE month = """ + _MONTH_OF.format("{r}.day") + """ AND student_id = {r}.student_id;
+    DELETE FROM attendance_monthly
+    WHERE month = """ + _MONTH_OF.format("{r}.day") + """ AND student_id = {r}.student_id
+      AND days_present <= 0;
+    UPDATE attendance_term SET days_present = days_present - 1
+    WHERE student_id = {r}.student_id
+      AND term_id IN (SELECT id FROM terms WHERE {r}.day BETWEEN first_day AND last_day);
+    DELETE FROM attendance_term
+    WHERE student_id = {r}.student_id AND days_present <= 0
+      AND term_id IN (SELECT id FROM terms WHERE {r}.day BETWEEN first_day AND last_day);
+"""
+_NOT_MOVING = "NOT EXISTS (SELECT 1 FROM attendance_archives WHERE moving AND {r}.day BETWEEN first_day AND last_day)"
+
+
+def _v6_compact_attendance(cursor):
+    # attendance becomes attendance_log (integer student, day, seconds and
+    # status columns, ids preserved) plus a view with the old columns, so
+    # existing queries and INSERT/UPDATE/DELETE statements keep working.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_status (
+            code INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO attendance_status (code, name) "
+                   "VALUES (1, 'Present'), (2, 'Absent'), (3, 'Late')")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(id),
+            day INTEGER NOT NULL,
+            seconds INTEGER NOT NULL,
+            status INTEGER NOT NULL DEFAULT 1 REFERENCES attendance_status(code)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_archives (
+            term_id INTEGER PRIMARY KEY REFERENCES terms(id),
+            path TEXT NOT NULL,
+            first_day INTEGER NOT NULL,
+            last_day INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            moving INTEGER NOT NULL DEFAULT 0,
+            archived_at TEXT
+        )
+    """)
+
+    # Rows that cannot be converted are set aside first. The v5 triggers
+    # are still in place, so the rollups drop them too.
+    cursor.connection.create_function("clock_seconds", 1, clock.seconds, deterministic=True)
+    _quarantine_attendance(cursor, [
+        ("student_name IS NULL OR trim(student_name) = ''", "no student name"),
+        ("status IS NULL", "no status"),
+        (f"{_DAY_OF.format('date')} IS NULL", "date is not a date"),
+        (f"{_ANY_SECONDS_OF.format('time')} IS NULL", "time is not a time of day"),
+    ])
+
+    # Existing rows, in id order; students are numbered by name
+    cursor.execute("INSERT OR IGNORE INTO students (name) "
+                   "SELECT DISTINCT student_name FROM attendance ORDER BY student_name")
+    cursor.execute("INSERT OR IGNORE INTO attendance_status (name) SELECT DISTINCT status FROM attendance")
+    cursor.execute(f"""
+        INSERT INTO attendance_log (id, student_id, day, seconds, status)
+        SELECT a.id, s.id, {_DAY_OF.format("a.date")}, {_ANY_SECONDS_OF.format("a.time")}, st.code
+        FROM attendance a NOT INDEXED
+        JOIN students s ON s.name = a.student_name
+        JOIN attendance_status st ON st.name = a.status
+        ORDER BY a.id
+    """)
+    cursor.execute("DROP TABLE attendance")
+    cursor.execute("CREATE UNIQUE INDEX idx_attendance_log_student_day ON attendance_log (student_id, day)")
+    cursor.execute("CREATE INDEX idx_attendance_log_day ON attendance_log (day, seconds, student_id)")
+
+    cursor.execute(f"""
+        CREATE VIEW attendance AS
+        SELECT a.id AS id, s.name AS student_name, date(a.day + 2440587.5) AS date,
+               time(a.seconds, 'unixepoch') AS time, st.name AS status
+        FROM attendance_log a
+        JOIN students s ON s.id = a.student_id
+        JOIN attendance_status st ON st.code = a.status
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER attendance_view_insert INSTEAD OF INSERT ON attendance
+        BEGIN
+            INSERT OR IGNORE INTO students (name) VALUES (NEW.student_name);
+            INSERT OR IGNORE INTO attendance_status (name) VALUES (NEW.status);
+            INSERT INTO attendance_log (id, student_id, day, seconds, status) VALUES (
+                NEW.id, (SELECT id FROM students WHERE name = NEW.student_name),
+                {_DAY_OF.format("NEW.date")}, {_SECONDS_OF.format("NEW.time")},
+                (SELECT code FROM attendance_status WHERE name = NEW.status));
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER attendance_view_update INSTEAD OF UPDATE ON attendance
+        BEGIN
+            INSERT OR IGNORE INTO students (name) VALUES (NEW.student_name);
+            INSERT OR IGNORE INTO attendance_status (name) VALUES (NEW.status);
+            UPDATE attendance_log SET
+                student_id = (SELECT id FROM students WHERE name = NEW.student_name),
+                day = {_DAY_OF.format("NEW.date")}, seconds = {_SECONDS_OF.format("NEW.time")},
+                status = (SELECT code FROM attendance_status WHERE name = NEW.status)
+            WHERE id = OLD.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER attendance_view_delete INSTEAD OF DELETE ON attendance
+        BEGIN
+            DELETE FROM attendance_log WHERE id = OLD.id;
+        END
+    """)
+
+    # Suppressed-scan counts and rollups move to day numbers and student ids
+    cursor.execute("ALTER TABLE scan_suppressions RENAME TO scan_suppressions_v5")
+    cursor.execute("""
+        CREATE TABLE scan_suppressions (
+            day INTEGER PRIMARY KEY,
+            suppressed INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute(f"INSERT INTO scan_suppressions (day, suppressed) "
+                   f"SELECT {_DAY_OF.format('date')}, suppressed FROM scan_suppressions_v5 "
+                   f"WHERE {_DAY_OF.format('date')} IS NOT NULL")
+    cursor.execute("DROP TABLE scan_suppressions_v5")
+
+    cursor.execute(f"ALTER TABLE terms ADD COLUMN first_day INTEGER "
+                   f"GENERATED ALWAYS AS ({_DAY_OF.format('start_date')}) VIRTUAL")
+    cursor.execute(f"ALTER TABLE terms ADD COLUMN last_day INTEGER "
+                   f"GENERATED ALWAYS AS ({_DAY_OF.format('end_date')}) VIRTUAL")
+    # The v5 rollups are converted rather than recomputed from raw rows.
+    # Their term triggers go first, or the renames would re-point them.
+    cursor.execute("DROP TRIGGER IF EXISTS trg_terms_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_terms_delete")
+    for table in ("attendance_daily", "attendance_monthly", "attendance_term"):
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_v5")
+    cursor.execute("""
+        CREATE TABLE attendance_daily (
+            day INTEGER PRIMARY KEY,
+            present INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE attendance_monthly (
+            month INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            days_present INTEGER NOT NULL,
+            PRIMARY KEY (month, student_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE attendance_term (
+            term_id INTEGER NOT NULL REFERENCES terms(id),
+            student_id INTEGER NOT NULL,
+            days_present INTEGER NOT NULL,
+            PRIMARY KEY (term_id, student_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(f"""
+        INSERT INTO attendance_daily (day, present)
+        SELECT {_DAY_OF.format("date")}, present FROM attendance_daily_v5 ORDER BY date
+    """)
+    cursor.execute("""
+        INSERT INTO attendance_monthly (month, student_id, days_present)
+        SELECT CAST(replace(m.month, '-', '') AS INTEGER), s.id, m.days_present
+        FROM attendance_monthly_v5 m JOIN students s ON s.name = m.student_name
+        ORDER BY 1, 2
+    """)
+    cursor.execute("""
+        INSERT INTO attendance_term (term_id, student_id, days_present)
+        SELECT t.term_id, s.id, t.days_present
+        FROM attendance_term_v5 t JOIN students s ON s.name = t.student_name
+        ORDER BY 1, 2
+    """)
+    for table in ("attendance_daily", "attendance_monthly", "attendance_term"):
+        cursor.execute(f"DROP TABLE {table}_v5")
+    cursor.execute("CREATE INDEX idx_attendance_monthly_student ON attendance_monthly (student_id, month)")
+    cursor.execute("CREATE INDEX idx_attendance_term_student ON attendance_term (student_id, term_id)")
+
+    add = _COMPACT_ROLLUP_ADD
+    remove = _COMPACT_ROLLUP_REMOVE
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_log_insert AFTER INSERT ON attendance_log
+        WHEN NEW.status = 1 AND {_NOT_MOVING.format(r="NEW")}
+        BEGIN {add.format(r="NEW")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_log_delete AFTER DELETE ON attendance_log
+        WHEN OLD.status = 1 AND {_NOT_MOVING.format(r="OLD")}
+        BEGIN {remove.format(r="OLD")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_log_update_old AFTER UPDATE OF student_id, day, status
+        ON attendance_log WHEN OLD.status = 1
+        BEGIN {remove.format(r="OLD")} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_log_update_new AFTER UPDATE OF student_id, day, status
+        ON attendance_log WHEN NEW.status = 1
+        BEGIN {add.format(r="NEW")} END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER trg_terms_insert AFTER INSERT ON terms
+        BEGIN
+            INSERT INTO attendance_term (term_id, student_id, days_present)
+            SELECT NEW.id, student_id, COUNT(*) FROM attendance_log
+            WHERE day BETWEEN NEW.first_day AND NEW.last_day AND status = 1
+            GROUP BY student_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER trg_terms_delete AFTER DELETE ON terms
+        BEGIN
+            DELETE FROM attendance_term WHERE term_id = OLD.id;
+        END
+    """)
+
+
+def _v7_books_fulltext(cursor):
+    # Full-text index for the library search box: an external-content FTS5
+    # table over books, so the text is stored once. Prefix indexes make
+    # "as you type" prefix queries cheap; remove_diacritics lets "bronte"
+    # find "Brontë". Triggers keep it in step with every write to books.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5 (
+            title, author, isbn,
+            content='books', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_insert AFTER INSERT ON books
+        BEGIN
+            INSERT INTO books_fts (rowid, title, author, isbn)
+            VALUES (new.id, new.title, new.author, new.isbn);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_delete AFTER DELETE ON books
+        BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.isbn);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_update AFTER UPDATE OF title, author, isbn ON books
+        BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.isbn);
+            INSERT INTO books_fts (rowid, title, author, isbn)
+            VALUES (new.id, new.title, new.author, new.isbn);
+        END
+    """)
+    cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+    # Default ranking: a hit in the title counts most, then the author
+    cursor.execute("INSERT INTO books_fts (books_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')")
+
+
+def _v8_unique_isbn(cursor):
+    # One books row per ISBN. ISBNs are rewritten as bare ISBN-13 digits
+    # (isbn.canonical; codes that are not valid ISBNs only lose their
+    # separators) and blanks as NULL, which the unique index lets repeat.
+    # Duplicates are then merged into the oldest row: their quantities are
+    # added to it and their issues re-pointed at it.
+    cursor.connection.create_function("isbn_canonical", 1, isbn.canonical, deterministic=True)
+    cursor.execute("UPDATE books SET isbn = NULLIF(isbn_canonical(isbn), '') "
+                   "WHERE isbn IS NOT NULLIF(isbn_canonical(isbn), '')")
+
+    cursor.execute("CREATE TEMP TABLE book_merge (id INTEGER PRIMARY KEY, keep INTEGER NOT NULL)")
+    cursor.execute("""
+        INSERT INTO book_merge (id, keep)
+        SELECT b.id, k.keep
+        FROM books b
+        JOIN (SELECT isbn, MIN(id) AS keep FROM books
+              WHERE isbn IS NOT NULL GROUP BY isbn HAVING COUNT(*) > 1) k ON k.isbn = b.isbn
+        WHERE b.id <> k.keep
+    """)
+    cursor.execute("CREATE INDEX temp.idx_book_merge_keep ON book_merge (keep)")
+    cursor.execute("""
+        UPDATE books SET quantity = COALESCE(quantity, 0) + (
+            SELECT SUM(COALESCE(d.quantity, 0)) FROM book_merge m JOIN books d ON d.id = m.id
+            WHERE m.keep = books.id)
+        WHERE id IN (SELECT keep FROM book_merge)
+    """)
+    cursor.execute("""
+        UPDATE issues SET book_id = (SELECT keep FROM book_merge WHERE id = issues.book_id)
+        WHERE book_id IN (SELECT id FROM book_merge)
+    """)
+    cursor.execute("DELETE FROM books WHERE id IN (SELECT id FROM book_merge)")
+    cursor.execute("DROP TABLE temp.book_merge")
+
+    # The unique index replaces the plain ISBN index for lookups
+    cursor.execute("DROP INDEX IF EXISTS idx_books_isbn")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_books_isbn_unique ON books (isbn)")
+
+
+def _v9_circulation(cursor):
+    # Issues get a due date (return_date is when the copy came back, NULL
+    # while it is out) and books a count of copies on the shelf, kept by
+    # circulation.py in the same transaction as each issue and return.
+    cursor.execute("ALTER TABLE issues ADD COLUMN due_date TEXT")
+    cursor.execute("UPDATE issues SET due_date = date(issue_date, '+14 days')")
+    cursor.execute("""
+        ALTER TABLE books ADD COLUMN available_count INTEGER NOT NULL DEFAULT 0
+            CHECK (available_count >= 0)
+    """)
+    cursor.execute("""
+        UPDATE books SET available_count = MAX(COALESCE(quantity, 0) - (
+            SELECT COUNT(*) FROM issues WHERE book_id = books.id AND return_date IS NULL), 0)
+    """)
+    # Open issues only: finding the loan a returned copy closes
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_issues_open ON issues (book_id, student_name)
+        WHERE return_date IS NULL
+    """)
+
+
+def _v10_overdue_fines(cursor):
+    # overdue.py finds loans that have gone past their due date from this
+    # partial index of open issues, and keeps their fines in the fines table
+    # (one row per late issue; open while the copy is still out), so the
+    # library screen reads overdue state instead of working it out.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_issues_open_due ON issues (due_date)
+        WHERE return_date IS NULL
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fines (
+            issue_id INTEGER PRIMARY KEY REFERENCES issues(id),
+            book_id INTEGER NOT NULL,
+            student_name TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            days_overdue INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            open INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fines_open_due ON fines (open, due_date)")
+    # How far an incremental job has got, e.g. the last due date it checked
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_watermarks (
+            job TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+def _v11_transport_capacity(cursor):
+    # What bus_assignment.py needs to place riders: each bus has a capacity
+    # and runs one route, routes serve areas, and riders say which area they
+    # are picked up in. A student has at most one transport assignment.
+    cursor.execute("ALTER TABLE buses ADD COLUMN capacity INTEGER NOT NULL DEFAULT 40 CHECK (capacity >= 0)")
+    cursor.execute("ALTER TABLE buses ADD COLUMN route_id INTEGER REFERENCES routes(id)")
+    # A bus runs the route most of its existing riders were put on
+    cursor.execute("""
+        UPDATE buses SET route_id = (
+            SELECT route_id FROM transport_assignment
+            WHERE bus_id = buses.id AND route_id IS NOT NULL
+            GROUP BY route_id ORDER BY COUNT(*) DESC, route_id LIMIT 1)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_buses_route ON buses (route_id)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_areas (
+            route_id INTEGER NOT NULL REFERENCES routes(id),
+            area TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (route_id, area)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_route_areas_area ON route_areas (area)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transport_riders (
+            student_name TEXT PRIMARY KEY,
+            area TEXT NOT NULL COLLATE NOCASE
+        )
+    """)
+    # Keep each student's latest assignment; the older ones are moved to
+    # transport_assignment_superseded rather than lost
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transport_assignment_superseded (
+            id INTEGER PRIMARY KEY,
+            student_name TEXT,
+            bus_id INTEGER,
+            route_id INTEGER,
+            kept_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO transport_assignment_superseded (id, student_name, bus_id, route_id, kept_id)
+        SELECT t.id, t.student_name, t.bus_id, t.route_id, latest.id
+        FROM transport_assignment t
+        JOIN (SELECT student_name, MAX(id) AS id FROM transport_assignment GROUP BY student_name) latest
+            ON latest.student_name IS t.student_name
+        WHERE t.id <> latest.id
+    """)
+    cursor.execute("""
+        DELETE FROM transport_assignment
+        WHERE id IN (SELECT id FROM transport_assignment_superseded)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_transport_assignment_student")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transport_assignment_student_unique
+        ON transport_assignment (student_name)
+    """)
+
+
+def _v12_pickup_minutes(cursor):
+    # Route pickup times as minutes since midnight (clock.py) instead of
+    # free text, indexed so routes can be listed by time and picked by
+    # time range. Text that does not read as a time of day ("after
+    # assembly") leaves the route without a time; the text is kept in
+    # route_pickup_quarantine so it can be re-entered.
+    cursor.connection.create_function("clock_minutes", 1, clock.lenient, deterministic=True)
+    cursor.execute("""
+        ALTER TABLE routes ADD COLUMN pickup_minutes INTEGER
+            CHECK (pickup_minutes BETWEEN 0 AND 1439)
+    """)
+    cursor.execute("UPDATE routes SET pickup_minutes = clock_minutes(pickup_time)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_pickup_quarantine (
+            route_id INTEGER PRIMARY KEY REFERENCES routes(id),
+            pickup_time TEXT NOT NULL,
+            reason TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO route_pickup_quarantine (route_id, pickup_time, reason)
+        SELECT id, pickup_time, 'pickup time is not a time of day' FROM routes
+        WHERE pickup_minutes IS NULL AND trim(coalesce(pickup_time, '')) <> ''
+    """)
+    cursor.execute("ALTER TABLE routes DROP COLUMN pickup_time")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_routes_pickup ON routes (pickup_minutes)")
+
+
+def _v13_route_stops(cursor):
+    # Stops along each route, with coordinates in degrees, and an R*Tree of
+    # them as points (min = max) for nearest-stop and radius lookups
+    # (stops.py). Triggers keep the R*Tree in step with route_stops.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS route_stops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            route_id INTEGER NOT NULL REFERENCES routes(id),
+            stop_name TEXT NOT NULL,
+            lat REAL NOT NULL CHECK (lat BETWEEN -90 AND 90),
+            lon REAL NOT NULL CHECK (lon BETWEEN -180 AND 180),
+            sequence INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_route_stops_route ON route_stops (route_id, sequence)")
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS route_stops_rtree USING rtree (
+            id, min_lat, max_lat, min_lon, max_lon
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_route_stops_rtree_insert AFTER INSERT ON route_stops BEGIN
+            INSERT INTO route_stops_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_route_stops_rtree_delete AFTER DELETE ON route_stops BEGIN
+            DELETE FROM route_stops_rtree WHERE id = old.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_route_stops_rtree_update AFTER UPDATE OF lat, lon ON route_stops BEGIN
+            UPDATE route_stops_rtree SET min_lat = new.lat, max_lat = new.lat, min_lon = new.lon, max_lon = new.lon
+            WHERE id = new.id;
+        END
+    """)
+
+
+def _v14_null_safe_sorts(cursor):
+    # Paged lists sort nullable columns on IFNULL(column, '') (see
+    # Repository.SORTS); these indexes serve those sorts the way the plain
+    # column indexes did
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_staff_name_sort ON staff (IFNULL(name, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assignments_due_sort ON assignments (IFNULL(due_date, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rooms_hostel_sort ON rooms (hostel_id, IFNULL(room_number, ''))")
+    # In an analyzed database a new index without statistics looks more
+    # selective than it is and can take over unrelated queries
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        for index in ("idx_staff_name_sort", "idx_assignments_due_sort", "idx_rooms_hostel_sort"):
+            cursor.execute(f"ANALYZE {index}")
+
+
+MIGRATIONS = [
+    (1, "initial schema", _v1_initial_schema),
+    (2, "lookup indexes", _v2_lookup_indexes),
+    (3, "date range indexes", _v3_date_range_indexes),
+    (4, "unique daily attendance", _v4_unique_daily_attendance),
+    (5, "attendance rollups", _v5_attendance_rollups),
+    (6, "compact attendance", _v6_compact_attendance),
+    (7, "books full-text index", _v7_books_fulltext),
+    (8, "unique isbn", _v8_unique_isbn),
+    (9, "circulation", _v9_circulation),
+    (10, "overdue fines", _v10_overdue_fines),
+    (11, "transport capacity", _v11_transport_capacity),
+    (12, "pickup minutes", _v12_pickup_minutes),
+    (13, "route stops", _v13_route_stops),
+    (14, "null-safe sort indexes", _v14_null_safe_sorts),
+]
+
+# Migrations that free a lot of space; the file is compacted once afterwards
+VACUUM_AFTER = {6}
+
+
+def current_version(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def migrate(conn, target=None):
+    # target: the version to stop at (default: the latest); tests build an
+    # older schema this way to fill it with legacy rows.
+    # Cheap path: one indexed lookup when the schema is already current
+    target = latest_version() if target is None else target
+    if current_version(conn) >= target:
+        return []
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process migrated
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?",
+                            (version,)).fetchone():
+                conn.rollback()
+                continue
+            cursor = conn.cursor()
+            step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.datetime.now().isoformat(timespec="seconds")))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append((version, name))
+    if any(version in VACUUM_AFTER for version, _ in applied):
+        conn.execute("VACUUM")
+    return applied
+
+
+if __name__ == "__main__":
+    import db
+    with db.connection() as conn:
+        for version, name in migrate(conn):
+            print(f"Applied migration {version}: {name}")
+        print(f"Schema version: {current_version(conn)}")
@@ -0,0 +1,130 @@
+# notifications.py
+# Non-modal feedback for the module forms. Modules post messages with
+# info(), warning() and error() instead of opening a QMessageBox, so a
+# clerk never has to dismiss a dialog before the next entry. Messages go
+# into one queue, shown by NotificationBar in the dashboard's status bar;
+# a burst of identical messages collapses into a single entry with a
+# count ("Book added. (x12)"). The functions can be called from any
+# thread: posting is a queued signal into the UI thread.
+import collections
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QMenu, QToolButton, QWidget
+
+INFO = "info"
+WARNING = "warning"
+ERROR = "error"
+
+COLLAPSE_WINDOW_S = 3.0     # an identical message within this long adds to the count
+HISTORY_SIZE = 200
+DISPLAY_MS = {INFO: 4000, WARNING: 8000, ERROR: 15000}
+COLORS = {INFO: "#2E7D32", WARNING: "#B26A00", ERROR: "#C62828"}
+
+
+class Notification:
+    __slots__ = ("level", "text", "count", "first_at", "last_at")
+
+    def __init__(self, level, text, now):
+        self.level = level
+        self.text = text
+        self.count = 1
+        self.first_at = now
+        self.last_at = now
+
+    def __str__(self):
+        return self.text if self.count == 1 else f"{self.text} (x{self.count})"
+
+
+class NotificationQueue(QObject):
+    # changed(notification) fires for a new message and again whenever a
+    # repeat adds to its count
+    changed = pyqtSignal(object)
+    _posted = pyqtSignal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self._latest = {}       # (level, text) -> newest Notification
+        self._posted.connect(self._add)
+
+    def post(self, level, text):
+        self._posted.emit(level, text)
+
+    def _add(self, level, text):
+        now = time.monotonic()
+        key = (level, text)
+        notification = self._latest.get(key)
+        if notification is not None and now - notification.last_at <= COLLAPSE_WINDOW_S:
+            notification.count += 1
+            notification.last_at = now
+        else:
+            notification = self._latest[key] = Notification(level, text, now)
+            self.history.append(notification)
+            if len(self._latest) > HISTORY_SIZE:
+                self._latest = {(n.level, n.text): n for n in self.history}
+        self.changed.emit(notification)
+
+
+_queue = None
+
+
+def queue():
+    # Create it on the UI thread first (the dashboard does), so its slot runs there
+    global _queue
+    if _queue is None:
+        _queue = NotificationQueue()
+    return _queue
+
+
+def info(text):
+    queue().post(INFO, text)
+
+
+def warning(text):
+    queue().post(WARNING, text)
+
+
+def error(text):
+    queue().post(ERROR, text)
+
+
+class NotificationBar(QWidget):
+    # The newest message for a few seconds, plus a button listing recent ones
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel()
+        layout.addWidget(self.label, 1)
+
+        self.menu = QMenu(self)
+        self.menu.aboutToShow.connect(self.fill_menu)
+        self.history_btn = QToolButton()
+        self.history_btn.setText("Messages")
+        self.history_btn.setPopupMode(QToolButton.InstantPopup)
+        self.history_btn.setMenu(self.menu)
+        layout.addWidget(self.history_btn)
+
+        self.current = None
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.timeout.connect(self.clear)
+        queue().changed.connect(self.show_notification)
+
+    def show_notification(self, notification):
+        self.current = notification
+        self.label.setText(str(notification))
+        self.label.setStyleSheet(f"color: {COLORS[notification.level]};")
+        self.hide_timer.start(DISPLAY_MS[notification.level])
+
+    def clear(self):
+        self.current = None
+        self.label.clear()
+
+    def fill_menu(self):
+        self.menu.clear()
+        for notification in reversed(queue().history):
+            self.menu.addAction(str(notification)).setEnabled(False)
+        if not queue().history:
+            self.menu.addAction("No messages yet").setEnabled(False)
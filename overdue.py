@@ -0,0 +1,100 @@
+# overdue.py
+# Overdue detection and fines for library loans. A background job (run by
+# the dashboard every RUN_INTERVAL_MS, or from the command line) does two
+# set-based statements in one transaction:
+#
+#   1. New late loans: open issues whose due date falls after the stored
+#      watermark and before today, read from the partial index of open
+#      issues by due date. Each gets a fines row. The watermark then moves
+#      up to yesterday, so each loan is looked at once rather than every
+#      open issue on every run. (Loans are due after the day they are
+#      issued, so a new loan is always ahead of the watermark.)
+#   2. Open fines (copies still out) are brought up to today's day count.
+#
+# Later runs on the same day find the watermark already at yesterday and
+# return at once, so the job can run often.
+# A return settles its fine in the same transaction (circulation.py calls
+# SETTLE), including a late return the job has not seen yet. The library
+# screen lists the fines table through repositories.fines.
+#
+# Usage: python overdue.py [--db school.db] [--today YYYY-MM-DD]
+import argparse
+import datetime
+import sys
+
+import db
+
+JOB = "overdue"
+RUN_INTERVAL_MS = 60 * 60 * 1000
+FINE_PER_DAY = 2
+MAX_FINE = 200
+
+GET_WATERMARK = "SELECT value FROM job_watermarks WHERE job = ?"
+SET_WATERMARK = """
+    INSERT INTO job_watermarks (job, value) VALUES (?, ?)
+    ON CONFLICT (job) DO UPDATE SET value = MAX(value, excluded.value)
+"""
+INSERT_NEW = """
+    INSERT OR IGNORE INTO fines (issue_id, book_id, student_name, due_date, days_overdue, amount)
+    SELECT id, book_id, student_name, due_date, days, MIN(days * :rate, :cap) FROM (
+        SELECT id, book_id, student_name, due_date,
+               CAST(julianday(:today) - julianday(due_date) AS INTEGER) AS days
+        FROM issues
+        WHERE return_date IS NULL AND due_date > :watermark AND due_date < :today)
+"""
+REFRESH_OPEN = """
+    UPDATE fines SET
+        days_overdue = CAST(julianday(:today) - julianday(due_date) AS INTEGER),
+        amount = MIN(CAST(julianday(:today) - julianday(due_date) AS INTEGER) * :rate, :cap)
+    WHERE open = 1 AND days_overdue < CAST(julianday(:today) - julianday(due_date) AS INTEGER)
+"""
+# For a just-returned issue: its final fine, if it came back late
+SETTLE = """
+    INSERT INTO fines (issue_id, book_id, student_name, due_date, days_overdue, amount, open)
+    SELECT id, book_id, student_name, due_date, days, MIN(days * :rate, :cap), 0 FROM (
+        SELECT id, book_id, student_name, due_date,
+               CAST(julianday(return_date) - julianday(due_date) AS INTEGER) AS days
+        FROM issues
+        WHERE id = :issue_id AND return_date > due_date)
+    WHERE true
+    ON CONFLICT (issue_id) DO UPDATE SET
+        days_overdue = excluded.days_overdue, amount = excluded.amount, open = 0
+"""
+
+
+def settle(conn, issue_id):
+    # Part of a return's transaction
+    conn.execute(SETTLE, {"issue_id": issue_id, "rate": FINE_PER_DAY, "cap": MAX_FINE})
+
+
+def run(today=None):
+    # Returns (loans newly overdue, open fines updated)
+    today = today or datetime.date.today().isoformat()
+    yesterday = (datetime.date.fromisoformat(today) - datetime.timedelta(days=1)).isoformat()
+    params = {"today": today, "rate": FINE_PER_DAY, "cap": MAX_FINE}
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(GET_WATERMARK, (JOB,)).fetchone()
+        if row and row[0] >= yesterday:
+            return 0, 0     # already run today
+        added = conn.execute(INSERT_NEW, dict(params, watermark=row[0] if row else "")).rowcount
+        updated = conn.execute(REFRESH_OPEN, params).rowcount
+        conn.execute(SET_WATERMARK, (JOB, yesterday))
+    return added, updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find overdue library loans and update their fines")
+    parser.add_argument("--db", default=db.DB_PATH)
+    parser.add_argument("--today", help="run as of this date (default: today)")
+    args = parser.parse_args(argv)
+
+    db.set_database(args.db)
+    db.init_db()
+    added, updated = run(args.today)
+    print(f"{added} loans newly overdue, {updated} open fines updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# query_plans.py
+# Query-plan regression check. Runs EXPLAIN QUERY PLAN for every query the
+# repositories issue (plus the indexed lookups) and fails if any of them falls
+# back to a full SCAN. Full listings name the one table they may scan.
+# test_query_plans.py runs the same check under pytest.
+#
+# Usage: python query_plans.py [database]   (default: a fresh migrated db)
+import sys
+
+import attendance_archive
+import batch_desk
+import bus_assignment
+import circulation
+import db
+import exporter
+import overdue
+import repositories
+import rollups
+import stops
+
+PAGED_REPOSITORIES = [
+    ("assignments", repositories.assignments), ("books", repositories.books),
+    ("buses", repositories.buses), ("routes", repositories.routes),
+    ("rooms", repositories.rooms), ("inventory", repositories.inventory),
+    ("staff", repositories.staff), ("attendance", repositories.attendance),
+    ("fines", repositories.fines),
+]
+
+# (label, sql, sample params, tables the plan may SCAN)
+QUERIES = [
+    # Repository queries used by the modules
+    ("assignments.all", repositories.AssignmentRepository.SELECT_ALL, (), ("assignments",)),
+    ("books.all", repositories.BookRepository.SELECT_ALL, (), ("books",)),
+    ("books.get", repositories.BookRepository.SELECT_BY_ID, (1,), ()),
+    ("buses.all", repositories.BusRepository.SELECT_ALL, (), ("buses",)),
+    ("routes.all", repositories.RouteRepository.SELECT_ALL, (), ("routes",)),
+    ("hostels.first", repositories.HostelRepository.SELECT_FIRST, (), ("hostels",)),
+    ("rooms.all", repositories.RoomRepository.SELECT_ALL, (), ("r",)),
+    ("inventory.all", repositories.InventoryRepository.SELECT_ALL, (), ("inventory_items",)),
+    ("staff.all", repositories.StaffRepository.SELECT_ALL, (), ("staff",)),
+    ("attendance.for_date", repositories.AttendanceRepository.SELECT_FOR_DATE, (20089,), ()),
+    ("attendance.since", repositories.AttendanceRepository.SELECT_SINCE, (1, 1000), ()),
+    ("attendance.suppressed", repositories.AttendanceRepository.SELECT_SUPPRESSED,
+     (20089, 20119), ()),
+    ("students.id_for", repositories.StudentRepository.SELECT_ID, ("x",), ()),
+    ("terms.all", repositories.TermRepository.SELECT_ALL, (), ("terms",)),
+    ("terms.by_name", repositories.TermRepository.SELECT_BY_NAME, ("x",), ()),
+    ("attendance.day_summary", repositories.AttendanceRepository.DAY_SUMMARY, (20089,) * 2, ()),
+    # Full-text search: "m" is the ranked matches, at most MATCH_LIMIT rows
+    ("books.search", *repositories.books.page_query(search="ocean riv"), ("m",)),
+    ("books.search.next", *repositories.books.page_query(after=(-1.0, 1), search="ocean riv"), ("m",)),
+    # Circulation
+    ("circulation.take_copy", circulation.TAKE_COPY, (1,), ()),
+    ("circulation.close_issue", circulation.CLOSE_ISSUE, ("2025-01-01", 1), ()),
+    ("circulation.find_open", circulation.FIND_OPEN, (1, "x"), ()),
+    ("circulation.open_loans", circulation.SELECT_OPEN_FOR_STUDENT, ("x",), ()),
+    ("desk.load_books", batch_desk.LOAD_BOOKS, (), ("books",)),
+    ("desk.load_borrowers", batch_desk.LOAD_BORROWERS, (), ("students", "issues")),
+    ("desk.load_open_loans", batch_desk.LOAD_OPEN_LOANS, (), ("issues",)),
+    ("overdue.insert_new", overdue.INSERT_NEW,
+     {"today": "2025-06-02", "watermark": "2025-06-01", "rate": 2, "cap": 200}, ()),
+    ("overdue.refresh_open", overdue.REFRESH_OPEN, {"today": "2025-06-02", "rate": 2, "cap": 200}, ()),
+    ("overdue.settle", overdue.SETTLE, {"issue_id": 1, "rate": 2, "cap": 200}, ()),
+    # Bus assignment loads everything once and writes by student
+    ("bus_assignment.riders", bus_assignment.LOAD_RIDERS, (), ("r",)),
+    ("bus_assignment.buses", bus_assignment.LOAD_BUSES, (), ("buses",)),
+    ("bus_assignment.route_areas", bus_assignment.LOAD_ROUTE_AREAS, (), ("route_areas",)),
+    ("bus_assignment.taken", bus_assignment.LOAD_TAKEN, (), ("t",)),
+    ("bus_assignment.upsert", bus_assignment.UPSERT_SEAT, ("x", 1, 1), ()),
+    ("bus_assignment.delete", bus_assignment.DELETE_SEAT, ("x",), ()),
+
+] + [
+    # Keyset pages for the list models, in both directions
+    (f"{name}.page.{sort}{'.desc' if descending else ''}",
+     *repo.page_query(after=(1,) * (len(repo.SORTS[sort]) + 1), sort=sort, descending=descending,
+                      **{column: 20089 for column in repo.FILTERS}), ())
+    for name, repo in PAGED_REPOSITORIES for sort in repo.SORTS for descending in (False, True)
+] + [
+    # Foreign-key lookups
+    ("issues.by_book", "SELECT id, student_name FROM issues WHERE book_id = ?", (1,), ()),
+    ("issues.by_student", "SELECT book_id, issue_date FROM issues WHERE student_name = ?", ("x",), ()),
+    ("payroll.by_staff", "SELECT pay_date, amount FROM payroll WHERE staff_id = ? ORDER BY pay_date", (1,), ()),
+    ("leaves.by_staff", "SELECT leave_date, reason FROM leaves WHERE staff_id = ? ORDER BY leave_date", (1,), ()),
+    ("rooms.by_hostel", "SELECT room_number, capacity FROM rooms WHERE hostel_id = ?", (1,), ()),
+    ("hostel_allocation.by_room", "SELECT student_name FROM hostel_allocation WHERE room_id = ?", (1,), ()),
+    ("hostel_allocation.by_student", "SELECT room_id FROM hostel_allocation WHERE student_name = ?", ("x",), ()),
+    ("transport_assignment.by_bus", "SELECT student_name FROM transport_assignment WHERE bus_id = ?", (1,), ()),
+    ("transport_assignment.by_route", "SELECT student_name FROM transport_assignment WHERE route_id = ?", (1,), ()),
+    ("transport_assignment.by_student",
+     "SELECT bus_id, route_id FROM transport_assignment WHERE student_name = ?", ("x",), ()),
+    ("attendance.by_student",
+     "SELECT day, seconds FROM attendance_log WHERE student_id = ? AND day BETWEEN ? AND ?",
+     (1, 20089, 20453), ()),
+
+    # Date-range exports
+] + [
+    (f"export.{table}", *exporter.build_query(table, "2025-01-01", "2025-12-31"), ())
+    for table, column in exporter.TABLES.items() if column and table != "attendance"
+] + [
+    ("export.attendance", exporter.ATTENDANCE_RANGE.format(log="main.attendance_log"), (20089, 20453), ()),
+    # Attendance reports and rollup rebuilds
+    ("report.months", rollups.MONTH_REPORT, (202501, 202503), ()),
+    ("report.term", rollups.TERM_REPORT, (1,), ()),
+    ("report.school_days", rollups.SCHOOL_DAYS, (20089, 20119), ()),
+    ("rollups.overlapping_terms", rollups.OVERLAPPING_TERMS, (20119, 20089), ("terms",)),
+    ("rollups.rebuild_daily", rollups.REBUILD_DAILY.format(log="attendance_log", hint=""), (20089, 20119), ()),
+    ("rollups.rebuild_monthly", rollups.REBUILD_MONTHLY.format(log="attendance_log", hint=""),
+     (20089, 20119), ()),
+    ("rollups.rebuild_term", rollups.REBUILD_TERM.format(log="attendance_log"), (1, 20089, 20119), ()),
+    ("archive.overlapping", attendance_archive.SELECT_OVERLAPPING, (20119, 20089), ("attendance_archives",)),
+    ("archive.delete_rows", attendance_archive.DELETE_ROWS, (20089, 20119), ()),
+
+    # Name lookups
+    ("books.by_title", "SELECT id FROM books WHERE title = ?", ("x",), ()),
+    ("books.by_isbn", repositories.BookRepository.SELECT_BY_ISBN, ("x",), ()),
+    ("staff.by_name", "SELECT id FROM staff WHERE name = ?", ("x",), ()),
+    ("inventory_items.by_name", "SELECT id FROM inventory_items WHERE name = ?", ("x",), ()),
+    ("buses.by_number", "SELECT id FROM buses WHERE bus_number = ?", ("x",), ()),
+    ("routes.by_name", repositories.RouteRepository.SELECT_ID, ("x",), ()),
+    ("routes.by_names", repositories.RouteRepository.SELECT_IDS.format(names="?, ?"), ("x", "y"), ()),
+    ("routes.departing", repositories.RouteRepository.SELECT_DEPARTING, (420, 450, 200), ()),
+    ("stops.in_box", stops.SELECT_IN_BOX, (12.9, 13.0, 77.5, 77.6), ()),
+    ("route_areas.by_area", "SELECT route_id FROM route_areas WHERE area = ?", ("x",), ()),
+    ("buses.by_route", "SELECT id, capacity FROM buses WHERE route_id = ?", (1,), ()),
+    ("hostels.by_name", "SELECT id FROM hostels WHERE name = ?", ("x",), ()),
+    ("assignments.due_between",
+     "SELECT title FROM assignments WHERE due_date BETWEEN ? AND ?", ("2025-01-01", "2025-01-31"), ()),
+]
+
+
+def explain(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def check(conn, queries=QUERIES):
+    failures = []
+    for label, sql, params, may_scan in queries:
+        for detail in explain(conn, sql, params):
+            # "SCAN CONSTANT ROW" is a SELECT without FROM, not a table scan.
+            # Virtual tables always say SCAN; "VIRTUAL TABLE INDEX n:" with
+            # nothing after the colon is the full scan, anything else used a
+            # constraint such as an FTS5 MATCH.
+            if detail.startswith("SCAN ") and detail.split()[1] not in may_scan + ("CONSTANT",):
+                if "VIRTUAL TABLE INDEX" in detail and not detail.endswith(":"):
+                    continue
+                failures.append((label, detail))
+    return failures
+
+
+if __name__ == "__main__":
+    db.set_database(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
+    db.init_db()
+    with db.connection() as conn:
+        failures = check(conn)
+    for label, detail in failures:
+        print(f"FAIL {label}: {detail}")
+    print(f"{len(QUERIES)} queries checked, {len(failures)} full scans")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,101 @@
+# rapid_entry.py
+# "Rapid entry" for the module add forms, for bursts of typing such as
+# admissions day. While the form's checkbox is ticked, Enter moves to the
+# next field and saves from the last one. The form clears and returns to
+# its first field at once. Saves queue up and run in the background one
+# at a time, in the order they were entered, and list refreshes wait for
+# the queue to drain. Outcomes are reported through notifications.py.
+# With the checkbox off, submit() is a plain tasks.submit().
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QCheckBox
+
+import notifications
+import tasks
+
+REFRESH_DELAY_MS = 500
+
+
+class RapidEntry(QObject):
+    def __init__(self, owner, fields, save, refresh, checkbox=None):
+        # fields: the form's QLineEdits in entry order; save: the form's
+        # add method; refresh: reloads the list the form adds to. Forms on
+        # one screen can share a checkbox.
+        super().__init__(owner)
+        self.owner = owner
+        self.fields = fields
+        self.save = save
+        self.queue = deque()
+        self.saving = False
+        self.checkbox = checkbox or QCheckBox("Rapid entry (Enter saves and starts the next one)")
+        self.checkbox.toggled.connect(self.toggled)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(refresh)
+        self._refresh = refresh
+
+        for index, field in enumerate(fields):
+            field.returnPressed.connect(lambda index=index: self.advance(index))
+
+    @property
+    def enabled(self):
+        return self.checkbox.isChecked()
+
+    def toggled(self, on):
+        if on and self.owner.isVisible():
+            self.fields[0].setFocus()
+
+    def advance(self, index):
+        if not self.enabled:
+            return
+        if index + 1 < len(self.fields):
+            self.fields[index + 1].setFocus()
+            self.fields[index + 1].selectAll()
+        else:
+            self.save()
+
+    def submit(self, fn, *args, on_result=None, what="entry"):
+        # what names the entry in error messages, e.g. "book 'Emma'"
+        if not self.enabled:
+            return tasks.submit(self.owner, fn, *args, on_result=on_result, write=True)
+        self.queue.append((fn, args, on_result, what))
+        for field in self.fields:
+            field.clear()
+        self.fields[0].setFocus()
+        self._save_next()
+
+    def refresh(self):
+        # For the form's on_result: reload now, or once the queue drains
+        if self.enabled and (self.saving or self.queue):
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+            self._refresh()
+
+    def _save_next(self):
+        if self.saving or not self.queue:
+            return
+        fn, args, on_result, what = self.queue.popleft()
+        self.saving = True
+        # Owned by this object rather than the module, so switching modules
+        # does not cancel entries already typed
+        tasks.submit(self, fn, *args, write=True,
+                     on_result=lambda value: self._saved(on_result, value),
+                     on_error=lambda message: self._failed(what, message))
+
+    def _saved(self, on_result, value):
+        self.saving = False
+        try:
+            if on_result is not None:
+                on_result(value)
+        except RuntimeError:
+            pass    # form already closed
+        self._save_next()
+
+    def _failed(self, what, message):
+        self.saving = False
+        notifications.error(f"Could not save {what}: {message}")
+        self._save_next()
@@ -0,0 +1,582 @@
+# repositories.py
+# Data-access layer shared by the module widgets. Each repository owns the
+# SQL for one entity and returns compact __slots__ row objects instead of
+# raw tuples. The SQL strings are class constants, so sqlite3's per-connection
+# statement cache (see db.STATEMENT_CACHE_SIZE) reuses the prepared
+# statements on the pooled connections. Nothing here imports Qt, so the
+# repositories can be used from scripts and benchmarks.
+import datetime
+import re
+
+import clock
+import db
+from isbn import normalize as normalize_isbn
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+# Compact attendance storage: dates as days since 1970-01-01, times as
+# seconds since midnight (SQLite: date(day + 2440587.5), time(seconds, 'unixepoch'))
+def day_number(date):
+    return datetime.date.fromisoformat(date).toordinal() - EPOCH_ORDINAL
+
+
+def day_date(day):
+    return datetime.date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def seconds_of(time):
+    hours, minutes, seconds = time.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def match_expression(text):
+    # Search-box text as an FTS5 query: every word must appear, each as a
+    # prefix, so the results narrow as the user types. Words are quoted, so
+    # FTS5 operators and punctuation in the text are taken literally.
+    # None when the text has no words to search for.
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class Row:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+
+class Book(Row):
+    __slots__ = ("id", "title", "author", "isbn", "quantity", "available_count")
+
+
+class BookMatch(Row):
+    __slots__ = Book.__slots__ + ("rank",)
+
+
+class Staff(Row):
+    __slots__ = ("id", "name", "role", "salary")
+
+
+class InventoryItem(Row):
+    __slots__ = ("id", "name", "quantity", "location")
+
+
+class Bus(Row):
+    __slots__ = ("id", "bus_number", "driver_name", "capacity", "route_name", "riders")
+
+
+class Route(Row):
+    __slots__ = ("id", "route_name", "pickup_minutes", "areas")
+
+
+class Hostel(Row):
+    __slots__ = ("id", "name")
+
+
+class Room(Row):
+    __slots__ = ("id", "hostel_id", "room_number", "capacity", "hostel_name")
+
+
+class Assignment(Row):
+    __slots__ = ("id", "title", "description", "file_path", "due_date")
+
+
+class Student(Row):
+    __slots__ = ("id", "name")
+
+
+class AttendanceRecord(Row):
+    __slots__ = ("id", "student_name", "date", "time", "status", "student_id", "day", "seconds")
+
+
+class Term(Row):
+    __slots__ = ("id", "name", "start_date", "end_date")
+
+
+class Fine(Row):
+    __slots__ = ("id", "book_id", "title", "student_name", "due_date", "days_overdue", "amount", "open")
+
+
+def _sort_column(column, attr, if_null=None):
+    return column if if_null is None else f"IFNULL({column}, {if_null!r})"
+
+
+def _sort_value(row, column, attr, if_null=None):
+    value = getattr(row, attr)
+    return if_null if value is None else value
+
+
+class Repository:
+    row_type = Row
+
+    # Keyset paging (used by list_models.PagedListModel). PAGE_SELECT is the
+    # SELECT ... FROM part; SORTS maps a sort name to the (column, attribute)
+    # pairs it orders by, always followed by ID_COLUMN as a tie-breaker, so
+    # each page starts with an index range seek after the previous page's
+    # last key. A column that may hold NULLs gives a third value to stand in
+    # for them, (column, attribute, if_null): NULL never compares greater
+    # than a key, so paging on the bare column would stop at the first
+    # NULL. It sorts on IFNULL(column, if_null), which needs an index on
+    # that expression.
+    PAGE_SELECT = None
+    ID_COLUMN = "id"
+    SORTS = {"id": ()}
+    SEARCH_COLUMNS = ()
+    SEARCH_ATTRS = None     # row attributes for SEARCH_COLUMNS, if named differently
+    FILTERS = {}
+
+    # Full-text search, for repositories with an FTS5 index: MATCH_SELECT
+    # is the SELECT ... FROM part joining the matches "m" (rowid, rank) of
+    # MATCH_TABLE to the table, with m.rank as an extra last column, and
+    # MATCH_ROW_TYPE the row type with a trailing "rank" slot. Searches then
+    # go through the index and come back best match first, paged on
+    # (rank, rowid) whatever the sort. Ranking costs a little for every
+    # match, so only the first MATCH_LIMIT matches are ranked: a short
+    # prefix that matches half the catalogue still answers at typing speed,
+    # and the next letters narrow it down.
+    MATCH_SELECT = None
+    MATCH_TABLE = None
+    MATCH_ROW_TYPE = None
+    MATCH_LIMIT = 2000
+
+    def page(self, after=None, limit=200, sort="id", descending=False, search=None, **filters):
+        sql, params = self.page_query(after, limit, sort, descending, search, **filters)
+        if self._full_text(search):
+            return self._fetch_all(sql, params, self.MATCH_ROW_TYPE)
+        return self._fetch_all(sql, params)
+
+    def page_query(self, after=None, limit=200, sort="id", descending=False, search=None, **filters):
+        if self._full_text(search):
+            return self.match_query(after, limit, search, **filters)
+        order = [_sort_column(*entry) for entry in self.SORTS[sort]] + [self.ID_COLUMN]
+        clauses = []
+        params = []
+        for name, value in filters.items():
+            clauses.append(f"{self.FILTERS[name]} = ?")
+            params.append(value)
+        if search:
+            clauses.append("(" + " OR ".join(f"{c} LIKE ?" for c in self.SEARCH_COLUMNS) + ")")
+            params.extend([f"%{search}%"] * len(self.SEARCH_COLUMNS))
+        if after is not None:
+            placeholders = ", ".join("?" * len(order))
+            if order[0].startswith("IFNULL("):
+                # SQLite seeks an expression index on a plain comparison,
+                # not on one inside a row value
+                clauses.append(f"{order[0]} {'<=' if descending else '>='} ?")
+                params.append(after[0])
+            clauses.append(f"({', '.join(order)}) {'<' if descending else '>'} ({placeholders})")
+            params.extend(after)
+
+        sql = self.PAGE_SELECT
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = " DESC" if descending else ""
+        sql += " ORDER BY " + ", ".join(column + direction for column in order) + " LIMIT ?"
+        params.append(limit)
+        return sql, params
+
+    def match_query(self, after=None, limit=200, search=None, **filters):
+        matches = (f"(SELECT rowid, rank FROM {self.MATCH_TABLE} WHERE {self.MATCH_TABLE} MATCH ? "
+                   f"LIMIT {self.MATCH_LIMIT})")
+        clauses = []
+        params = [match_expression(search)]
+        for name, value in filters.items():
+            clauses.append(f"{self.FILTERS[name]} = ?")
+            params.append(value)
+        if after is not None:
+            clauses.append("(m.rank, m.rowid) > (?, ?)")
+            params.extend(after)
+        sql = self.MATCH_SELECT.format(matches=matches)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY m.rank, m.rowid LIMIT ?"
+        params.append(limit)
+        return sql, params
+
+    def page_key(self, row, sort="id"):
+        if self.MATCH_ROW_TYPE is not None and isinstance(row, self.MATCH_ROW_TYPE):
+            return (row.rank, row.id)
+        return tuple(_sort_value(row, *entry) for entry in self.SORTS[sort]) + (row.id,)
+
+    def _full_text(self, search):
+        return self.MATCH_SELECT is not None and search and match_expression(search) is not None
+
+    def matches(self, row, search=None, **filters):
+        # page_query()'s WHERE clause evaluated on a row already in hand, so
+        # rows fetched some other way can be merged into a paged list. Filters
+        # are read from the row attribute of the same name, search columns
+        # from SEARCH_ATTRS (default: the column name without its alias).
+        for name, value in filters.items():
+            if getattr(row, name) != value:
+                return False
+        if search:
+            needle = search.lower()
+            attrs = self.SEARCH_ATTRS or [column.split(".")[-1] for column in self.SEARCH_COLUMNS]
+            return any(needle in str(getattr(row, attr)).lower() for attr in attrs)
+        return True
+
+    def _fetch_all(self, sql, params=(), row_type=None):
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = (row_type or self.row_type).from_row
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _fetch_one(self, sql, params=()):
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = self.row_type.from_row
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def _insert(self, sql, params):
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.lastrowid
+
+
+class BookRepository(Repository):
+    row_type = Book
+    # ISBNs are stored normalized (isbn.normalize), NULL when unknown, and
+    # are unique: adding a catalogued ISBN again adds to its quantity. New
+    # copies are on the shelf, so available_count grows with quantity.
+    INSERT = ("INSERT INTO books (title, author, isbn, quantity, available_count) "
+              "VALUES (?1, ?2, ?3, ?4, COALESCE(?4, 0)) "
+              "ON CONFLICT (isbn) DO UPDATE SET quantity = COALESCE(quantity, 0) + COALESCE(excluded.quantity, 0), "
+              "available_count = available_count + excluded.available_count")
+    UPSERT = INSERT + " RETURNING id"
+    SELECT_ALL = "SELECT id, title, author, isbn, quantity, available_count FROM books"
+    SELECT_BY_ID = SELECT_ALL + " WHERE id = ?"
+    SELECT_BY_ISBN = SELECT_ALL + " WHERE isbn = ?"
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "title": (("title", "title"),)}
+    SEARCH_COLUMNS = ("title", "author", "isbn")
+    MATCH_SELECT = ("SELECT b.id, b.title, b.author, b.isbn, b.quantity, b.available_count, m.rank "
+                    "FROM {matches} m JOIN books b ON b.id = m.rowid")
+    MATCH_TABLE = "books_fts"
+    MATCH_ROW_TYPE = BookMatch
+
+    def add(self, title, author, isbn, quantity):
+        # Returns the new book's id, or the id of the book already holding
+        # this ISBN. Raises ValueError for an invalid ISBN.
+        with db.connection() as conn:
+            return conn.execute(self.UPSERT, (title, author, normalize_isbn(isbn) or None,
+                                              quantity)).fetchone()[0]
+
+    def get(self, book_id):
+        return self._fetch_one(self.SELECT_BY_ID, (book_id,))
+
+    def by_isbn(self, isbn):
+        # Accepts ISBN-10 or ISBN-13 in any format
+        return self._fetch_one(self.SELECT_BY_ISBN, (normalize_isbn(isbn),))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class StaffRepository(Repository):
+    row_type = Staff
+    INSERT = "INSERT INTO staff (name, role, salary) VALUES (?, ?, ?)"
+    SELECT_ALL = "SELECT id, name, role, salary FROM staff"
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "name": (("name", "name", ""),)}
+    SEARCH_COLUMNS = ("name", "role")
+
+    def add(self, name, role, salary):
+        return self._insert(self.INSERT, (name, role, salary))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class InventoryRepository(Repository):
+    row_type = InventoryItem
+    INSERT = "INSERT INTO inventory_items (name, quantity, location) VALUES (?, ?, ?)"
+    SELECT_ALL = "SELECT id, name, quantity, location FROM inventory_items"
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "name": (("name", "name"),)}
+    SEARCH_COLUMNS = ("name", "location")
+
+    def add(self, name, quantity, location):
+        return self._insert(self.INSERT, (name, quantity, location))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class BusRepository(Repository):
+    row_type = Bus
+    # A bus runs one route (route_id, NULL for none); 40 seats unless
+    # stated. riders counts its transport assignments.
+    INSERT = ("INSERT INTO buses (bus_number, driver_name, capacity, route_id) "
+              "VALUES (?, ?, COALESCE(?, 40), ?)")
+    SELECT_ALL = ("SELECT id, bus_number, driver_name, capacity, "
+                  "(SELECT route_name FROM routes r WHERE r.id = buses.route_id), "
+                  "(SELECT COUNT(*) FROM transport_assignment t WHERE t.bus_id = buses.id) FROM buses")
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "bus_number": (("bus_number", "bus_number"),)}
+    SEARCH_COLUMNS = ("bus_number", "driver_name")
+
+    def add(self, bus_number, driver_name, capacity=None, route=None):
+        # route is a route name; raises ValueError for one that does not exist
+        with db.connection() as conn:
+            route_id = None
+            if route:
+                row = conn.execute(RouteRepository.SELECT_ID, (route,)).fetchone()
+                if row is None:
+                    raise ValueError(f"No route named '{route}'")
+                route_id = row[0]
+            return conn.execute(self.INSERT, (bus_number, driver_name, capacity, route_id)).lastrowid
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class RouteRepository(Repository):
+    row_type = Route
+    # Pickup times are minutes since midnight (clock.py), NULL when not set
+    INSERT = "INSERT INTO routes (route_name, pickup_minutes) VALUES (?, ?)"
+    INSERT_AREA = "INSERT OR IGNORE INTO route_areas (route_id, area) VALUES (?, ?)"
+    SELECT_ALL = ("SELECT id, route_name, pickup_minutes, "
+                  "(SELECT group_concat(area, ', ') FROM route_areas a WHERE a.route_id = routes.id) FROM routes")
+    SELECT_ID = "SELECT id FROM routes WHERE route_name = ?"
+    # Several names at once, the first route of each name as SELECT_ID gives
+    SELECT_IDS = "SELECT route_name, MIN(id) FROM routes WHERE route_name IN ({names}) GROUP BY route_name"
+    NAMES_PER_QUERY = 500
+    # A range seek on idx_routes_pickup, already in time order
+    SELECT_DEPARTING = SELECT_ALL + (" WHERE pickup_minutes BETWEEN ? AND ? "
+                                     "ORDER BY pickup_minutes, id LIMIT ?")
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "route_name": (("route_name", "route_name"),)}
+    SEARCH_COLUMNS = ("route_name",)
+
+    def add(self, route_name, pickup_time, areas=()):
+        # pickup_time is text such as "7:30 AM" (ValueError if it is not a
+        # time); areas: the pickup areas the route serves
+        with db.connection() as conn:
+            route_id = conn.execute(self.INSERT, (route_name, clock.parse(pickup_time))).lastrowid
+            conn.executemany(self.INSERT_AREA, ((route_id, area.strip()) for area in areas if area.strip()))
+            return route_id
+
+    def ids_of(self, route_names):
+        # {route name: id} for those of route_names that are routes
+        route_names = list(route_names)
+        ids = {}
+        with db.connection() as conn:
+            for i in range(0, len(route_names), self.NAMES_PER_QUERY):
+                chunk = route_names[i:i + self.NAMES_PER_QUERY]
+                ids.update(conn.execute(self.SELECT_IDS.format(names=", ".join("?" * len(chunk))), chunk))
+        return ids
+
+    def departing(self, start, end, limit=200):
+        # Routes picking up from start to end (minutes since midnight, both
+        # included), earliest first
+        return self._fetch_all(self.SELECT_DEPARTING, (start, end, limit))
+
+    def next_departures(self, now, limit=10):
+        # The next routes to leave today, from minute now on
+        return self.departing(now, clock.MINUTES_PER_DAY - 1, limit)
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class RiderRepository(Repository):
+    # Students who need transport and the area they are picked up in
+    # (bus_assignment.py gives them seats)
+    INSERT = ("INSERT INTO transport_riders (student_name, area) VALUES (?, ?) "
+              "ON CONFLICT (student_name) DO UPDATE SET area = excluded.area")
+
+    def add(self, student_name, area):
+        return self._insert(self.INSERT, (student_name, area))
+
+
+class HostelRepository(Repository):
+    row_type = Hostel
+    INSERT = "INSERT INTO hostels (name) VALUES (?)"
+    SELECT_FIRST = "SELECT id, name FROM hostels LIMIT 1"
+
+    def add(self, name):
+        return self._insert(self.INSERT, (name,))
+
+    def first(self):
+        return self._fetch_one(self.SELECT_FIRST)
+
+
+class RoomRepository(Repository):
+    row_type = Room
+    INSERT = "INSERT INTO rooms (hostel_id, room_number, capacity) VALUES (?, ?, ?)"
+    SELECT_ALL = """
+        SELECT r.id, r.hostel_id, r.room_number, r.capacity, h.name
+        FROM rooms r
+        JOIN hostels h ON r.hostel_id = h.id
+    """
+    PAGE_SELECT = SELECT_ALL
+    ID_COLUMN = "r.id"
+    SORTS = {"id": (), "room": (("r.hostel_id", "hostel_id"), ("r.room_number", "room_number", ""))}
+    SEARCH_COLUMNS = ("h.name", "r.room_number")
+
+    def add(self, hostel_id, room_number, capacity):
+        return self._insert(self.INSERT, (hostel_id, room_number, capacity))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class AssignmentRepository(Repository):
+    row_type = Assignment
+    INSERT = "INSERT INTO assignments (title, description, file_path, due_date) VALUES (?, ?, ?, ?)"
+    SELECT_ALL = "SELECT id, title, description, file_path, due_date FROM assignments"
+    PAGE_SELECT = SELECT_ALL
+    SORTS = {"id": (), "due_date": (("due_date", "due_date", ""),)}
+    SEARCH_COLUMNS = ("title",)
+
+    def add(self, title, description, file_path, due_date):
+        return self._insert(self.INSERT, (title, description, file_path, due_date))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+
+class StudentRepository(Repository):
+    row_type = Student
+    INSERT = "INSERT INTO students (name) VALUES (?)"
+    INSERT_IF_NEW = "INSERT OR IGNORE INTO students (name) VALUES (?)"
+    SELECT_ID = "SELECT id FROM students WHERE name = ?"
+
+    def id_for(self, name):
+        # The student's id, adding them on first sight
+        with db.connection() as conn:
+            cursor = conn.execute(self.INSERT_IF_NEW, (name,))
+            if cursor.rowcount:
+                return cursor.lastrowid
+            return conn.execute(self.SELECT_ID, (name,)).fetchone()[0]
+
+
+class AttendanceRepository(Repository):
+    # Stored compactly in attendance_log (see day_number()/seconds_of());
+    # rows come back with the readable student_name/date/time/status too.
+    row_type = AttendanceRecord
+    STATUS_CODES = {"Present": 1, "Absent": 2, "Late": 3}
+    INSERT = "INSERT INTO attendance_log (student_id, day, seconds, status) VALUES (?, ?, ?, ?)"
+    # A second scan the same day hits idx_attendance_log_student_day and is skipped
+    INSERT_IF_NEW = "INSERT OR IGNORE INTO attendance_log (student_id, day, seconds, status) VALUES (?, ?, ?, ?)"
+    RECORD_SUPPRESSED = """
+        INSERT INTO scan_suppressions (day, suppressed) VALUES (?, ?)
+        ON CONFLICT (day) DO UPDATE SET suppressed = suppressed + excluded.suppressed
+    """
+    SELECT_SUPPRESSED = "SELECT IFNULL(SUM(suppressed), 0) FROM scan_suppressions WHERE day BETWEEN ? AND ?"
+    COLUMNS = ("a.id, s.name, date(a.day + 2440587.5), time(a.seconds, 'unixepoch'), st.name, "
+               "a.student_id, a.day, a.seconds")
+    TABLES = ("{log} a JOIN students s ON s.id = a.student_id "
+              "JOIN attendance_status st ON st.code = a.status")
+    SELECT = f"SELECT {COLUMNS} FROM {TABLES.format(log='attendance_log')}"
+    SELECT_FOR_DATE = SELECT + " WHERE a.day = ?"
+    # Rows inserted after a known id (a rowid range seek, however big the table)
+    SELECT_SINCE = SELECT + " WHERE a.id > ? ORDER BY a.id LIMIT ?"
+    # Read in one statement so they describe the same snapshot
+    DAY_SUMMARY = ("SELECT (SELECT COUNT(*) FROM attendance_log WHERE day = ?), "
+                   "(SELECT IFNULL(MAX(id), 0) FROM attendance_log), "
+                   "(SELECT IFNULL(SUM(suppressed), 0) FROM scan_suppressions WHERE day = ?)")
+    # The readable columns under the old names, for exports; {log} may be
+    # an archive's table
+    EXPORT_SELECT = ("SELECT a.id AS id, s.name AS student_name, date(a.day + 2440587.5) AS date, "
+                     "time(a.seconds, 'unixepoch') AS time, st.name AS status FROM " + TABLES)
+    PAGE_SELECT = SELECT
+    ID_COLUMN = "a.id"
+    # (seconds, student_id, id) follows idx_attendance_log_day exactly
+    SORTS = {"id": (), "time": (("a.seconds", "seconds"), ("a.student_id", "student_id"))}
+    SEARCH_COLUMNS = ("s.name",)
+    SEARCH_ATTRS = ("student_name",)
+    FILTERS = {"day": "a.day"}
+
+    def add(self, student_name, date, time, status):
+        with db.connection():
+            return self._insert(self.INSERT, (
+                students.id_for(student_name), day_number(date), seconds_of(time),
+                self.STATUS_CODES[status]))
+
+    def for_date(self, date):
+        return self._fetch_all(self.SELECT_FOR_DATE, (day_number(date),))
+
+    def since(self, after_id, limit=1000):
+        return self._fetch_all(self.SELECT_SINCE, (after_id, limit))
+
+    def suppressed(self, start, end=None):
+        # Repeat scans ignored between two dates (inclusive)
+        with db.connection() as conn:
+            return conn.execute(self.SELECT_SUPPRESSED,
+                                (day_number(start), day_number(end or start))).fetchone()[0]
+
+    def day_summary(self, date):
+        # (rows for date, highest id so far, repeat scans suppressed on
+        # date); the id is a starting watermark for since()
+        day = day_number(date)
+        with db.connection() as conn:
+            return conn.execute(self.DAY_SUMMARY, (day, day)).fetchone()
+
+
+class TermRepository(Repository):
+    row_type = Term
+    # Inserting a term fills its attendance_term rollup (trg_terms_insert)
+    INSERT = "INSERT INTO terms (name, start_date, end_date) VALUES (?, ?, ?)"
+    SELECT_ALL = "SELECT id, name, start_date, end_date FROM terms ORDER BY start_date"
+    SELECT_BY_NAME = "SELECT id, name, start_date, end_date FROM terms WHERE name = ?"
+
+    def add(self, name, start_date, end_date):
+        return self._insert(self.INSERT, (name, start_date, end_date))
+
+    def all(self):
+        return self._fetch_all(self.SELECT_ALL)
+
+    def by_name(self, name):
+        return self._fetch_one(self.SELECT_BY_NAME, (name,))
+
+
+class FineRepository(Repository):
+    # Late loans, as last assessed by overdue.py; id is the issue id
+    row_type = Fine
+    PAGE_SELECT = """
+        SELECT f.issue_id, f.book_id, b.title, f.student_name, f.due_date, f.days_overdue, f.amount, f.open
+        FROM fines f
+        JOIN books b ON b.id = f.book_id
+    """
+    ID_COLUMN = "f.issue_id"
+    SORTS = {"due": (("f.due_date", "due_date"),)}
+    SEARCH_COLUMNS = ("f.student_name", "b.title")
+    FILTERS = {"open": "f.open"}
+
+
+books = BookRepository()
+staff = StaffRepository()
+inventory = InventoryRepository()
+buses = BusRepository()
+routes = RouteRepository()
+riders = RiderRepository()
+hostels = HostelRepository()
+rooms = RoomRepository()
+assignments = AssignmentRepository()
+students = StudentRepository()
+attendance = AttendanceRepository()
+terms = TermRepository()
+fines = FineRepository()
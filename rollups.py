@@ -0,0 +1,206 @@
+# rollups.py
+# Attendance reports from the rollup tables (migration 5): attendance_daily
+# holds the headcount per school day, attendance_monthly and attendance_term
+# the days present per student. Triggers keep them current as scans arrive,
+# so a report over a whole academic year reads a few thousand summary rows
+# instead of millions of attendance rows. rebuild() recomputes them from
+# attendance_log (and any archived terms) after backfills or repairs.
+#
+# Usage: python rollups.py rebuild [--from 2024-06-01] [--to 2024-06-30]
+#        python rollups.py report (--term NAME | --from 2024-06 --to 2025-05) [--out report.csv]
+#        python rollups.py add-term NAME START END
+import argparse
+import calendar
+import collections
+import csv
+import datetime
+import sys
+import time
+
+import attendance_archive
+import db
+import repositories
+from repositories import Row
+
+# Students with no attendance at all in a period have no rollup rows, so
+# they do not appear in its report. Months are yyyymm integers and days
+# day numbers (repositories.day_number()).
+MONTH_REPORT = """
+    SELECT s.name, SUM(m.days_present) FROM attendance_monthly m JOIN students s ON s.id = m.student_id
+    WHERE m.month BETWEEN ? AND ? GROUP BY m.student_id ORDER BY s.name
+"""
+TERM_REPORT = """
+    SELECT s.name, t.days_present FROM attendance_term t JOIN students s ON s.id = t.student_id
+    WHERE t.term_id = ? ORDER BY s.name
+"""
+SCHOOL_DAYS = "SELECT COUNT(*) FROM attendance_daily WHERE day BETWEEN ? AND ?"
+
+# Rebuild statements, run once per attendance_archive.attached_logs() part;
+# {log} is that part's table and {hint} is NOT INDEXED for a full rebuild,
+# where one sequential pass beats index-order lookups of the status column.
+# Parts split months and terms, hence the upserts.
+DELETE_DAILY = "DELETE FROM attendance_daily WHERE day BETWEEN ? AND ?"
+DELETE_MONTHLY = "DELETE FROM attendance_monthly WHERE month BETWEEN ? AND ?"
+DELETE_TERMS = "DELETE FROM attendance_term WHERE term_id IN ({terms})"
+REBUILD_DAILY = """
+    INSERT INTO attendance_daily (day, present)
+    SELECT day, COUNT(*) FROM {log} {hint}
+    WHERE day BETWEEN ? AND ? AND status = 1 GROUP BY day
+    ON CONFLICT (day) DO UPDATE SET present = present + excluded.present
+"""
+REBUILD_MONTHLY = """
+    INSERT INTO attendance_monthly (month, student_id, days_present)
+    SELECT CAST(strftime('%Y%m', day + 2440587.5) AS INTEGER), student_id, COUNT(*) FROM {log} {hint}
+    WHERE day BETWEEN ? AND ? AND status = 1
+    GROUP BY 1, student_id
+    ON CONFLICT (month, student_id) DO UPDATE SET days_present = days_present + excluded.days_present
+"""
+REBUILD_TERM = """
+    INSERT INTO attendance_term (term_id, student_id, days_present)
+    SELECT ?, student_id, COUNT(*) FROM {log}
+    WHERE day BETWEEN ? AND ? AND status = 1 GROUP BY student_id
+    ON CONFLICT (term_id, student_id) DO UPDATE SET days_present = days_present + excluded.days_present
+"""
+OVERLAPPING_TERMS = "SELECT id, first_day, last_day FROM terms WHERE first_day <= ? AND last_day >= ?"
+
+
+class AttendanceSummary(Row):
+    __slots__ = ("student_name", "days_present", "school_days")
+
+    @property
+    def percent(self):
+        return 100.0 * self.days_present / self.school_days if self.school_days else 0.0
+
+
+def month_number(month):
+    # "YYYY-MM" -> yyyymm
+    return int(month[:4] + month[5:7])
+
+
+def month_days(first_month, last_month):
+    # Day numbers of the first day of first_month and the last of last_month
+    year, month = int(last_month[:4]), int(last_month[5:7])
+    last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+    return repositories.day_number(first_month + "-01"), repositories.day_number(last.isoformat())
+
+
+def _report(sql, params, first_day, last_day):
+    with db.connection() as conn:
+        school_days = conn.execute(SCHOOL_DAYS, (first_day, last_day)).fetchone()[0]
+        return [AttendanceSummary(name, present, school_days)
+                for name, present in conn.execute(sql, params)]
+
+
+def month_report(first_month, last_month=None):
+    # Per-student totals over whole months, "YYYY-MM" to "YYYY-MM"
+    last_month = last_month or first_month
+    return _report(MONTH_REPORT, (month_number(first_month), month_number(last_month)),
+                   *month_days(first_month, last_month))
+
+
+def term_report(term):
+    # term is a repositories.Term
+    return _report(TERM_REPORT, (term.id,), repositories.day_number(term.start_date),
+                   repositories.day_number(term.end_date))
+
+
+def rebuild(start=None, end=None):
+    # Recompute the rollups for the months covering start..end (YYYY-MM-DD;
+    # a missing end runs to the latest attendance, a missing start from the
+    # earliest, neither is everything) and every term overlapping them, in
+    # one transaction, reading archived terms from their archive files.
+    # Returns the rows written per table.
+    if start or end:
+        first_day = month_days(start[:7], start[:7])[0] if start else attendance_archive.FIRST_DAY
+        last_day = month_days(end[:7], end[:7])[1] if end else attendance_archive.LAST_DAY
+        hint = ""
+    else:
+        first_day, last_day = attendance_archive.FIRST_DAY, attendance_archive.LAST_DAY
+        hint = "NOT INDEXED"
+    months = (month_number(repositories.day_date(first_day)), month_number(repositories.day_date(last_day)))
+    with db.connection() as conn:
+        terms = conn.execute(OVERLAPPING_TERMS, (last_day, first_day)).fetchall()
+    # Terms overlapping the range are recomputed whole, so read their days too
+    span = (min([first_day] + [term[1] for term in terms]), max([last_day] + [term[2] for term in terms]))
+    counts = collections.Counter()
+    with attendance_archive.attached_logs(*span) as parts, db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(DELETE_DAILY, (first_day, last_day))
+        conn.execute(DELETE_MONTHLY, months)
+        conn.execute(DELETE_TERMS.format(terms=", ".join("?" * len(terms))),
+                     [term_id for term_id, _, _ in terms])
+        for log, part_first, part_last in parts:
+            if part_first <= last_day and part_last >= first_day:
+                days = (max(first_day, part_first), min(last_day, part_last))
+                counts["attendance_daily"] += conn.execute(
+                    REBUILD_DAILY.format(log=log, hint=hint), days).rowcount
+                counts["attendance_monthly"] += conn.execute(
+                    REBUILD_MONTHLY.format(log=log, hint=hint), days).rowcount
+            for term_id, term_first, term_last in terms:
+                if term_first <= part_last and term_last >= part_first:
+                    counts["attendance_term"] += conn.execute(REBUILD_TERM.format(log=log), (
+                        term_id, max(term_first, part_first), min(term_last, part_last))).rowcount
+    return dict(counts)
+
+
+def write_report(rows, out):
+    writer = csv.writer(out)
+    writer.writerow(["student_name", "days_present", "school_days", "percent"])
+    for row in rows:
+        writer.writerow([row.student_name, row.days_present, row.school_days, f"{row.percent:.1f}"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attendance rollups and reports")
+    parser.add_argument("--db", default=db.DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_cmd = commands.add_parser("rebuild", help="recompute rollups from attendance")
+    rebuild_cmd.add_argument("--from", dest="start", help="first date, YYYY-MM-DD (default: the earliest)")
+    rebuild_cmd.add_argument("--to", dest="end", help="last date, YYYY-MM-DD (default: the latest)")
+
+    report_cmd = commands.add_parser("report", help="per-student attendance percentages")
+    report_cmd.add_argument("--term", help="term name")
+    report_cmd.add_argument("--from", dest="start", help="first month, YYYY-MM")
+    report_cmd.add_argument("--to", dest="end", help="last month, YYYY-MM")
+    report_cmd.add_argument("--out", help="CSV file (default: stdout)")
+
+    term_cmd = commands.add_parser("add-term", help="define a term (fills its rollup)")
+    term_cmd.add_argument("name")
+    term_cmd.add_argument("start", help="YYYY-MM-DD")
+    term_cmd.add_argument("end", help="YYYY-MM-DD")
+
+    args = parser.parse_args(argv)
+    db.set_database(args.db)
+    db.init_db()
+    started = time.perf_counter()
+
+    if args.command == "rebuild":
+        for table, count in rebuild(args.start, args.end).items():
+            print(f"{table:20} {count:>10,} rows")
+        print(f"Rebuilt in {time.perf_counter() - started:.2f}s")
+    elif args.command == "add-term":
+        repositories.terms.add(args.name, args.start, args.end)
+        print(f"Added term {args.name} ({args.start} to {args.end})")
+    else:
+        if args.term:
+            term = repositories.terms.by_name(args.term)
+            if term is None:
+                parser.error(f"Unknown term: {args.term}")
+            rows = term_report(term)
+        elif args.start:
+            rows = month_report(args.start, args.end)
+        else:
+            parser.error("report needs --term or --from")
+        elapsed = time.perf_counter() - started
+        if args.out:
+            with open(args.out, "w", newline="", encoding="utf-8") as f:
+                write_report(rows, f)
+        else:
+            write_report(rows, sys.stdout)
+        print(f"{len(rows)} students in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
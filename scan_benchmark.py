@@ -0,0 +1,100 @@
+# scan_benchmark.py
+# Sustained scan throughput of the group-commit ingestor (scan_ingest.py).
+# Several producer threads play the gate readers, each submitting scans as
+# fast as the ingestor accepts them; a scan counts once its commit is
+# acknowledged. --baseline also times the old path: one INSERT and one
+# durable COMMIT per scan.
+#
+# Usage: python scan_benchmark.py [--db scans.db] [--scans 20000] [--producers 8]
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import db
+import repositories
+import scan_ingest
+
+
+def run_ingestor(scans, producers, max_batch, max_delay_ms, queue_size):
+    ingestor = scan_ingest.ScanIngestor(max_batch, max_delay_ms, queue_size).start()
+    base = datetime.datetime(2025, 6, 2, 7, 30)
+
+    def producer(index):
+        futures = [ingestor.submit(f"Student {i}", base + datetime.timedelta(milliseconds=i))
+                   for i in range(index, scans, producers)]
+        for future in futures:
+            future.result()
+
+    threads = [threading.Thread(target=producer, args=(n,)) for n in range(producers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    ingestor.stop()
+    return elapsed, ingestor.snapshot()
+
+
+def run_baseline(scans):
+    # One transaction per scan, as BiometricModule used to do
+    with db.connection() as conn:
+        conn.execute("PRAGMA synchronous = FULL")
+    base = datetime.datetime(2025, 6, 3, 7, 30)
+    start = time.perf_counter()
+    for i in range(scans):
+        when = base + datetime.timedelta(milliseconds=i)
+        repositories.attendance.add(f"Student {i}", when.strftime("%Y-%m-%d"),
+                                    when.strftime("%H:%M:%S"), "Present")
+    elapsed = time.perf_counter() - start
+    with db.connection() as conn:
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure sustained scan ingestion throughput")
+    parser.add_argument("--db", help="database to write to (default: a fresh temporary file)")
+    parser.add_argument("--scans", type=int, default=20000)
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=scan_ingest.MAX_BATCH)
+    parser.add_argument("--delay-ms", type=float, default=scan_ingest.MAX_DELAY_MS)
+    parser.add_argument("--queue", type=int, default=scan_ingest.QUEUE_SIZE)
+    parser.add_argument("--baseline", type=int, nargs="?", const=500, default=0,
+                        help="also time N scans with one commit each (default 500)")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "scans.db")
+    db.set_database(path)
+    db.init_db()
+
+    elapsed, stats = run_ingestor(args.scans, args.producers, args.batch, args.delay_ms, args.queue)
+    print(f"group commit: {args.scans} scans from {args.producers} producers in {elapsed:.2f}s"
+          f" = {args.scans / elapsed:,.0f} scans/s")
+    print(f"  batches {stats['batches']}, mean batch {stats['committed'] / max(stats['batches'], 1):.1f},"
+          f" max batch {stats['max_batch']}, max queue depth {stats['max_queue']},"
+          f" suppressed {stats['suppressed']}")
+    print(f"  submit-to-commit latency p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms,"
+          f" max {stats['max_ms']:.1f} ms")
+
+    if args.baseline:
+        elapsed = run_baseline(args.baseline)
+        print(f"commit per scan: {args.baseline} scans in {elapsed:.2f}s"
+              f" = {args.baseline / elapsed:,.0f} scans/s")
+
+    db.close_pool()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# scan_ingest.py
+# High-throughput attendance scan ingestion. Scans are queued in memory and
+# a single writer thread inserts them in group commits: one transaction for
+# up to MAX_BATCH scans or MAX_DELAY_MS of waiting, whichever comes first.
+# The writer's connection runs with synchronous=FULL, and a scan's Future
+# only resolves after the COMMIT that contains it, so an acknowledged scan
+# is on disk. A bounded queue gives callers backpressure when the writer
+# falls behind.
+#
+# Repeat taps are debounced: a student's first scan of the day is kept and
+# later ones are suppressed (their Future resolves to None) and counted in
+# scan_suppressions. Within DEBOUNCE_WINDOW_S of the first scan the
+# in-memory cache rejects them without touching the database; after that
+# the unique (student_id, day) index does.
+import collections
+import datetime
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import db
+import repositories
+
+MAX_BATCH = 256
+MAX_DELAY_MS = 20
+QUEUE_SIZE = 10000
+LATENCY_SAMPLES = 10000     # recent submit-to-commit times kept for stats
+DEBOUNCE_WINDOW_S = 15 * 60
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Scan:
+    __slots__ = ("student_name", "date", "time", "status", "future", "queued_at")
+
+    def __init__(self, student_name, date, time_, status):
+        self.student_name = student_name
+        self.date = date
+        self.time = time_
+        self.status = status
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class DebounceCache:
+    # (student, date) keys of recent scans. Every entry lives for the same
+    # window, so insertion order is expiry order and expiring only ever
+    # looks at the oldest entries.
+    def __init__(self, window):
+        self.window = window
+        self.entries = collections.OrderedDict()
+
+    def seen(self, key, now):
+        # True for a repeat within the window; otherwise remembers the key
+        while self.entries:
+            oldest, expires = next(iter(self.entries.items()))
+            if expires > now:
+                break
+            del self.entries[oldest]
+        if key in self.entries:
+            return True
+        if self.window > 0:
+            self.entries[key] = now + self.window
+        return False
+
+    def forget(self, key):
+        self.entries.pop(key, None)
+
+
+class ScanIngestor:
+    def __init__(self, max_batch=MAX_BATCH, max_delay_ms=MAX_DELAY_MS, queue_size=QUEUE_SIZE,
+                 debounce_window=DEBOUNCE_WINDOW_S):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.debounce = DebounceCache(debounce_window)
+        self._suppressed = collections.Counter()     # per date, not yet saved
+        self._student_ids = {}      # name -> students.id, used by the writer only
+        self.stats = {"accepted": 0, "committed": 0, "suppressed": 0, "batches": 0,
+                      "rejected": 0, "failed": 0, "max_batch": 0, "max_queue": 0}
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self):
+        if self.thread is None:
+            self._stop.clear()
+            self.thread = threading.Thread(target=self._run, name="scan-writer", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        # Finishes everything already queued before returning
+        if self.thread is not None:
+            self._stop.set()
+            self.thread.join(timeout)
+            self.thread = None
+
+    def submit(self, student_name, when=None, status="Present", timeout=None):
+        # Returns a Future resolved with the attendance row id once durable,
+        # or with None for a repeat scan. Blocks up to timeout seconds when
+        # the queue is full (None = wait, 0 = fail at once) and then raises
+        # QueueFull.
+        if status not in repositories.AttendanceRepository.STATUS_CODES:
+            raise ValueError(f"Unknown attendance status: {status}")
+        when = when or datetime.datetime.now()
+        scan = Scan(student_name, when.strftime("%Y-%m-%d"), when.strftime("%H:%M:%S"), status)
+        key = (student_name, scan.date)
+        with self._lock:
+            if self.debounce.seen(key, scan.queued_at):
+                self.stats["suppressed"] += 1
+                self._suppressed[scan.date] += 1
+                scan.future.set_result(None)
+                return scan.future
+        try:
+            self.queue.put(scan, block=timeout != 0, timeout=timeout or None)
+        except queue.Full:
+            with self._lock:
+                self.debounce.forget(key)
+                self.stats["rejected"] += 1
+            raise QueueFull("Scan queue is full")
+        with self._lock:
+            self.stats["accepted"] += 1
+            self.stats["max_queue"] = max(self.stats["max_queue"], self.queue.qsize())
+        return scan.future
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            latencies = sorted(self.latencies)
+        if latencies:
+            stats["p50_ms"] = latencies[len(latencies) // 2] * 1000
+            stats["p99_ms"] = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000
+            stats["max_ms"] = latencies[-1] * 1000
+        stats["queued"] = self.queue.qsize()
+        return stats
+
+    # --- Writer thread ---
+
+    def _next_batch(self):
+        try:
+            first = self.queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0
+                             else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        with db.connection() as conn:
+            conn.execute("PRAGMA synchronous = FULL")
+        while True:
+            stopping = self._stop.is_set()
+            batch = self._next_batch()
+            if batch or self._suppressed:
+                self._write(batch)
+            elif stopping:
+                break
+
+    def _write(self, batch):
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, collections.Counter()
+        try:
+            ids = []
+            new_students = {}
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                for scan in batch:
+                    student_id = self._student_ids.get(scan.student_name)
+                    if student_id is None:
+                        student_id = new_students[scan.student_name] = \
+                            repositories.students.id_for(scan.student_name)
+                    cursor.execute(repositories.AttendanceRepository.INSERT_IF_NEW, (
+                        student_id, repositories.day_number(scan.date),
+                        repositories.seconds_of(scan.time),
+                        repositories.AttendanceRepository.STATUS_CODES[scan.status]))
+                    if cursor.rowcount:
+                        ids.append(cursor.lastrowid)
+                    else:
+                        ids.append(None)
+                        suppressed[scan.date] += 1
+                cursor.executemany(repositories.AttendanceRepository.RECORD_SUPPRESSED, (
+                    (repositories.day_number(date), count) for date, count in suppressed.items()))
+            # Only ids from a committed transaction are safe to remember
+            self._student_ids.update(new_students)
+        except Exception as e:
+            with self._lock:
+                self._suppressed.update(suppressed)
+                self.stats["failed"] += len(batch)
+                for scan in batch:
+                    self.debounce.forget((scan.student_name, scan.date))
+            for scan in batch:
+                scan.future.set_exception(e)
+            return
+
+        committed_at = time.perf_counter()
+        duplicates = ids.count(None)
+        with self._lock:
+            self.latencies.extend(committed_at - scan.queued_at for scan in batch)
+            self.stats["committed"] += len(batch) - duplicates
+            self.stats["suppressed"] += duplicates
+            if batch:
+                self.stats["batches"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for scan, row_id in zip(batch, ids):
+            scan.future.set_result(row_id)
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor():
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = ScanIngestor().start()
+        return _ingestor
+
+
+def shutdown():
+    global _ingestor
+    with _ingestor_lock:
+        ingestor, _ingestor = _ingestor, None
+    if ingestor is not None:
+        ingestor.stop()
@@ -0,0 +1,175 @@
+# scan_server.py
+# Network ingest for RFID gate readers. Readers send one JSON object per
+# line over TCP, or one per datagram over UDP:
+#
+#     {"seq": 17, "student": "Asha Rao", "time": "2025-06-02T07:41:09"}
+#
+# ("time" is optional and defaults to arrival time; "seq" is echoed back.)
+# Every scan goes through scan_ingest, the same debounced group-commit
+# path the attendance screen uses, and is answered once it is durable:
+#
+#     {"seq": 17, "status": "ok", "id": 123456}
+#
+# status is ok, duplicate (repeat tap), busy (queue full, retry later) or
+# error. TCP replies may arrive out of order when a reader pipelines scans.
+#
+# Usage: python scan_server.py [--host 0.0.0.0] [--port 7300] [--udp-port 7300] [--db school.db]
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import signal
+import socket
+import sys
+from collections import Counter
+
+import db
+import scan_ingest
+
+DEFAULT_PORT = 7300
+MAX_IN_FLIGHT = 1000        # unanswered scans per TCP connection before we stop reading
+MAX_LINE = 4096
+UDP_RECEIVE_BUFFER = 4 * 1024 * 1024    # absorbs bursts from many readers at once
+
+log = logging.getLogger("school.scan_server")
+
+
+class ScanServer:
+    def __init__(self, ingestor):
+        self.ingestor = ingestor
+        self.stats = Counter()
+        self.servers = []
+
+    async def handle(self, data):
+        # One scan event in, one reply dict out
+        seq = None
+        try:
+            event = json.loads(data)
+            seq = event.get("seq")
+            student = str(event["student"]).strip()
+            if not student:
+                raise ValueError("student is required")
+            when = datetime.datetime.fromisoformat(event["time"]) if event.get("time") else None
+            future = self.ingestor.submit(student, when, timeout=0)
+            row_id = await asyncio.wrap_future(future)
+        except scan_ingest.QueueFull:
+            reply = {"status": "busy"}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            reply = {"status": "error", "message": f"bad scan: {e}"}
+        except Exception as e:
+            log.exception("scan failed")
+            reply = {"status": "error", "message": str(e)}
+        else:
+            reply = {"status": "ok", "id": row_id} if row_id is not None else {"status": "duplicate"}
+        self.stats[reply["status"]] += 1
+        reply["seq"] = seq
+        return reply
+
+    async def handle_tcp(self, reader, writer):
+        self.stats["connections"] += 1
+        in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+        pending = set()
+
+        async def answer(line):
+            try:
+                reply = await self.handle(line)
+                writer.write(json.dumps(reply).encode() + b"\n")
+            finally:
+                in_flight.release()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await in_flight.acquire()
+                task = asyncio.ensure_future(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                if writer.transport.get_write_buffer_size() > 64 * 1024:
+                    await writer.drain()
+            if pending:
+                await asyncio.wait(pending)
+            await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            log.warning("reader connection dropped: %s", e)
+        finally:
+            writer.close()
+
+    async def start(self, host, port, udp_port=None):
+        loop = asyncio.get_running_loop()
+        self.servers.append(await asyncio.start_server(self.handle_tcp, host, port, limit=MAX_LINE))
+        if udp_port is not None:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(host, udp_port))
+            transport.get_extra_info("socket").setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER)
+            self.servers.append(transport)
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+        self.servers = []
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        asyncio.ensure_future(self._answer(data, addr))
+
+    async def _answer(self, data, addr):
+        reply = await self.server.handle(data)
+        self.transport.sendto(json.dumps(reply).encode(), addr)
+
+
+async def serve(host, port, udp_port=None):
+    ingestor = scan_ingest.get_ingestor()
+    server = ScanServer(ingestor)
+    await server.start(host, port, udp_port)
+    log.warning("listening on %s tcp/%d%s", host, port, f" udp/{udp_port}" if udp_port else "")
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except (NotImplementedError, AttributeError):
+            pass    # Windows: Ctrl+C still raises KeyboardInterrupt
+    try:
+        await stop.wait()
+    finally:
+        server.close()
+        log.warning("scans: %s", dict(server.stats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TCP/UDP ingest server for RFID readers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--udp-port", type=int, help="also accept scans over UDP")
+    parser.add_argument("--db", default=db.DB_PATH)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format="%(asctime)s %(message)s")
+    db.set_database(args.db)
+    db.init_db()
+    try:
+        asyncio.run(serve(args.host, args.port, args.udp_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Everything already acknowledged is committed; this drains the rest
+        scan_ingest.shutdown()
+        db.close_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# scan_simulator.py
+# Load generator for scan_server.py: many simulated gate readers tapping
+# cards at once, over TCP or UDP. Each reader keeps a window of scans in
+# flight and the simulator reports end-to-end latency (send until the
+# durable acknowledgement arrives) and sustained throughput.
+#
+# With --spawn the simulator starts its own server on a temporary database,
+# so a full load test needs nothing else:
+#
+# Usage: python scan_simulator.py --spawn --readers 50 --taps 20000 [--rate 2000] [--udp]
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import scan_server
+
+UDP_RETRY = 0.5
+UDP_TIMEOUT = 5.0
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+
+    def record(self, sent_at, reply):
+        self.latencies.append(time.perf_counter() - sent_at)
+        self.statuses[reply.get("status", "lost")] += 1
+
+
+def plan_taps(taps, readers, students, duplicates, seed):
+    # Card taps per reader; a fraction repeat an earlier student (double taps)
+    rnd = random.Random(seed)
+    per_reader = [[] for _ in range(readers)]
+    for n in range(taps):
+        student = n % students
+        if n and rnd.random() < duplicates:
+            student = rnd.randrange(min(n, students))
+        per_reader[n % readers].append(f"Sim Student {student:06d}")
+    return per_reader
+
+
+class Pacer:
+    # Spreads sends evenly over time for a target total rate (0 = flat out)
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = time.perf_counter()
+
+    async def wait(self):
+        if self.interval:
+            self.next_at += self.interval
+            delay = self.next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+async def tcp_reader(host, port, names, window, pacer, results):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = {}
+    slots = asyncio.Semaphore(window)
+
+    async def receive():
+        for _ in names:
+            line = await reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            results.record(sent.pop(reply["seq"]), reply)
+            slots.release()
+
+    receiver = None
+    for seq, name in enumerate(names):
+        await slots.acquire()
+        await pacer.wait()
+        sent[seq] = time.perf_counter()
+        writer.write(json.dumps({"seq": seq, "student": name}).encode() + b"\n")
+        if receiver is None:
+            receiver = asyncio.ensure_future(receive())
+        await writer.drain()
+    if receiver is not None:
+        await receiver
+    results.statuses["lost"] += len(sent)
+    writer.close()
+
+
+class _UdpClient(asyncio.DatagramProtocol):
+    def __init__(self, sent, results, slots):
+        self.sent = sent
+        self.results = results
+        self.slots = slots
+
+    def datagram_received(self, data, addr):
+        reply = json.loads(data)
+        pending = self.sent.pop(reply["seq"], None)
+        if pending is not None:
+            self.results.record(pending[0], reply)
+            self.slots.release()
+
+
+async def udp_reader(host, port, names, window, pacer, results):
+    # Datagrams can be dropped, so unanswered scans are resent after
+    # UDP_RETRY seconds; a resend of a scan that was in fact stored comes
+    # back as a duplicate, which is just as good an acknowledgement.
+    loop = asyncio.get_running_loop()
+    sent = {}       # seq -> [first sent at, last sent at, payload]
+    slots = asyncio.Semaphore(window)
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UdpClient(sent, results, slots), remote_addr=(host, port))
+
+    async def resend():
+        while True:
+            await asyncio.sleep(UDP_RETRY / 4)
+            now = time.perf_counter()
+            for pending in list(sent.values()):
+                if now - pending[1] >= UDP_RETRY:
+                    pending[1] = now
+                    results.statuses["resent"] += 1
+                    transport.sendto(pending[2])
+
+    resender = asyncio.ensure_future(resend())
+    for seq, name in enumerate(names):
+        try:
+            await asyncio.wait_for(slots.acquire(), UDP_TIMEOUT)
+        except asyncio.TimeoutError:
+            break
+        await pacer.wait()
+        payload = json.dumps({"seq": seq, "student": name}).encode()
+        now = time.perf_counter()
+        sent[seq] = [now, now, payload]
+        transport.sendto(payload)
+    deadline = time.perf_counter() + UDP_TIMEOUT
+    while sent and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    resender.cancel()
+    results.statuses["lost"] += len(sent)
+    transport.close()
+
+
+async def simulate(host, port, plan, window, rate, udp):
+    results = Results()
+    pacer = Pacer(rate)
+    run_reader = udp_reader if udp else tcp_reader
+    start = time.perf_counter()
+    await asyncio.gather(*(run_reader(host, port, names, window, pacer, results) for names in plan))
+    return results, time.perf_counter() - start
+
+
+def spawn_server(host, port, udp, path):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scan_server.py"),
+               "--host", host, "--port", str(port), "--db", path]
+    if udp:
+        command += ["--udp-port", str(port)]
+    process = subprocess.Popen(command)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("scan server did not start")
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate RFID readers against scan_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=scan_server.DEFAULT_PORT)
+    parser.add_argument("--udp", action="store_true", help="send datagrams instead of TCP lines")
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--taps", type=int, default=20000)
+    parser.add_argument("--students", type=int, help="distinct cards (default: one per tap)")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="fraction of repeat taps")
+    parser.add_argument("--rate", type=float, default=0, help="total taps per second (0 = max)")
+    parser.add_argument("--window", type=int, default=32, help="unanswered scans per reader")
+    parser.add_argument("--spawn", action="store_true", help="start a server on a temporary database")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    plan = plan_taps(args.taps, args.readers, args.students or args.taps, args.duplicates, args.seed)
+    server = tmpdir = None
+    if args.spawn:
+        tmpdir = tempfile.TemporaryDirectory()
+        server = spawn_server(args.host, args.port, args.udp, os.path.join(tmpdir.name, "scans.db"))
+    try:
+        results, elapsed = asyncio.run(
+            simulate(args.host, args.port, plan, args.window, args.rate, args.udp))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            server.wait(30)
+            tmpdir.cleanup()
+
+    answered = sorted(results.latencies)
+    print(f"{args.readers} {'UDP' if args.udp else 'TCP'} readers, {args.taps} taps in {elapsed:.2f}s"
+          f" = {len(answered) / elapsed:,.0f} acknowledged scans/s")
+    print("  " + ", ".join(f"{status} {count}" for status, count in sorted(results.statuses.items())))
+    # Latency runs from the first send, so it includes any UDP resends
+    if answered:
+        print(f"  latency p50 {statistics.median(answered) * 1000:.1f} ms,"
+              f" p95 {percentile(answered, 0.95) * 1000:.1f} ms,"
+              f" p99 {percentile(answered, 0.99) * 1000:.1f} ms,"
+              f" max {answered[-1] * 1000:.1f} ms")
+    return 0 if not results.statuses["lost"] and not results.statuses["error"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
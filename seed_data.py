@@ -0,0 +1,259 @@
+# seed_data.py
+# Deterministic synthetic data for all tables, at a configurable scale.
+# The same arguments (and seed) always produce the same database, so
+# benchmark runs are comparable between versions.
+#
+# Usage: python seed_data.py bench.db --students 5000 --years 3 --books 50000 --staff 500
+import argparse
+import datetime
+import math
+import os
+import random
+import sys
+import time
+
+import bus_assignment
+import db
+import isbn
+import repositories
+import stops
+
+CHUNK = 50000
+SEED_CACHE_KB = 256 * 1024
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Ayaan",
+    "Krishna", "Ishaan", "Ananya", "Diya", "Aadhya", "Saanvi", "Pari", "Myra",
+    "Anika", "Navya", "Kiara", "Riya", "Rahul", "Priya", "Neha", "Rohan",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Gupta", "Singh", "Kumar", "Patel", "Reddy", "Nair",
+    "Iyer", "Das", "Joshi", "Mehta", "Rao", "Khan", "Pillai", "Bose",
+]
+ROLES = ["Teacher", "Teacher", "Teacher", "Clerk", "Librarian", "Driver", "Warden", "Accountant"]
+WORDS = [
+    "River", "Shadow", "Garden", "Science", "History", "Stars", "Ocean", "Mountain",
+    "Secret", "Journey", "Light", "Modern", "Physics", "Poems", "Tales", "Atlas",
+]
+ITEMS = ["Chair", "Desk", "Projector", "Whiteboard", "Laptop", "Microscope", "Football", "Fan"]
+LOCATIONS = ["Store Room", "Lab 1", "Lab 2", "Library", "Staff Room", "Gym"]
+TOWN_CENTRE = (12.9716, 77.5946)
+STOPS_PER_ROUTE = 12
+AREAS = ["Northgate", "Riverside", "Hillview", "Old Town", "Lakeside", "Market", "Station", "Westend"]
+
+
+class Scale:
+    def __init__(self, students=5000, years=3, books=50000, staff=500, buses=None,
+                 hostels=4, rooms_per_hostel=50, inventory=2000, assignments=1000,
+                 issues=None, end_date="2025-06-30", seed=42):
+        self.students = students
+        self.years = years
+        self.books = books
+        self.staff = staff
+        self.buses = buses if buses is not None else max(1, students // 50)
+        self.hostels = hostels
+        self.rooms_per_hostel = rooms_per_hostel
+        self.inventory = inventory
+        self.assignments = assignments
+        self.issues = issues if issues is not None else books // 2
+        self.end_date = datetime.date.fromisoformat(end_date)
+        self.seed = seed
+
+    def as_dict(self):
+        d = dict(vars(self))
+        d["end_date"] = self.end_date.isoformat()
+        return d
+
+
+def student_names(count):
+    names = []
+    for i in range(count):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        names.append(f"{first} {last} {i + 1:05d}")
+    return names
+
+
+def school_days(scale):
+    start = scale.end_date - datetime.timedelta(days=365 * scale.years)
+    day = start
+    while day <= scale.end_date:
+        if day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _insert(conn, sql, rows):
+    # Chunked executemany so generators are never materialized
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = [row for _, row in zip(range(CHUNK), rows)]
+        if not chunk:
+            return total
+        conn.executemany(sql, chunk)
+        conn.commit()
+        total += len(chunk)
+
+
+def seed(scale, log=print):
+    rnd = random.Random(scale.seed)
+    names = student_names(scale.students)
+    days = list(school_days(scale))
+    counts = {}
+
+    with db.connection() as conn:
+        # A large page cache keeps the attendance indexes in memory while loading
+        conn.execute(f"PRAGMA cache_size = -{SEED_CACHE_KB}")
+
+        def fill(table, sql, rows):
+            started = time.perf_counter()
+            counts[table] = _insert(conn, sql, rows)
+            log(f"{table:22} {counts[table]:>10,} rows  {time.perf_counter() - started:6.2f}s")
+
+        fill("books", repositories.BookRepository.INSERT, (
+            (f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i + 1}",
+             f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}",
+             f"978{i:09d}" + isbn.isbn13_check_digit(f"978{i:09d}"), rnd.randint(1, 10))
+            for i in range(scale.books)))
+
+        fill("issues", """
+            INSERT INTO issues (book_id, student_name, issue_date, return_date)
+            VALUES (?, ?, ?, ?)
+        """, (
+            (book_id, rnd.choice(names), issued.isoformat(),
+             (issued + datetime.timedelta(days=14)).isoformat())
+            for book_id, issued in (
+                (rnd.randint(1, scale.books), rnd.choice(days)) for _ in range(scale.issues))))
+
+        fill("staff", repositories.StaffRepository.INSERT, (
+            (f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} S{i + 1:04d}",
+             rnd.choice(ROLES), float(rnd.randrange(15000, 90000, 500)))
+            for i in range(scale.staff)))
+
+        months = sorted({day.replace(day=1) for day in days})
+        fill("payroll", "INSERT INTO payroll (staff_id, pay_date, amount) VALUES (?, ?, ?)", (
+            (staff_id, month.isoformat(), float(rnd.randrange(15000, 90000, 500)))
+            for month in months for staff_id in range(1, scale.staff + 1)))
+
+        fill("leaves", "INSERT INTO leaves (staff_id, leave_date, reason) VALUES (?, ?, ?)", (
+            (rnd.randint(1, scale.staff), rnd.choice(days).isoformat(),
+             rnd.choice(["Sick", "Personal", "Training"]))
+            for _ in range(scale.staff * 8 * scale.years)))
+
+        fill("routes", repositories.RouteRepository.INSERT, (
+            (f"Route {i + 1}", rnd.randint(6, 8) * 60 + rnd.choice([0, 15, 30, 45]))
+            for i in range(scale.buses)))
+
+        # Each route serves three of the areas and each bus runs one route
+        areas = [f"{AREAS[i % len(AREAS)]} {i // len(AREAS) + 1}"
+                 for i in range(max(1, scale.buses * 2 // 5))]
+        fill("route_areas", repositories.RouteRepository.INSERT_AREA, (
+            (i + 1, area) for i in range(scale.buses)
+            for area in dict.fromkeys([areas[i % len(areas)], areas[(i * 7 + 3) % len(areas)],
+                                       areas[(i * 13 + 5) % len(areas)]])))
+
+        fill("buses", repositories.BusRepository.INSERT, (
+            (f"KA-{i + 1:02d}-{rnd.randint(1000, 9999)}", rnd.choice(FIRST_NAMES),
+             rnd.choice([32, 40, 48, 52]), i + 1)
+            for i in range(scale.buses)))
+
+        # Each route's stops wander out from near the town centre, 200-600 m apart
+        def route_stops(route_id):
+            metre = math.degrees(1 / stops.EARTH_RADIUS_M)
+            lat = TOWN_CENTRE[0] + rnd.uniform(-3000, 3000) * metre
+            lon = TOWN_CENTRE[1] + rnd.uniform(-3000, 3000) * metre
+            heading = rnd.uniform(0, 2 * math.pi)
+            for n in range(STOPS_PER_ROUTE):
+                heading += rnd.uniform(-0.6, 0.6)
+                step = rnd.uniform(200, 600)
+                lat += step * math.cos(heading) * metre
+                lon += step * math.sin(heading) * metre / math.cos(math.radians(lat))
+                yield route_id, f"Stop {route_id}.{n + 1}", round(lat, 6), round(lon, 6), n + 1
+
+        fill("route_stops", stops.INSERT,
+             (stop for i in range(scale.buses) for stop in route_stops(i + 1)))
+
+        riders = names[: scale.students * 6 // 10]
+        fill("transport_riders", repositories.RiderRepository.INSERT,
+             ((name, rnd.choice(areas)) for name in riders))
+
+        started = time.perf_counter()
+        plan = bus_assignment.assign()
+        counts["transport_assignment"] = len(plan.seats)
+        log(f"{'transport_assignment':22} {len(plan.seats):>10,} rows  {time.perf_counter() - started:6.2f}s")
+
+        fill("hostels", repositories.HostelRepository.INSERT,
+             ((f"Hostel {chr(65 + i % 26)}{i // 26 or ''}",) for i in range(scale.hostels)))
+
+        fill("rooms", repositories.RoomRepository.INSERT, (
+            (h + 1, f"{h + 1}{r + 1:03d}", rnd.choice([2, 3, 4]))
+            for h in range(scale.hostels) for r in range(scale.rooms_per_hostel)))
+
+        room_count = scale.hostels * scale.rooms_per_hostel
+        boarders = names[-min(len(names), room_count * 2):]
+        fill("hostel_allocation", "INSERT INTO hostel_allocation (student_name, room_id) VALUES (?, ?)",
+             ((name, i // 2 + 1) for i, name in enumerate(boarders)))
+
+        fill("inventory_items", repositories.InventoryRepository.INSERT, (
+            (f"{rnd.choice(ITEMS)} #{i + 1}", rnd.randint(0, 200), rnd.choice(LOCATIONS))
+            for i in range(scale.inventory)))
+
+        fill("assignments", repositories.AssignmentRepository.INSERT, (
+            (f"{rnd.choice(WORDS)} worksheet {i + 1}", "Complete all questions.", "",
+             rnd.choice(days).isoformat())
+            for i in range(scale.assignments)))
+
+        # Two terms per academic year (June-November, December-May)
+        first_year = days[0].year if days[0].month >= 6 else days[0].year - 1
+        fill("terms", repositories.TermRepository.INSERT, (
+            term for year in range(first_year, scale.end_date.year + 1) for term in (
+                (f"{year}-{(year + 1) % 100:02d} Term 1", f"{year}-06-01", f"{year}-11-30"),
+                (f"{year}-{(year + 1) % 100:02d} Term 2", f"{year}-12-01", f"{year + 1}-05-31"))))
+
+        fill("students", repositories.StudentRepository.INSERT, ((name,) for name in names))
+
+        # Roughly 92% of students present on each school day, arriving 7:30-8:30
+        present = repositories.AttendanceRepository.STATUS_CODES["Present"]
+        fill("attendance_log", repositories.AttendanceRepository.INSERT, (
+            (student_id, repositories.day_number(day.isoformat()), 7 * 3600 + rnd.randrange(1800, 5400), present)
+            for day in days for student_id in range(1, len(names) + 1) if rnd.random() < 0.92))
+
+        conn.execute(f"PRAGMA cache_size = -{db.CACHE_SIZE_KB}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic school data")
+    parser.add_argument("path", help="database file to create")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--books", type=int, default=50000)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--buses", type=int)
+    parser.add_argument("--end-date", default="2025-06-30")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.path):
+        if not args.force:
+            parser.error(f"{args.path} already exists (use --force to overwrite)")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+
+    scale = Scale(students=args.students, years=args.years, books=args.books, staff=args.staff,
+                  buses=args.buses, end_date=args.end_date, seed=args.seed)
+    db.set_database(args.path)
+    db.init_db()
+    started = time.perf_counter()
+    seed(scale)
+    with db.connection() as conn:
+        conn.execute("ANALYZE")
+    print(f"Seeded {args.path} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# sql_stats_panel.py
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import QTimer
+import db
+import instrumentation
+
+TOP_N = 25
+COLUMNS = [
+    ("Calls", "calls"), ("Total ms", "total_ms"), ("Mean ms", "mean_ms"),
+    ("p95 ms", "p95_ms"), ("Max ms", "max_ms"), ("Rows", "rows"), ("Slow", "slow"),
+    ("Call site", "call_sites"), ("SQL", "sql"),
+]
+
+
+class SqlStatsPanel(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("SQL Statistics")
+        self.setMinimumSize(500, 500)
+
+        layout = QVBoxLayout()
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Top statements by total time
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(QLabel("🐢 Top statements by total time:"))
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        buttons.addWidget(refresh_btn)
+        reset_btn = QPushButton("Reset Counters")
+        reset_btn.clicked.connect(self.reset)
+        buttons.addWidget(reset_btn)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(2000)
+        self.refresh()
+
+    def refresh(self):
+        pool = db.pool_stats()
+        if instrumentation.enabled:
+            status = f"Instrumentation on, slow-query threshold {instrumentation.slow_ms:g} ms."
+        else:
+            status = "Instrumentation is off. Start the app with SCHOOL_DB_TRACE=1 to collect statistics."
+        self.status_label.setText(
+            f"{status}\nConnection pool: {pool['hits']} hits, {pool['misses']} misses, {pool['open']} open.")
+
+        rows = instrumentation.snapshot(TOP_N)
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, (_, key) in enumerate(COLUMNS):
+                value = row[key]
+                if key == "call_sites":
+                    value = ", ".join(site for site, _ in value)
+                self.table.setItem(r, c, QTableWidgetItem(str(value)))
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
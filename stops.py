@@ -0,0 +1,96 @@
+# stops.py
+# Route stops and "which stop is near here" lookups, worked out locally
+# with no map service. Each stop has a latitude and longitude in degrees.
+# route_stops_rtree, an R*Tree kept in step with route_stops by triggers,
+# indexes stops as points, so a lookup reads only the stops in a small box
+# instead of all of them.
+#
+#   within(lat, lon, radius_m): the box around the circle comes from the
+#     R*Tree, and exact (haversine) distances then drop the corners.
+#   nearest(lat, lon, count): within() on a growing radius until it finds
+#     count stops. Stops found within radius r are certainly nearer than
+#     any stop outside it, so the first radius with enough answers is
+#     exact.
+#
+# Stops are imported in bulk with importer.py (entity "stops").
+import math
+
+import db
+from repositories import Row
+
+EARTH_RADIUS_M = 6371000.0
+FIRST_RADIUS_M = 250.0
+MAX_RADIUS_M = 50000.0
+
+INSERT = "INSERT INTO route_stops (route_id, stop_name, lat, lon, sequence) VALUES (?, ?, ?, ?, ?)"
+SELECT_IN_BOX = """
+    SELECT s.id, s.route_id, r.route_name, s.stop_name, s.lat, s.lon
+    FROM route_stops_rtree t
+    JOIN route_stops s ON s.id = t.id
+    JOIN routes r ON r.id = s.route_id
+    WHERE t.max_lat >= ? AND t.min_lat <= ? AND t.max_lon >= ? AND t.min_lon <= ?
+"""
+
+
+class Stop(Row):
+    __slots__ = ("id", "route_id", "route_name", "stop_name", "lat", "lon", "distance")
+
+
+def latitude(value):
+    # Importer/form check; raises ValueError
+    lat = float(value)
+    if not -90 <= lat <= 90:
+        raise ValueError(f"latitude {lat} is out of range")
+    return lat
+
+
+def longitude(value):
+    lon = float(value)
+    if not -180 <= lon <= 180:
+        raise ValueError(f"longitude {lon} is out of range")
+    return lon
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    # Haversine, in metres
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _box(lat, lon, radius_m):
+    # (min lat, max lat, min lon, max lon) around the circle
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def add(route_id, stop_name, lat, lon, sequence=None):
+    with db.connection() as conn:
+        return conn.execute(INSERT, (route_id, stop_name, latitude(lat), longitude(lon), sequence)).lastrowid
+
+
+def within(lat, lon, radius_m, limit=None):
+    # Stops no more than radius_m away, nearest first
+    min_lat, max_lat, min_lon, max_lon = _box(lat, lon, radius_m)
+    with db.connection() as conn:
+        rows = conn.execute(SELECT_IN_BOX, (min_lat, max_lat, min_lon, max_lon)).fetchall()
+    found = []
+    for row in rows:
+        distance = distance_m(lat, lon, row[4], row[5])
+        if distance <= radius_m:
+            found.append(Stop(*row, distance))
+    found.sort(key=lambda stop: (stop.distance, stop.id))
+    return found[:limit] if limit is not None else found
+
+
+def nearest(lat, lon, count=1, max_radius_m=MAX_RADIUS_M):
+    # The count nearest stops, nearest first; fewer if there are not that
+    # many within max_radius_m
+    radius = min(FIRST_RADIUS_M, max_radius_m)
+    while True:
+        found = within(lat, lon, radius)
+        if len(found) >= count or radius >= max_radius_m:
+            return found[:count]
+        radius = min(radius * 2, max_radius_m)
@@ -0,0 +1,114 @@
+# stops_benchmark.py
+# Stop lookups on a synthetic town. Routes wander out from the centre as
+# chains of stops a few hundred metres apart. The stops are written to a
+# CSV file and loaded with the bulk importer, then random points around
+# town are looked up: the nearest stop, the five nearest, and every stop
+# within 500 m. A sample of the nearest-stop answers is checked against a
+# brute-force search over all stops.
+#
+# Usage: python stops_benchmark.py [--db stops.db] [--routes 300] [--stops 20000] [--queries 5000]
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+import db
+import importer
+import repositories
+import stops
+
+CENTRE = (12.9716, 77.5946)
+TOWN_RADIUS_M = 15000
+CHECKED = 200
+
+
+def write_stops(path, routes, count, rnd):
+    # Each route is a walk from near the centre; stops 200-600 m apart
+    per_route = max(1, count // routes)
+    metre = math.degrees(1 / stops.EARTH_RADIUS_M)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["route", "stop_name", "lat", "lon", "sequence"])
+        for route in range(routes):
+            lat = CENTRE[0] + rnd.uniform(-3000, 3000) * metre
+            lon = CENTRE[1] + rnd.uniform(-3000, 3000) * metre
+            heading = rnd.uniform(0, 2 * math.pi)
+            for n in range(per_route):
+                heading += rnd.uniform(-0.6, 0.6)
+                step = rnd.uniform(200, 600)
+                lat += step * math.cos(heading) * metre
+                lon += step * math.sin(heading) * metre / math.cos(math.radians(lat))
+                writer.writerow([f"Route {route + 1}", f"Stop {route + 1}.{n + 1}", f"{lat:.6f}", f"{lon:.6f}", n + 1])
+    return per_route * routes
+
+
+def random_point(rnd):
+    metre = math.degrees(1 / stops.EARTH_RADIUS_M)
+    distance = TOWN_RADIUS_M * math.sqrt(rnd.random())
+    angle = rnd.uniform(0, 2 * math.pi)
+    lat = CENTRE[0] + distance * math.cos(angle) * metre
+    return lat, CENTRE[1] + distance * math.sin(angle) * metre / math.cos(math.radians(lat))
+
+
+def measure(label, fn, points):
+    times = []
+    results = 0
+    for lat, lon in points:
+        started = time.perf_counter()
+        results += len(fn(lat, lon))
+        times.append(time.perf_counter() - started)
+    times.sort()
+    print(f"{label:22} p50 {times[len(times) // 2] * 1e6:7.0f} us   p99 {times[len(times) * 99 // 100] * 1e6:7.0f} us"
+          f"   {results / len(points):.1f} stops per answer")
+
+
+def brute_force(all_stops, lat, lon):
+    return min(all_stops, key=lambda stop: (stops.distance_m(lat, lon, stop[1], stop[2]), stop[0]))[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure nearest-stop and radius lookups")
+    parser.add_argument("--db", help="database to write to (default: a fresh temporary file)")
+    parser.add_argument("--routes", type=int, default=300)
+    parser.add_argument("--stops", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    tmpdir = tempfile.TemporaryDirectory()
+    path = args.db or os.path.join(tmpdir.name, "stops.db")
+    db.set_database(path)
+    db.init_db()
+    with db.connection() as conn:
+        conn.executemany(repositories.RouteRepository.INSERT,
+                         ((f"Route {n + 1}", None) for n in range(args.routes)))
+
+    csv_path = os.path.join(tmpdir.name, "stops.csv")
+    written = write_stops(csv_path, args.routes, args.stops, rnd)
+    result = importer.import_file("stops", csv_path)
+    print(f"Imported {result.imported} of {written} stops in {result.elapsed:.2f}s"
+          f" ({result.imported / result.elapsed:,.0f} rows/s), {len(result.rejected)} rejected")
+
+    points = [random_point(rnd) for _ in range(args.queries)]
+    measure("nearest stop", stops.nearest, points)
+    measure("5 nearest stops", lambda lat, lon: stops.nearest(lat, lon, 5), points)
+    measure("stops within 500 m", lambda lat, lon: stops.within(lat, lon, 500), points)
+
+    with db.connection() as conn:
+        all_stops = conn.execute("SELECT id, lat, lon FROM route_stops").fetchall()
+    wrong = sum(1 for lat, lon in points[:CHECKED]
+                if stops.nearest(lat, lon)[0].id != brute_force(all_stops, lat, lon))
+    print(f"  nearest stop checked against brute force for {CHECKED} points: {'OK' if not wrong else f'{wrong} WRONG'}")
+
+    db.close_pool()
+    tmpdir.cleanup()
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# tasks.py
+# Background database work for the Qt widgets. submit() runs a function on
+# a QThreadPool worker (each worker has its own pooled SQLite connection)
+# and delivers the result back on the UI thread through signals. Tasks
+# belong to an owner widget; cancel(owner) drops their results and
+# interrupts any query still running, e.g. when the user switches modules.
+# Writes (submit(..., write=True)) are never interrupted: they finish and
+# still report, and a callback that finds its widget gone falls back to a
+# notification for errors.
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, Qt, pyqtSignal
+import db
+import notifications
+
+MAX_THREADS = 4
+
+_pool = None
+_tasks = {}     # owner -> set of CancelToken
+
+
+def thread_pool():
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(MAX_THREADS)
+    return _pool
+
+
+class TaskSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(object)
+    done = pyqtSignal()     # always sent last, even for a cancelled task
+
+
+class CancelToken:
+    def __init__(self, signals, write=False):
+        self.signals = signals
+        self.write = write
+        self.cancelled = False
+        self.detached = False   # a write whose owner was cancelled
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._connection is not None:
+                self._connection.interrupt()
+
+    def report(self, value):
+        # Called from the worker; delivered to on_progress on the UI thread
+        if not self.cancelled:
+            self.signals.progress.emit(value)
+
+    def _attach(self, conn):
+        with self._lock:
+            self._connection = conn
+
+
+class DbTask(QRunnable):
+    def __init__(self, fn, args, kwargs, token):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = token
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self.token.signals.done.emit()
+
+    def _run(self):
+        token = self.token
+        if token.cancelled:
+            return
+        _release_on_exit()
+        token._attach(db.get_pool().acquire())
+        try:
+            value = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not token.cancelled:
+                token.signals.error.emit(str(e))
+            return
+        finally:
+            token._attach(None)
+        if not token.cancelled:
+            token.signals.result.emit(value)
+
+
+def _release_on_exit():
+    # Pool threads left idle past their expiry end, and a later thread can
+    # get the same id; close the connection as the thread finishes. The
+    # QThread object outlives its runs, so it is hooked only once.
+    thread = QThread.currentThread()
+    if not thread.property("releases_db"):
+        thread.setProperty("releases_db", True)
+        thread.finished.connect(db.release_thread, Qt.DirectConnection)
+
+
+def show_error(owner, message):
+    # Non-modal, so a burst of failures does not stack up dialogs
+    notifications.error(f"Database error: {message}")
+
+
+def submit(owner, fn, *args, on_result=None, on_error=None, on_progress=None,
+           pass_token=False, write=False, **kwargs):
+    # Run fn(*args, **kwargs) off the UI thread; with pass_token=True it also
+    # receives token= so it can report progress or check for cancellation.
+    # write=True for work that changes data, which cancel() must not lose.
+    # Parented, so the garbage collector never deletes the signals object
+    # (possibly from a worker thread) while its signals are queued; it is
+    # deleted on the UI thread once the worker is done with it.
+    signals = TaskSignals(thread_pool())
+    token = CancelToken(signals, write)
+    if pass_token:
+        kwargs["token"] = token
+    owned = _tasks.setdefault(owner, set())
+    owned.add(token)
+
+    def finished():
+        owned.discard(token)
+        if not owned and _tasks.get(owner) is owned:
+            del _tasks[owner]
+
+    def deliver(value):
+        finished()
+        if not token.cancelled and on_result is not None:
+            try:
+                on_result(value)
+            except RuntimeError:
+                if not token.detached:
+                    raise   # widget already deleted is only expected after cancel()
+
+    def fail(message):
+        finished()
+        if token.cancelled:
+            return
+        try:
+            (on_error or (lambda m: show_error(owner, m)))(message)
+        except RuntimeError:
+            if not token.detached:
+                raise
+            show_error(owner, message)
+
+    signals.result.connect(deliver)
+    signals.error.connect(fail)
+    signals.done.connect(signals.deleteLater)
+    if on_progress is not None:
+        signals.progress.connect(lambda value: token.cancelled or on_progress(value))
+
+    thread_pool().start(DbTask(fn, args, kwargs, token))
+    return token
+
+
+def cancel(owner):
+    # Reads are dropped and interrupted; writes run on and still report
+    for token in _tasks.pop(owner, ()):
+        if token.write:
+            token.detached = True
+        else:
+            token.cancel()
+
+
+def pending(owner):
+    return len(_tasks.get(owner, ()))
+
+
+def wait_all(msecs=-1):
+    # Used at shutdown so workers finish before the pool closes connections
+    return thread_pool().waitForDone(msecs)
@@ -0,0 +1,91 @@
+# test_attendance_archive.py
+# Archiving a term's attendance and restoring it must leave the rollups
+# where a full rebuild would put them, including when scans arrive for the
+# archived days in between.
+#
+# Usage: python -m pytest test_attendance_archive.py
+import os
+
+import pytest
+
+import attendance_archive
+import db
+import repositories
+import rollups
+
+ROLLUPS = {
+    "daily": "SELECT day, present FROM attendance_daily ORDER BY 1",
+    "monthly": "SELECT month, student_id, days_present FROM attendance_monthly ORDER BY 1, 2",
+    "term": "SELECT term_id, student_id, days_present FROM attendance_term ORDER BY 1, 2",
+    "suppressed": "SELECT day, suppressed FROM scan_suppressions ORDER BY 1",
+}
+
+
+@pytest.fixture
+def term(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    term_id = repositories.terms.add("Spring 2024", "2024-01-01", "2024-03-31")
+    for name, date, time, status in [
+            ("Ann", "2024-01-08", "08:01:00", "Present"), ("Ann", "2024-01-09", "08:03:00", "Present"),
+            ("Bob", "2024-01-08", "08:10:00", "Present"), ("Bob", "2024-02-01", "08:00:00", "Absent"),
+            ("Cid", "2024-03-29", "07:55:00", "Present"), ("Ann", "2024-04-02", "08:00:00", "Present")]:
+        repositories.attendance.add(name, date, time, status)
+    yield repositories.terms.by_name("Spring 2024")
+    db.close_pool()
+
+
+def snapshot():
+    with db.connection() as conn:
+        return {name: conn.execute(sql).fetchall() for name, sql in ROLLUPS.items()}
+
+
+def rebuilt():
+    rollups.rebuild()
+    return snapshot()
+
+
+def log_rows():
+    with db.connection() as conn:
+        return conn.execute("SELECT student_id, day, seconds, status FROM attendance_log ORDER BY 1, 2").fetchall()
+
+
+def test_archive_and_restore_round_trip(term):
+    before, rows = snapshot(), log_rows()
+    assert attendance_archive.archive_term(term) == 5
+    assert snapshot() == before
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM attendance_log").fetchone()[0] == 1
+    assert rebuilt() == before
+
+    assert attendance_archive.restore_term(term) == 5
+    assert log_rows() == rows
+    assert snapshot() == before == rebuilt()
+    assert not os.listdir(os.path.join(os.path.dirname(db.DB_PATH), attendance_archive.ARCHIVE_DIR))
+
+
+def test_scans_for_archived_days_do_not_double_count_after_restore(term):
+    attendance_archive.archive_term(term)
+    # Ann again on an archived day, later than her archived scan; Bob earlier
+    # than his archived scan; Dee new
+    repositories.attendance.add("Ann", "2024-01-08", "09:30:00", "Present")
+    repositories.attendance.add("Bob", "2024-01-08", "07:50:00", "Late")
+    repositories.attendance.add("Dee", "2024-01-08", "08:20:00", "Present")
+
+    attendance_archive.restore_term(term)
+    with db.connection() as conn:
+        kept = conn.execute("SELECT student_name, time, status FROM attendance "
+                            "WHERE date = '2024-01-08' ORDER BY student_name").fetchall()
+    assert kept == [("Ann", "08:01:00", "Present"), ("Bob", "07:50:00", "Late"), ("Dee", "08:20:00", "Present")]
+    after = snapshot()
+    assert after == rebuilt()
+    assert after["suppressed"] == [(repositories.day_number("2024-01-08"), 2)]
+    assert after["daily"][0] == (repositories.day_number("2024-01-08"), 2)
+
+
+def test_archiving_again_sweeps_in_later_scans(term):
+    attendance_archive.archive_term(term)
+    repositories.attendance.add("Dee", "2024-02-05", "08:20:00", "Present")
+    before = snapshot()
+    assert attendance_archive.archive_term(term) == 6
+    assert snapshot() == before == rebuilt()
@@ -0,0 +1,91 @@
+# test_batch_desk.py
+# The library desk's scan queue (DeskBatch) against lookups loaded from a
+# small catalogue, and the batch commit through circulation.py.
+#
+# Usage: python -m pytest test_batch_desk.py
+import pytest
+
+import batch_desk
+import db
+import repositories
+
+EMMA = "9780141439587"
+PERSUASION = "9780141439686"
+
+
+@pytest.fixture
+def desk(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    repositories.books.add("Emma", "Austen", EMMA, 1)
+    repositories.books.add("Persuasion", "Austen", PERSUASION, 2)
+    repositories.students.id_for("Ann Lee")
+    with db.connection() as conn:
+        # Bob has borrowed before but has no student row
+        conn.execute("INSERT INTO issues (book_id, student_name, issue_date, return_date) "
+                     "VALUES (2, 'Bob Ray', '2024-01-02', '2024-01-09')")
+    yield batch_desk.DeskBatch(batch_desk.Lookups())
+    db.close_pool()
+
+
+def test_card_then_books_queues_issues(desk):
+    ann_id = repositories.students.id_for("Ann Lee")
+    assert desk.scan(str(ann_id)) == (None, "Borrower: Ann Lee")
+    item, _ = desk.scan("978-0-14-143958-7")
+    assert (item.mode, item.book.title, item.student_name) == (batch_desk.ISSUE, "Emma", "Ann Lee")
+    assert desk.lookups.books[EMMA].available == 0
+    with pytest.raises(ValueError, match="No copies of 'Emma' left"):
+        desk.scan(EMMA)
+    assert len(desk.queue) == 1
+
+
+def test_borrower_known_only_from_issues(desk):
+    assert desk.scan("bob ray") == (None, "Borrower: Bob Ray")
+
+
+def test_book_before_card_and_unknown_codes_are_refused(desk):
+    with pytest.raises(ValueError, match="card first"):
+        desk.scan(EMMA)
+    with pytest.raises(ValueError, match="Unknown student card or ISBN"):
+        desk.scan("nobody")
+    with pytest.raises(ValueError, match="No book with ISBN 9780141439556"):
+        desk.scan("0141439556")
+    with pytest.raises(ValueError, match="Empty scan"):
+        desk.scan("  ")
+
+
+def test_return_needs_an_open_loan(desk):
+    desk.scan("Ann Lee")
+    desk.mode = batch_desk.RETURN
+    with pytest.raises(ValueError, match="no open loan"):
+        desk.scan(EMMA)
+    desk.mode = batch_desk.ISSUE
+    desk.scan(EMMA)
+    desk.mode = batch_desk.RETURN
+    item, _ = desk.scan(EMMA)
+    assert item.mode == batch_desk.RETURN
+    assert desk.lookups.books[EMMA].available == 1
+    assert desk.lookups.open_loans[(item.book.id, "Ann Lee")] == 0
+
+
+def test_failed_item_is_undone(desk):
+    desk.scan("Ann Lee")
+    item, _ = desk.scan(PERSUASION)
+    desk.failed(item)
+    assert desk.lookups.books[PERSUASION].available == 2
+    assert desk.lookups.open_loans[(item.book.id, "Ann Lee")] == 0
+
+
+def test_commit_saves_the_batch_and_fails_only_refused_items(desk):
+    desk.scan("Ann Lee")
+    desk.scan(EMMA)
+    desk.scan(PERSUASION)
+    # Another desk takes the last Emma first
+    with db.connection() as conn:
+        conn.execute("UPDATE books SET available_count = 0 WHERE isbn = ?", (EMMA,))
+    items = batch_desk.commit(desk.take())
+    assert [item.status for item in items] == [batch_desk.FAILED, batch_desk.DONE]
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM issues WHERE student_name = 'Ann Lee' "
+                            "AND return_date IS NULL").fetchone() == (1,)
+        assert conn.execute("SELECT available_count FROM books WHERE isbn = ?", (PERSUASION,)).fetchone() == (1,)
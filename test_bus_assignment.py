@@ -0,0 +1,98 @@
+# test_bus_assignment.py
+# Placing transport riders on buses: seats are never overfilled, riders
+# only ride buses whose route serves their area, and assign() reports and
+# saves just the seats that changed.
+#
+# Usage: python -m pytest test_bus_assignment.py
+import pytest
+
+import bus_assignment
+import db
+import repositories
+
+
+def test_no_bus_takes_more_riders_than_seats():
+    riders = [(f"s{i}", "North", None) for i in range(5)]
+    plan = bus_assignment.solve(riders, [(1, 10, 2), (2, 10, 1), (3, 10, 0)], [(10, "North")])
+    assert (plan.load[1], plan.load[2], plan.load[3]) == (2, 1, 0)
+    assert len(plan.seats) == 3
+    assert len(plan.unplaced) == 2
+
+
+def test_riders_only_ride_buses_serving_their_area():
+    riders = [("Ann", "north", None), ("Bob", "South", None), ("Cid", "East", None)]
+    plan = bus_assignment.solve(riders, [(1, 10, 5), (2, 20, 5)], [(10, "North"), (20, "South")])
+    assert plan.seats == {"Ann": 1, "Bob": 2}
+    assert plan.unplaced == ["Cid"]
+
+
+def test_a_full_area_is_freed_by_moving_riders_who_can_go_elsewhere():
+    # Bus 1 serves both areas; Ann takes it first, so the second Y rider
+    # only gets a seat if Ann moves on to bus 2
+    riders = [("Ann", "X", None), ("Bob", "Y", None), ("Cid", "Y", None)]
+    plan = bus_assignment.solve(riders, [(1, 10, 1), (2, 20, 1), (3, 30, 1)],
+                                [(10, "X"), (10, "Y"), (20, "X"), (30, "Y")])
+    assert not plan.unplaced
+    assert plan.seats["Ann"] == 2
+    assert sorted((plan.seats["Bob"], plan.seats["Cid"])) == [1, 3]
+
+
+def test_seats_held_by_others_are_counted():
+    plan = bus_assignment.solve([("Ann", "North", None)], [(1, 10, 2)], [(10, "North")], taken={1: 2})
+    assert plan.unplaced == ["Ann"]
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    repositories.routes.add("North", "7:30", ["North"])
+    repositories.routes.add("South", "7:45", ["South"])
+    yield
+    db.close_pool()
+
+
+def seats():
+    with db.connection() as conn:
+        return dict(conn.execute("SELECT student_name, bus_id FROM transport_assignment").fetchall())
+
+
+def test_assign_saves_only_changed_seats(database):
+    north = repositories.buses.add("N1", "Dee", 2, "North")
+    south = repositories.buses.add("S1", "Eve", 1, "South")
+    for name, area in [("Ann", "North"), ("Bob", "North"), ("Cid", "South"), ("Dan", "South")]:
+        repositories.riders.add(name, area)
+    with db.connection() as conn:
+        # Ann already has a good seat, Bob is on the wrong route's bus
+        conn.executemany("INSERT INTO transport_assignment (student_name, bus_id) VALUES (?, ?)",
+                         [("Ann", north), ("Bob", south)])
+
+    plan = bus_assignment.assign()
+    assert plan.kept == 1
+    assert plan.changed == 2            # Bob moves, one South rider is seated
+    assert plan.removed == 0
+    assert len(plan.unplaced) == 1      # one bus seat for two South riders
+    saved = seats()
+    assert (saved["Ann"], saved["Bob"]) == (north, north)
+    assert list(saved.values()).count(south) == 1
+    assert plan.unplaced[0] not in saved
+
+
+def test_assign_removes_seats_it_cannot_keep(database):
+    bus = repositories.buses.add("N1", "Dee", 1, "North")
+    repositories.riders.add("Ann", "North")
+    repositories.riders.add("Bob", "South")
+    with db.connection() as conn:
+        conn.execute("INSERT INTO transport_assignment (student_name, bus_id) VALUES ('Bob', ?)", (bus,))
+
+    plan = bus_assignment.assign()
+    assert (plan.changed, plan.removed, plan.unplaced) == (1, 1, ["Bob"])
+    assert seats() == {"Ann": bus}
+
+
+def test_dry_run_saves_nothing(database):
+    repositories.buses.add("N1", "Dee", 2, "North")
+    repositories.riders.add("Ann", "North")
+    plan = bus_assignment.assign(dry_run=True)
+    assert plan.changed == 1
+    assert seats() == {}
@@ -0,0 +1,82 @@
+# test_circulation.py
+# Issuing and returning copies: the last copy can only go out once, a copy
+# that is not out cannot come back, and available_count always equals the
+# quantity less the open issues.
+#
+# Usage: python -m pytest test_circulation.py
+import pytest
+
+import circulation
+import db
+import repositories
+
+OPEN_ISSUES = ("SELECT b.quantity - (SELECT COUNT(*) FROM issues i WHERE i.book_id = b.id AND i.return_date IS NULL), "
+               "b.available_count FROM books b")
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    yield
+    db.close_pool()
+
+
+def in_step():
+    with db.connection() as conn:
+        return all(expected == available for expected, available in conn.execute(OPEN_ISSUES))
+
+
+def test_the_last_copy_goes_out_once(database):
+    book = repositories.books.add("Emma", "Austen", "0-14-143958-0", 1)
+    circulation.issue(book, "Ann", today="2024-03-01")
+    with pytest.raises(circulation.NotAvailable):
+        circulation.issue(book, "Bob", today="2024-03-01")
+    assert repositories.books.get(book).available_count == 0
+    assert circulation.open_loans("Bob") == []
+    assert in_step()
+
+
+def test_an_unknown_book_is_not_available(database):
+    with pytest.raises(circulation.NotAvailable, match="No book with id 99"):
+        circulation.issue(99, "Ann")
+
+
+def test_a_return_needs_an_open_loan(database):
+    book = repositories.books.add("Emma", "Austen", "0-14-143958-0", 2)
+    with pytest.raises(circulation.NotIssued):
+        circulation.return_copy(book, "Ann", today="2024-03-02")
+    issue = circulation.issue(book, "Ann", today="2024-03-01")
+    circulation.return_issue(issue, today="2024-03-02")
+    with pytest.raises(circulation.NotIssued):
+        circulation.return_issue(issue, today="2024-03-03")
+    with pytest.raises(circulation.NotIssued):
+        circulation.return_copy(book, "Bob", today="2024-03-03")
+    assert repositories.books.get(book).available_count == 2
+    assert in_step()
+
+
+def test_a_refused_batch_changes_nothing(database):
+    # A refused issue inside a batch rolls the whole batch back
+    book = repositories.books.add("Emma", "Austen", "0-14-143958-0", 1)
+    with pytest.raises(circulation.NotAvailable):
+        with db.connection():
+            circulation.issue(book, "Ann", today="2024-03-01")
+            circulation.issue(book, "Bob", today="2024-03-01")
+    assert repositories.books.get(book).available_count == 1
+    assert circulation.open_loans("Ann") == []
+    assert in_step()
+
+
+def test_available_count_follows_quantity(database):
+    book = repositories.books.add("Emma", "Austen", "0-14-143958-0", 2)
+    first = circulation.issue(book, "Ann", today="2024-03-01")
+    circulation.issue_isbn("9780141439587", "Bob", today="2024-03-01")
+    assert in_step()
+    # More copies catalogued while two are out
+    repositories.books.add("Emma", "Austen", "0141439580", 3)
+    assert (repositories.books.get(book).quantity, repositories.books.get(book).available_count) == (5, 3)
+    circulation.return_issue(first, today="2024-03-05")
+    circulation.return_isbn("978-0-14-143958-7", "Bob", today="2024-03-06")
+    assert repositories.books.get(book).available_count == 5
+    assert in_step()
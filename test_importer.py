@@ -0,0 +1,107 @@
+# test_importer.py
+# Bulk import from CSV and JSONL: bad rows are rejected with their line and
+# reason while the good ones go in, route names are resolved once a batch,
+# and a batch the database refuses is retried row by row.
+#
+# Usage: python -m pytest test_importer.py
+import pytest
+
+import db
+import importer
+import repositories
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    yield tmp_path
+    db.close_pool()
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def rows(sql):
+    with db.connection() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_csv_bad_rows_are_reported_and_the_rest_imported(database):
+    path = write(database / "items.csv", "name,quantity,location\n"
+                                         "Chairs,30,Hall\n"
+                                         ",5,Store\n"
+                                         "Desks,2.7,Room 1\n"
+                                         "Lamps,four,\n"
+                                         "Pens,200,\n")
+    result = importer.import_file("inventory", path)
+    assert result.imported == 2
+    assert [(line, reason) for line, reason, _ in result.rejected] == [
+        (3, "name is required"), (4, "quantity must be a whole number"), (5, "quantity must be a whole number")]
+    assert rows("SELECT name, quantity, location FROM inventory_items ORDER BY id") == [
+        ("Chairs", 30, "Hall"), ("Pens", 200, "")]
+
+
+def test_jsonl_numbers_are_not_truncated(database):
+    path = write(database / "books.jsonl", '{"title": "Emma", "quantity": 2}\n'
+                                           '{"title": "Persuasion", "quantity": 2.7}\n'
+                                           '{"title": "Sanditon", "quantity": 3.0}\n'
+                                           '{"title": "Lady Susan", "quantity": true}\n'
+                                           '{"title": "Northanger Abbey", "quantity": -1}\n')
+    result = importer.import_file("books", path)
+    assert [line for line, _, _ in result.rejected] == [2, 4, 5]
+    assert {reason for _, reason, _ in result.rejected} == {"quantity must be a whole number, 0 or more"}
+    assert rows("SELECT title, quantity FROM books ORDER BY id") == [("Emma", 2), ("Sanditon", 3)]
+
+
+def test_jsonl_malformed_lines_are_rejected(database):
+    path = write(database / "riders.jsonl", '{"student_name": "Ann", "area": "North"}\n'
+                                            '{"student_name": "Bob", "area": \n'
+                                            '\n'
+                                            '["Cid", "South"]\n'
+                                            '{"student_name": "Dee", "area": "South"}\n')
+    result = importer.import_file("riders", path)
+    assert result.imported == 2
+    assert result.rejected == [(2, "Malformed row", '{"student_name": "Bob", "area":'),
+                               (4, "Malformed row", '["Cid", "South"]')]
+
+
+def test_route_names_are_looked_up_once_a_batch(database, monkeypatch):
+    north = repositories.routes.add("North", "7:30")
+    south = repositories.routes.add("South", "7:45")
+    lookups = []
+    route = next(field for field in importer.ENTITIES["buses"][1] if field.name == "route")
+    monkeypatch.setattr(route, "lookup", lambda names: lookups.append(names) or repositories.routes.ids_of(names))
+    path = write(database / "buses.csv", "bus_number,capacity,route\n"
+                                         "B1,40,North\n"
+                                         "B2,0, South \n"
+                                         "B3,20,East\n"
+                                         "B4,,\n"
+                                         "B5,30,North\n")
+    result = importer.import_file("buses", path, batch_size=3)
+    assert lookups == [{"North", "South", "East"}, {"North"}]
+    assert [(line, reason) for line, reason, _ in result.rejected] == [(4, "route is not a known route")]
+    assert rows("SELECT bus_number, capacity, route_id FROM buses ORDER BY id") == [
+        ("B1", 40, north), ("B2", 0, south), ("B4", 40, None), ("B5", 30, north)]
+
+
+def test_a_refused_batch_keeps_its_good_rows(database):
+    # A rule only the database knows about
+    with db.connection() as conn:
+        conn.execute("CREATE TRIGGER no_broken BEFORE INSERT ON inventory_items WHEN NEW.name = 'Broken' "
+                     "BEGIN SELECT RAISE(ABORT, 'broken items are not stocked'); END")
+    path = write(database / "items.csv", "name,quantity\nChairs,30\nBroken,1\nDesks,4\n")
+    result = importer.import_file("inventory", path)
+    assert result.imported == 2
+    assert result.rejected == [(3, "broken items are not stocked", {"name": "Broken", "quantity": "1"})]
+    assert rows("SELECT name FROM inventory_items ORDER BY id") == [("Chairs",), ("Desks",)]
+
+
+def test_rejects_report(database, tmp_path):
+    result = importer.ImportResult()
+    result.rejected = [(2, "name is required", {"name": "", "quantity": "1"}), (3, "Malformed row", "{oops")]
+    importer.write_rejects(result, str(tmp_path / "rejects.csv"))
+    assert (tmp_path / "rejects.csv").read_text(encoding="utf-8").splitlines() == [
+        "line,reason,row", '2,name is required,"{""name"": """", ""quantity"": ""1""}"', "3,Malformed row,{oops"]
@@ -0,0 +1,52 @@
+# test_isbn.py
+# ISBN normalization: check digits, separators, ISBN-10 to ISBN-13.
+#
+# Usage: python -m pytest test_isbn.py
+import pytest
+
+import isbn
+
+
+@pytest.mark.parametrize("text", [
+    "9780141439556", "978-0-14-143955-6", "978 0141 439556", " 978-0141439556 ",
+    "0141439556", "0-14-143955-6", "0 14 143955 6",
+])
+def test_forms_of_one_isbn_normalize_alike(text):
+    assert isbn.normalize(text) == "9780141439556"
+
+
+def test_isbn10_check_digit_x():
+    assert isbn.normalize("0-8044-2957-X") == "9780804429573"
+    assert isbn.normalize("080442957x") == "9780804429573"
+
+
+def test_isbn13_with_979_prefix():
+    assert isbn.normalize("979-10-90636-07-1") == "9791090636071"
+
+
+def test_isbn13_check_digit():
+    assert isbn.isbn13_check_digit("978014143955") == "6"
+    assert isbn.isbn13_check_digit("979109063607") == "1"
+
+
+@pytest.mark.parametrize("text", [
+    "0-14-143955-2",        # wrong ISBN-10 check digit
+    "9780141439557",        # wrong ISBN-13 check digit
+    "9770141439556",        # not a 978/979 prefix
+    "014143955X6", "12345", "abcdefghij",
+])
+def test_invalid_isbns_are_refused(text):
+    with pytest.raises(ValueError):
+        isbn.normalize(text)
+
+
+def test_blank_means_no_isbn():
+    assert isbn.normalize("") == ""
+    assert isbn.normalize(None) == ""
+    assert isbn.normalize(" - ") == ""
+
+
+def test_canonical_keeps_invalid_codes_comparable():
+    assert isbn.canonical("0-14-143955-6") == "9780141439556"
+    assert isbn.canonical("12-34 5x") == "12345X"
+    assert isbn.canonical("") == ""
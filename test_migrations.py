@@ -0,0 +1,101 @@
+# test_migrations.py
+# Upgrades of databases holding legacy rows: each test builds the schema
+# as it was before a migration, fills it the way old versions of the app
+# could, then migrates to the latest version and checks nothing was lost.
+#
+# Usage: python -m pytest test_migrations.py
+import sqlite3
+
+import pytest
+
+import migrations
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    yield conn
+    conn.close()
+
+
+def upgrade(conn, before):
+    # Schema as it was just before migration `before`, then the test's
+    # legacy rows are inserted by the caller and the rest applied
+    migrations.migrate(conn, before - 1)
+    return lambda: migrations.migrate(conn)
+
+
+def test_pickup_times_that_are_not_times_are_kept(conn):
+    finish = upgrade(conn, 12)
+    conn.executemany("INSERT INTO routes (id, route_name, pickup_time) VALUES (?, ?, ?)", [
+        (1, "North", "7:30 AM"), (2, "South", "after assembly"), (3, "East", ""), (4, "West", None)])
+    conn.commit()
+    finish()
+    assert conn.execute("SELECT id, pickup_minutes FROM routes ORDER BY id").fetchall() == [
+        (1, 450), (2, None), (3, None), (4, None)]
+    assert conn.execute("SELECT route_id, pickup_time FROM route_pickup_quarantine").fetchall() == [
+        (2, "after assembly")]
+
+
+def test_duplicate_isbns_are_merged(conn):
+    finish = upgrade(conn, 8)
+    conn.executemany("INSERT INTO books (id, title, isbn, quantity) VALUES (?, ?, ?, ?)", [
+        (1, "Emma", "0-14-143958-0", 2),
+        (2, "Emma (copy)", "9780141439587", 3),
+        (3, "Emma again", "978 0141 439587", None),
+        (4, "Persuasion", "978-0141439686", 1),
+        (5, "No code", "", 4),
+        (6, "No code either", None, 1)])
+    conn.executemany("INSERT INTO issues (book_id, student_name, issue_date) VALUES (?, ?, ?)", [
+        (1, "Ann", "2024-01-02"), (2, "Bob", "2024-01-03"), (3, "Cid", "2024-01-04"), (4, "Dee", "2024-01-05")])
+    conn.commit()
+    finish()
+    assert conn.execute("SELECT id, isbn, quantity FROM books ORDER BY id").fetchall() == [
+        (1, "9780141439587", 5), (4, "9780141439686", 1), (5, None, 4), (6, None, 1)]
+    assert conn.execute("SELECT student_name, book_id FROM issues ORDER BY id").fetchall() == [
+        ("Ann", 1), ("Bob", 1), ("Cid", 1), ("Dee", 4)]
+
+
+def test_compact_attendance_keeps_rows_and_rollups(conn):
+    finish = upgrade(conn, 6)
+    conn.executemany("INSERT INTO attendance (id, student_name, date, time, status) VALUES (?, ?, ?, ?, ?)", [
+        (1, "Ann", "2024-01-08", "08:01:00", "Present"), (2, "Bob", "2024-01-08", "8:10", "Late"),
+        (3, "Ann", "2024-01-09", "07:59:30", "Present"), (4, "Cid", "2024-02-01", "08:00:00", "Absent")])
+    conn.commit()
+    finish()
+    assert conn.execute("SELECT id, student_name, date, time, status FROM attendance ORDER BY id").fetchall() == [
+        (1, "Ann", "2024-01-08", "08:01:00", "Present"), (2, "Bob", "2024-01-08", "08:10:00", "Late"),
+        (3, "Ann", "2024-01-09", "07:59:30", "Present"), (4, "Cid", "2024-02-01", "08:00:00", "Absent")]
+    assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'attendance'").fetchone() == ("view",)
+    ann = conn.execute("SELECT id FROM students WHERE name = 'Ann'").fetchone()[0]
+    assert conn.execute("SELECT month, student_id, days_present FROM attendance_monthly").fetchall() == [
+        (202401, ann, 2)]
+
+
+def test_attendance_view_writes_through_to_the_log(conn):
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO attendance (student_name, date, time, status) "
+                 "VALUES ('Eve', '2024-05-06', '08:15:00', 'Present')")
+    row_id = conn.execute("SELECT id FROM attendance WHERE student_name = 'Eve'").fetchone()[0]
+    assert conn.execute("SELECT seconds, status FROM attendance_log WHERE id = ?", (row_id,)).fetchone() == (
+        8 * 3600 + 15 * 60, 1)
+    assert conn.execute("SELECT present FROM attendance_daily").fetchall() == [(1,)]
+
+    conn.execute("UPDATE attendance SET status = 'Absent', time = '09:00:00' WHERE id = ?", (row_id,))
+    assert conn.execute("SELECT time, status FROM attendance").fetchall() == [("09:00:00", "Absent")]
+    assert conn.execute("SELECT COUNT(*) FROM attendance_daily").fetchone() == (0,)
+
+    conn.execute("DELETE FROM attendance WHERE id = ?", (row_id,))
+    assert conn.execute("SELECT COUNT(*) FROM attendance_log").fetchone() == (0,)
+
+
+def test_older_transport_assignments_are_set_aside(conn):
+    finish = upgrade(conn, 11)
+    conn.executemany("INSERT INTO transport_assignment (id, student_name, bus_id) VALUES (?, ?, ?)", [
+        (1, "Ann", 1), (2, "Bob", 1), (3, "Ann", 2), (4, "Ann", 3)])
+    conn.commit()
+    finish()
+    assert conn.execute("SELECT id, student_name, bus_id FROM transport_assignment ORDER BY id").fetchall() == [
+        (2, "Bob", 1), (4, "Ann", 3)]
+    assert conn.execute("SELECT id, bus_id, kept_id FROM transport_assignment_superseded ORDER BY id").fetchall() == [
+        (1, 1, 4), (3, 2, 4)]
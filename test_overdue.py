@@ -0,0 +1,88 @@
+# test_overdue.py
+# The overdue job: one fine per late loan however often it runs, fines
+# that follow the days overdue until the copy comes back, and a watermark
+# that only moves when the run's fines are saved with it.
+#
+# Usage: python -m pytest test_overdue.py
+import sqlite3
+
+import pytest
+
+import circulation
+import db
+import overdue
+import repositories
+
+
+@pytest.fixture
+def book(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    yield repositories.books.add("Emma", "Austen", "0-14-143958-0", 3)
+    db.close_pool()
+
+
+def fines():
+    with db.connection() as conn:
+        return conn.execute("SELECT student_name, days_overdue, amount, open FROM fines ORDER BY issue_id").fetchall()
+
+
+def watermark():
+    with db.connection() as conn:
+        row = conn.execute(overdue.GET_WATERMARK, (overdue.JOB,)).fetchone()
+    return row and row[0]
+
+
+def test_rerunning_on_the_same_day_adds_nothing(book):
+    circulation.issue(book, "Ann", today="2024-03-01")          # due 2024-03-15
+    assert overdue.run("2024-03-20") == (1, 0)
+    assert overdue.run("2024-03-20") == (0, 0)
+    assert fines() == [("Ann", 5, 5 * overdue.FINE_PER_DAY, 1)]
+    # The next day's run brings the fine up to date, still as one row
+    assert overdue.run("2024-03-21") == (0, 1)
+    assert fines() == [("Ann", 6, 6 * overdue.FINE_PER_DAY, 1)]
+
+
+def test_loans_falling_due_later_are_picked_up(book):
+    circulation.issue(book, "Ann", today="2024-03-01")
+    overdue.run("2024-03-10")
+    assert fines() == []
+    circulation.issue(book, "Bob", today="2024-03-05")          # due 2024-03-19
+    assert overdue.run("2024-03-20") == (2, 0)
+    assert [(name, days) for name, days, _, _ in fines()] == [("Ann", 5), ("Bob", 1)]
+
+
+def test_a_flagged_loan_returned_late_is_settled(book):
+    issue = circulation.issue(book, "Ann", today="2024-03-01")
+    overdue.run("2024-03-20")
+    circulation.return_issue(issue, today="2024-03-22")
+    assert fines() == [("Ann", 7, 7 * overdue.FINE_PER_DAY, 0)]
+    # A settled fine no longer grows
+    assert overdue.run("2024-04-30") == (0, 0)
+    assert fines() == [("Ann", 7, 7 * overdue.FINE_PER_DAY, 0)]
+
+
+def test_a_late_return_the_job_has_not_seen_is_fined(book):
+    issue = circulation.issue(book, "Ann", today="2024-03-01")
+    circulation.return_issue(issue, today="2024-03-18")
+    assert fines() == [("Ann", 3, 3 * overdue.FINE_PER_DAY, 0)]
+    assert overdue.run("2024-03-20") == (0, 0)
+
+
+def test_the_fine_is_capped(book):
+    circulation.issue(book, "Ann", today="2024-01-01")
+    overdue.run("2024-12-31")
+    assert fines()[0][2] == overdue.MAX_FINE
+
+
+def test_watermark_only_moves_with_a_saved_run(book, monkeypatch):
+    circulation.issue(book, "Ann", today="2024-03-01")
+    monkeypatch.setattr(overdue, "REFRESH_OPEN", "UPDATE no_such_table SET x = 1")
+    with pytest.raises(sqlite3.OperationalError):
+        overdue.run("2024-03-20")
+    assert watermark() is None
+    assert fines() == []
+
+    monkeypatch.undo()
+    assert overdue.run("2024-03-20") == (1, 0)
+    assert watermark() == "2024-03-19"
@@ -0,0 +1,31 @@
+# test_query_plans.py
+# The query_plans.py check as a test: every listed query, planned against a
+# freshly migrated database, must use an index for every table it reads
+# except the ones it names as allowed to be scanned.
+#
+# Usage: python -m pytest test_query_plans.py
+import pytest
+
+import db
+import query_plans
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    db.set_database(str(tmp_path_factory.mktemp("plans") / "plans.db"))
+    db.init_db()
+    with db.connection() as conn:
+        yield conn
+    db.close_pool()
+
+
+@pytest.mark.parametrize("query", query_plans.QUERIES, ids=lambda query: query[0])
+def test_no_full_scan(conn, query):
+    failures = query_plans.check(conn, [query])
+    assert not failures, "full table scan: " + "; ".join(detail for _, detail in failures)
+
+
+def test_full_scan_is_reported(conn):
+    # The check itself still catches an unindexed lookup
+    query = ("books.by_author", "SELECT id FROM books WHERE author = ?", ("x",), ())
+    assert query_plans.check(conn, [query]) == [("books.by_author", "SCAN books")]
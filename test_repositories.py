@@ -0,0 +1,56 @@
+# test_repositories.py
+# Repository behaviour against a freshly migrated database: keyset paging
+# (including over NULLs in the sort column).
+#
+# Usage: python -m pytest test_repositories.py
+import pytest
+
+import db
+import repositories
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    yield
+    db.close_pool()
+
+
+def all_pages(repo, sort, descending=False, limit=2):
+    # Every row, fetched a page at a time the way PagedListModel does
+    rows = []
+    after = None
+    while True:
+        page = repo.page(after=after, limit=limit, sort=sort, descending=descending)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = repo.page_key(page[-1], sort)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_paging_by_name_includes_rows_without_a_name(database, descending):
+    with db.connection() as conn:
+        conn.executemany("INSERT INTO staff (name, role, salary) VALUES (?, 'Teacher', 1)",
+                         [("Bea",), (None,), ("Al",), (None,), ("",), ("Cy",), (None,)])
+    rows = all_pages(repositories.staff, "name", descending)
+    expected = sorted(repositories.staff.all(), key=lambda s: (s.name or "", s.id), reverse=descending)
+    assert [s.id for s in rows] == [s.id for s in expected]
+
+
+def test_paging_by_due_date_includes_undated_assignments(database):
+    with db.connection() as conn:
+        conn.executemany("INSERT INTO assignments (title, due_date) VALUES (?, ?)",
+                         [("a", "2025-02-01"), ("b", None), ("c", "2025-01-01"), ("d", None), ("e", None)])
+    rows = all_pages(repositories.assignments, "due_date")
+    assert [a.title for a in rows] == ["b", "d", "e", "c", "a"]
+
+
+def test_adding_a_catalogued_isbn_adds_copies(database):
+    first = repositories.books.add("Emma", "Austen", "0-14-143958-0", 2)
+    again = repositories.books.add("Emma", "Austen", "9780141439587", 3)
+    unknown = repositories.books.add("Emma", "Austen", "978 0141 439587", None)
+    book = repositories.books.get(first)
+    assert first == again == unknown
+    assert (book.quantity, book.available_count) == (5, 5)
@@ -0,0 +1,63 @@
+# test_rollups.py
+# Rebuilding the attendance rollups over part of the calendar: the months
+# asked for come back as a full rebuild would have them and the rest are
+# left alone.
+#
+# Usage: python -m pytest test_rollups.py
+import pytest
+
+import db
+import repositories
+import rollups
+
+CLEAR = ["DELETE FROM attendance_daily", "DELETE FROM attendance_monthly", "DELETE FROM attendance_term"]
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.set_database(str(tmp_path / "school.db"))
+    db.init_db()
+    repositories.terms.add("Spring 2024", "2024-01-01", "2024-03-31")
+    for name, date in [("Ann", "2024-01-08"), ("Bob", "2024-01-09"), ("Ann", "2024-02-05"),
+                       ("Cid", "2024-03-29"), ("Ann", "2024-06-03"), ("Bob", "2025-01-07")]:
+        repositories.attendance.add(name, date, "08:00:00", "Present")
+    yield
+    db.close_pool()
+
+
+def months():
+    with db.connection() as conn:
+        return [month for month, in conn.execute("SELECT DISTINCT month FROM attendance_monthly ORDER BY 1")]
+
+
+def cleared():
+    with db.connection() as conn:
+        for sql in CLEAR:
+            conn.execute(sql)
+
+
+def test_from_without_to_runs_to_the_latest_attendance(database):
+    cleared()
+    rollups.rebuild("2024-02-10")
+    assert months() == [202402, 202403, 202406, 202501]
+
+
+def test_to_without_from_runs_from_the_earliest_attendance(database):
+    cleared()
+    rollups.rebuild(end="2024-02-10")
+    assert months() == [202401, 202402]
+
+
+def test_a_range_rebuilds_only_its_months(database):
+    cleared()
+    rollups.rebuild("2024-03-01", "2024-06-30")
+    assert months() == [202403, 202406]
+    # The term overlapping the range is recomputed whole
+    with db.connection() as conn:
+        assert conn.execute("SELECT SUM(days_present) FROM attendance_term").fetchone() == (4,)
+
+
+def test_cli_from_alone(database, capsys):
+    cleared()
+    assert rollups.main(["--db", db.DB_PATH, "rebuild", "--from", "2024-06-01"]) == 0
+    assert months() == [202406, 202501]
@@ -1,8 +1,23 @@
 # transport_module.py
+import datetime
+
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox, QHBoxLayout
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QListWidget
 )
-import db
+import bus_assignment
+import clock
+import repositories
+import import_dialog
+import notifications
+import stops
+import tasks
+from list_models import PagedList
+from rapid_entry import RapidEntry
+
+STOP_RADIUS_M = 1000
+NEAREST_STOPS = 5
+STOPS_SHOWN = 200
+
 
 class TransportModule(QWidget):
     def __init__(self):
@@ -10,7 +25,6 @@ class TransportModule(QWidget):
         self.setWindowTitle("Transport Management")
         self.setMinimumSize(500, 500)
 
-        db.setup_tables()
         layout = QVBoxLayout()
 
         # --- Add Bus Section ---
@@ -23,10 +37,22 @@ class TransportModule(QWidget):
         self.driver_name_input.setPlaceholderText("Driver Name")
         layout.addWidget(self.driver_name_input)
 
+        self.capacity_input = QLineEdit()
+        self.capacity_input.setPlaceholderText("Seats (default 40)")
+        layout.addWidget(self.capacity_input)
+
+        self.bus_route_input = QLineEdit()
+        self.bus_route_input.setPlaceholderText("Route name (the route this bus runs)")
+        layout.addWidget(self.bus_route_input)
+
         add_bus_btn = QPushButton("Add Bus")
         add_bus_btn.clicked.connect(self.add_bus)
         layout.addWidget(add_bus_btn)
 
+        import_btn = QPushButton("Import Buses (CSV/JSONL)")
+        import_btn.clicked.connect(self.import_buses)
+        layout.addWidget(import_btn)
+
         # --- Add Route Section ---
         layout.addWidget(QLabel("🛣️ Add Route"))
         self.route_name_input = QLineEdit()
@@ -37,69 +63,244 @@ class TransportModule(QWidget):
         self.pickup_time_input.setPlaceholderText("Pickup Time (e.g. 7:30 AM)")
         layout.addWidget(self.pickup_time_input)
 
+        self.areas_input = QLineEdit()
+        self.areas_input.setPlaceholderText("Areas served, comma separated")
+        layout.addWidget(self.areas_input)
+
         add_route_btn = QPushButton("Add Route")
         add_route_btn.clicked.connect(self.add_route)
         layout.addWidget(add_route_btn)
 
+        # One checkbox switches both forms
+        self.bus_entry = RapidEntry(self, [self.bus_number_input, self.driver_name_input,
+                                           self.capacity_input, self.bus_route_input],
+                                    self.add_bus, self.load_data)
+        self.route_entry = RapidEntry(self, [self.route_name_input, self.pickup_time_input, self.areas_input],
+                                      self.add_route, self.load_data, checkbox=self.bus_entry.checkbox)
+        layout.addWidget(self.bus_entry.checkbox)
+
+        # --- Seat riders ---
+        riders_row = QHBoxLayout()
+        import_riders_btn = QPushButton("Import Riders (CSV/JSONL)")
+        import_riders_btn.clicked.connect(self.import_riders)
+        riders_row.addWidget(import_riders_btn)
+        self.assign_btn = QPushButton("Assign Riders to Buses")
+        self.assign_btn.clicked.connect(self.assign_riders)
+        riders_row.addWidget(self.assign_btn)
+        layout.addLayout(riders_row)
+
         # --- List Buses & Routes ---
         layout.addWidget(QLabel("🚌 Buses:"))
-        self.bus_list = QListWidget()
+        self.bus_list = PagedList(
+            repositories.buses, self.format_bus,
+            sorts=[("Oldest first", "id", False), ("Bus number", "bus_number", False)],
+            search_placeholder="Filter buses")
         layout.addWidget(self.bus_list)
 
         layout.addWidget(QLabel("🛣️ Routes:"))
-        self.route_list = QListWidget()
+        self.route_list = PagedList(
+            repositories.routes, self.format_route,
+            sorts=[("Oldest first", "id", False), ("Route name", "route_name", False)],
+            search_placeholder="Filter routes")
         layout.addWidget(self.route_list)
 
+        # --- Departures by pickup time ---
+        layout.addWidget(QLabel("🕒 Departures:"))
+        departures_row = QHBoxLayout()
+        self.depart_from_input = QLineEdit()
+        self.depart_from_input.setPlaceholderText("From (e.g. 7:00 AM)")
+        departures_row.addWidget(self.depart_from_input)
+        self.depart_to_input = QLineEdit()
+        self.depart_to_input.setPlaceholderText("To (e.g. 7:30 AM)")
+        departures_row.addWidget(self.depart_to_input)
+        departing_btn = QPushButton("Show")
+        departing_btn.clicked.connect(self.show_departing)
+        departures_row.addWidget(departing_btn)
+        next_btn = QPushButton("Next Departures")
+        next_btn.clicked.connect(self.show_next_departures)
+        departures_row.addWidget(next_btn)
+        layout.addLayout(departures_row)
+        self.departures_list = QListWidget()
+        layout.addWidget(self.departures_list)
+
+        # --- Stops near a point ---
+        layout.addWidget(QLabel("📍 Stops near a point:"))
+        stops_row = QHBoxLayout()
+        self.stop_lat_input = QLineEdit()
+        self.stop_lat_input.setPlaceholderText("Latitude")
+        stops_row.addWidget(self.stop_lat_input)
+        self.stop_lon_input = QLineEdit()
+        self.stop_lon_input.setPlaceholderText("Longitude")
+        stops_row.addWidget(self.stop_lon_input)
+        self.stop_radius_input = QLineEdit()
+        self.stop_radius_input.setPlaceholderText(f"Radius in metres (default {STOP_RADIUS_M})")
+        stops_row.addWidget(self.stop_radius_input)
+        nearest_btn = QPushButton("Nearest Stops")
+        nearest_btn.clicked.connect(self.show_nearest_stops)
+        stops_row.addWidget(nearest_btn)
+        within_btn = QPushButton("Within Radius")
+        within_btn.clicked.connect(self.show_stops_within)
+        stops_row.addWidget(within_btn)
+        layout.addLayout(stops_row)
+        import_stops_btn = QPushButton("Import Stops (CSV/JSONL)")
+        import_stops_btn.clicked.connect(self.import_stops)
+        layout.addWidget(import_stops_btn)
+        self.stops_list = QListWidget()
+        layout.addWidget(self.stops_list)
+
         self.setLayout(layout)
         self.load_data()
 
     def add_bus(self):
         number = self.bus_number_input.text().strip()
         driver = self.driver_name_input.text().strip()
+        seats = self.capacity_input.text().strip()
+        route = self.bus_route_input.text().strip()
         if not number:
-            QMessageBox.warning(self, "Input Error", "Bus number is required.")
+            notifications.warning("Bus number is required.")
+            self.bus_number_input.setFocus()
+            return
+        # 0 seats is allowed, as in the buses import: the bus is kept but
+        # bus_assignment places no riders on it
+        if seats and not seats.isdigit():
+            notifications.warning("Seats must be a whole number, 0 or more.")
+            self.capacity_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO buses (bus_number, driver_name) VALUES (?, ?)", (number, driver))
-        conn.commit()
-        conn.close()
+        self.bus_entry.submit(repositories.buses.add, number, driver, int(seats) if seats else None, route,
+                              on_result=self.bus_added, what=f"bus {number}")
 
         self.bus_number_input.clear()
         self.driver_name_input.clear()
-        self.load_data()
-        QMessageBox.information(self, "Success", "Bus added successfully.")
+        self.capacity_input.clear()
+        self.bus_route_input.clear()
+
+    def bus_added(self, _):
+        self.bus_entry.refresh()
+        notifications.info("Bus added.")
 
     def add_route(self):
         route = self.route_name_input.text().strip()
         pickup = self.pickup_time_input.text().strip()
+        areas = self.areas_input.text().split(",")
         if not route:
-            QMessageBox.warning(self, "Input Error", "Route name is required.")
+            notifications.warning("Route name is required.")
+            self.route_name_input.setFocus()
             return
 
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO routes (route_name, pickup_time) VALUES (?, ?)", (route, pickup))
-        conn.commit()
-        conn.close()
+        try:
+            clock.parse(pickup)
+        except ValueError:
+            notifications.warning("Pickup time must be a time of day, e.g. 7:30 AM or 07:30.")
+            self.pickup_time_input.setFocus()
+            return
+
+        self.route_entry.submit(repositories.routes.add, route, pickup, areas, on_result=self.route_added,
+                                what=f"route '{route}'")
 
         self.route_name_input.clear()
         self.pickup_time_input.clear()
-        self.load_data()
-        QMessageBox.information(self, "Success", "Route added successfully.")
+        self.areas_input.clear()
+
+    def route_added(self, _):
+        self.route_entry.refresh()
+        notifications.info("Route added.")
 
     def load_data(self):
-        self.bus_list.clear()
-        self.route_list.clear()
-
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT bus_number, driver_name FROM buses")
-        for bus_number, driver in cursor.fetchall():
-            self.bus_list.addItem(f"{bus_number} (Driver: {driver})")
-
-        cursor.execute("SELECT route_name, pickup_time FROM routes")
-        for route, pickup in cursor.fetchall():
-            self.route_list.addItem(f"{route} (Pickup: {pickup})")
-        conn.close()
+        self.bus_list.refresh()
+        self.route_list.refresh()
+
+    def show_departing(self):
+        # Blank ends mean the start or end of the day
+        try:
+            start = clock.parse(self.depart_from_input.text())
+            end = clock.parse(self.depart_to_input.text())
+        except ValueError as e:
+            notifications.warning(f"{e}. Try 7:00 AM or 07:00.")
+            return
+        start = 0 if start is None else start
+        end = clock.MINUTES_PER_DAY - 1 if end is None else end
+        tasks.submit(self, repositories.routes.departing, start, end, on_result=self.departures_loaded)
+
+    def show_next_departures(self):
+        now = datetime.datetime.now()
+        tasks.submit(self, repositories.routes.next_departures, now.hour * 60 + now.minute,
+                     on_result=self.departures_loaded)
+
+    def departures_loaded(self, routes):
+        self.departures_list.clear()
+        self.departures_list.addItems(
+            [f"{clock.display(route.pickup_minutes)}  {route.route_name}" for route in routes]
+            or ["No departures in that time range."])
+
+    def stop_point(self):
+        # (lat, lon) from the inputs, or None after a warning
+        try:
+            return (stops.latitude(self.stop_lat_input.text().strip()),
+                    stops.longitude(self.stop_lon_input.text().strip()))
+        except ValueError:
+            notifications.warning("Enter a latitude (-90 to 90) and longitude (-180 to 180) in degrees.")
+            self.stop_lat_input.setFocus()
+            return None
+
+    def show_nearest_stops(self):
+        point = self.stop_point()
+        if point is not None:
+            tasks.submit(self, stops.nearest, *point, NEAREST_STOPS, on_result=self.stops_loaded)
+
+    def show_stops_within(self):
+        point = self.stop_point()
+        if point is None:
+            return
+        radius = self.stop_radius_input.text().strip()
+        try:
+            radius = float(radius) if radius else STOP_RADIUS_M
+        except ValueError:
+            radius = -1
+        if radius <= 0:
+            notifications.warning("Radius must be a distance in metres above zero.")
+            self.stop_radius_input.setFocus()
+            return
+        tasks.submit(self, stops.within, *point, radius, STOPS_SHOWN, on_result=self.stops_loaded)
+
+    def stops_loaded(self, found):
+        self.stops_list.clear()
+        self.stops_list.addItems(
+            [f"{stop.distance:,.0f} m  {stop.stop_name} ({stop.route_name})" for stop in found]
+            or ["No stops found near there."])
+
+    def assign_riders(self):
+        self.assign_btn.setEnabled(False)
+        tasks.submit(self, bus_assignment.assign, on_result=self.riders_assigned,
+                     on_error=self.assign_failed, write=True)
+
+    def riders_assigned(self, plan):
+        self.assign_btn.setEnabled(True)
+        notifications.info(f"{len(plan.seats)} riders have seats, {plan.changed} assignments changed.")
+        if plan.unplaced:
+            notifications.warning(f"Riders without a seat: {len(plan.unplaced)} "
+                                  "(no bus serving their area has room).")
+        self.load_data()
+
+    def assign_failed(self, message):
+        self.assign_btn.setEnabled(True)
+        notifications.error(f"Riders not assigned: {message}")
+
+    @staticmethod
+    def format_bus(bus):
+        route = f", {bus.route_name}" if bus.route_name else ""
+        return f"{bus.bus_number} (Driver: {bus.driver_name}{route}, {bus.riders}/{bus.capacity} seats)"
+
+    @staticmethod
+    def format_route(route):
+        areas = f", serves {route.areas}" if route.areas else ""
+        return f"{route.route_name} (Pickup: {clock.display(route.pickup_minutes) or 'not set'}{areas})"
+
+    def import_buses(self):
+        import_dialog.run_import(self, "buses", on_done=self.load_data)
+
+    def import_riders(self):
+        import_dialog.run_import(self, "riders")
+
+    def import_stops(self):
+        import_dialog.run_import(self, "stops")